@@ -0,0 +1,50 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of conjunction screening over six hours as the catalog grows: the pairs left by each stage of the ConjunctionScreener against every pair at every step, with wall time.
+
+Run from the repository root with ``./runbench bench_conjunction``.
+"""
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import conjunction, shells
+
+START = 25676.0
+SPAN = 0.25
+
+def add_catalog(nsat, rng):
+	# random near-circular orbits from 400 to 2000 km, spread in inclination and node
+	satKeys = []
+	for k in range(nsat):
+		mnMotion = rng.uniform(12.0, 15.5)
+		satKey = tledll.TleAddSatFrFieldsGP(80000 + k, 'U', 'BENCH', 2020, 100.0, 0.0, 0, 1, rng.uniform(0.0, 120.0), rng.uniform(0.0, 360.0), rng.uniform(0.0, 0.01), rng.uniform(0.0, 360.0), rng.uniform(0.0, 360.0), mnMotion, 1)
+		sgp4dll.Sgp4InitSat(satKey)
+		satKeys.append(satKey)
+	return satKeys
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	sgp4dll.Sgp4Init(maindll_handle)
+
+	rng = np.random.default_rng(0)
+	print("six hours at 10 s steps, 5 km threshold")
+	print("%6s %14s %12s %14s %12s %8s" % ("nsat", "naive checks", "shell pairs", "grid checks", "conjunctions", "seconds"))
+	for nsat in [250, 500, 1000, 2000]:
+		satKeys = add_catalog(nsat, rng)
+		screener = conjunction.ConjunctionScreener(satKeys)
+		t0 = time.perf_counter()
+		found = screener.Screen(START, START + SPAN)
+		t = time.perf_counter() - t0
+		nstep = int(np.ceil(SPAN / screener.step)) + 1
+		index = shells.ShellIndex.from_sgp4(satKeys, START)
+		npair = len(index.pairs(screener.threshold + screener.shellPad))
+		index.close()
+		print("%6i %14i %12i %14i %12i %8.2f" % (nsat, nsat * (nsat - 1) // 2 * nstep, npair, screener.distanceChecks, found.shape[0], t))
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
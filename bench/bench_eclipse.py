@@ -0,0 +1,55 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of eclipse prediction for one day: the EclipseFinder against sampling every satellite every 10 seconds, counting propagations and wall time.
+
+Run from the repository root with ``./runbench bench_eclipse``.
+"""
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import eclipse, sunmoon
+
+START = 25876.0
+STEP = 10.0 / 86400.0
+
+LINES = [('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+		 ('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]
+
+def brute_force(satKeys, finder):
+	# one propagation and one shadow test per satellite and 10 second step
+	times = np.arange(START, START + 1.0, STEP)
+	(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, times)
+	dark = finder.Shadow(np.broadcast_to(times, pos.shape[:-1]), pos) < 0
+	return int(dark[:, 0].sum() + (dark[:, 1:] & ~dark[:, :-1]).sum())
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	sgp4dll.Sgp4Init(maindll_handle)
+	satKeys = [tledll.TleAddSatFrLines(line1, line2) for (line1, line2) in LINES]
+	for satKey in satKeys:
+		sgp4dll.Sgp4InitSat(satKey)
+	# fit the Sun positions once, so that both methods are timed without it
+	ephemeris = sunmoon.SunMoonEphemeris()
+	ephemeris.cover(START - 1.0, START + 2.0)
+
+	finder = eclipse.EclipseFinder(ephemeris=ephemeris)
+	t0 = time.perf_counter()
+	count = brute_force(satKeys, finder)
+	t_brute = time.perf_counter() - t0
+	n_brute = len(satKeys) * int(round(1.0 / STEP))
+
+	t0 = time.perf_counter()
+	found = finder.FindEclipses(satKeys, START, START + 1.0)
+	t_find = time.perf_counter() - t0
+
+	print("%i satellites, one day" % (len(satKeys)))
+	print("%-16s %8s %14s %10s" % ("method", "eclipses", "propagations", "seconds"))
+	print("%-16s %8i %14i %10.3f" % ("10 s sampling", count, n_brute, t_brute))
+	print("%-16s %8i %14i %10.3f" % ("EclipseFinder", found.shape[0], finder.propagations, t_find))
+	print("%.1fx fewer propagations" % (n_brute / finder.propagations))
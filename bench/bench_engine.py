@@ -0,0 +1,68 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of the multi-process PropagationEngine (see dshsaa.engine) against a single process propagating the same catalog with sgp4dll.Sgp4PropMseBatch.
+
+The catalog is built from the TLEs in test/raw/inputs/tledll.tleloadfile.inp, renumbered so that every copy is a distinct satellite.
+
+Run from the repository root with ``./runbench bench_engine``.
+"""
+import os
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import engine
+
+NSAT = 2000
+MSE = np.arange(0, 1440, 1, dtype=np.float64)
+
+def build_catalog(nsat):
+	with open('./test/raw/inputs/tledll.tleloadfile.inp') as f:
+		text = [line.rstrip('\n') for line in f]
+	pairs = [(text[i], text[i + 1]) for i in range(len(text) - 1) if text[i].startswith('1 ') and text[i + 1].startswith('2 ')]
+	lines = []
+	for n in range(nsat):
+		(line1, line2) = pairs[n % len(pairs)]
+		satNum = '%05d' % (10000 + n)
+		lines.append((line1[:2] + satNum + line1[7:], line2[:2] + satNum + line2[7:]))
+	return lines
+
+def init_dlls():
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	retcode = sgp4dll.Sgp4Init(maindll_handle)
+	if retcode != 0:
+		raise Exception("Failed to init sgp4dll with error code %i" % (retcode))
+
+def timed(func):
+	start = time.perf_counter()
+	func()
+	return time.perf_counter() - start
+
+if __name__ == "__main__":
+	lines = build_catalog(NSAT)
+	init_dlls()
+	satKeys = []
+	for (line1, line2) in lines:
+		satKey = tledll.TleAddSatFrLines(line1, line2)
+		sgp4dll.Sgp4InitSat(satKey)
+		satKeys.append(satKey)
+
+	print("%i satellites x %i times" % (NSAT, MSE.shape[0]))
+	print("%-16s %10s %9s" % ("mode", "seconds", "speedup"))
+	t_single = timed(lambda: sgp4dll.Sgp4PropMseBatch(satKeys, MSE))
+	print("%-16s %10.3f %8.2fx" % ("single process", t_single, 1.0))
+
+	nworkers = 1
+	while True:
+		with engine.PropagationEngine(lines, nworkers=nworkers) as eng:
+			eng.PropMse(MSE[:1]) # warm up the workers
+			t_engine = min(timed(lambda: eng.PropMse(MSE)) for i in range(3))
+		print("%-16s %10.3f %8.2fx" % ("%i workers" % (nworkers), t_engine, t_single / t_engine))
+		if nworkers >= (os.cpu_count() or 1):
+			break
+		nworkers = min(2 * nworkers, os.cpu_count() or 1)
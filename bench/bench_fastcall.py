@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+"""
+Microbenchmark of the per-call overhead of the fast call wrappers (see dshsaa.raw.fastcall).
+
+Each hot wrapper is timed against a copy of the wrapper as it was written before fastcall existed: the DLL function is looked up on the CDLL object on every call, arguments are boxed by hand, and satKey is type checked. The DLL work is identical in both versions, so the difference is the python overhead.
+
+Run from the repository root with ``./runbench``.
+"""
+import timeit
+import ctypes as c
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+
+N = 100000
+
+## Wrappers as written before fastcall, kept here as the baseline
+def legacy_Sgp4PropMse(satKey, mse):
+	if not isinstance(satKey, settings.stay_int64):
+		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
+	mse = c.c_double(mse)
+	ds50UTC = c.c_double(0)
+	pos = settings.double3()
+	vel = settings.double3()
+	llh = settings.double3()
+	retcode = sgp4dll.C_SGP4DLL.Sgp4PropMse(satKey, mse, c.byref(ds50UTC), pos, vel, llh)
+	ds50UTC = ds50UTC.value
+	pos = settings.array_to_list(pos)
+	vel = settings.array_to_list(vel)
+	llh = settings.array_to_list(llh)
+	return (retcode, ds50UTC, pos, vel, llh)
+
+def legacy_UTCToTAI(ds50UTC):
+	ds50UTC = c.c_double(ds50UTC)
+	ds50TAI = timedll.C_TIMEDLL.UTCToTAI(ds50UTC)
+	return ds50TAI
+
+def legacy_ECIToEFG(thetaG, posECI, velECI):
+	thetaG = c.c_double(thetaG)
+	posECI = settings.list_to_array(posECI)
+	velECI = settings.list_to_array(velECI)
+	posEFG = settings.double3()
+	velEFG = settings.double3()
+	astrodll.C_ASTRODLL.ECIToEFG(thetaG, posECI, velECI, posEFG, velEFG)
+	posEFG = settings.array_to_list(posEFG)
+	velEFG = settings.array_to_list(velEFG)
+	return (posEFG, velEFG)
+
+def init_dlls():
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	retcode = sgp4dll.Sgp4Init(maindll_handle)
+	if retcode != 0:
+		raise Exception("Failed to init sgp4dll with error code %i" % (retcode))
+	line1 = '1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992'
+	line2 = '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'
+	satKey = tledll.TleAddSatFrLines(line1, line2)
+	retcode = sgp4dll.Sgp4InitSat(satKey)
+	if retcode != 0:
+		raise Exception("Failed to init tle with code %i" % (retcode))
+	return satKey
+
+def per_call_us(stmt):
+	# best of 5 runs, in microseconds per call
+	return min(timeit.repeat(stmt, number=N, repeat=5)) / N * 1e6
+
+def report(name, legacy, current, current_nodebug):
+	print("%-16s %10.3f %10.3f %10.3f %8.2fx" % (name, legacy, current, current_nodebug, legacy / current_nodebug))
+
+if __name__ == "__main__":
+	satKey = init_dlls()
+	pos = [6524.834, 6862.875, 6448.296]
+	vel = [4.901327, 5.533756, -1.976341]
+	out = (settings.double3(), settings.double3(), settings.double3())
+
+	print("per-call overhead in microseconds, best of 5 x %i calls" % (N))
+	print("%-16s %10s %10s %10s %9s" % ("function", "before", "after", "no debug", "speedup"))
+
+	rows = [
+		("Sgp4PropMse", lambda: legacy_Sgp4PropMse(satKey, 60.0), lambda: sgp4dll.Sgp4PropMse(satKey, 60.0)),
+		("Sgp4PropMse out=", lambda: legacy_Sgp4PropMse(satKey, 60.0), lambda: sgp4dll.Sgp4PropMse(satKey, 60.0, out=out)),
+		("UTCToTAI", lambda: legacy_UTCToTAI(25852.6), lambda: timedll.UTCToTAI(25852.6)),
+		("ECIToEFG", lambda: legacy_ECIToEFG(1.3, pos, vel), lambda: astrodll.ECIToEFG(1.3, pos, vel)),
+	]
+	for (name, legacy, current) in rows:
+		t_legacy = per_call_us(legacy)
+		t_current = per_call_us(current)
+		previous = settings.set_debug(False)
+		t_current_nodebug = per_call_us(current)
+		settings.set_debug(previous)
+		report(name, t_legacy, t_current, t_current_nodebug)
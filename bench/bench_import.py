@@ -0,0 +1,24 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of the import time of dshsaa.raw with lazy library loading: importing the wrapper modules, loading the libraries on first use, and importing then calling dshsaa.raw.preload(), which is what every import used to cost. Each case runs in a fresh interpreter.
+
+Run from the repository root with ``./runbench bench_import``.
+"""
+import subprocess
+import sys
+
+CASES = [('import timedll', "from dshsaa.raw import maindll, timedll"),
+		 ('import timedll, call UTCToTAI', "from dshsaa.raw import maindll, timedll\ntimedll.TimeFuncInit(maindll.DllMainInit())\ntimedll.UTCToTAI(25000.0)"),
+		 ('import all', "from dshsaa.raw import maindll, timedll, tledll, envdll, astrodll, sgp4dll"),
+		 ('import all, preload', "import dshsaa.raw\nfrom dshsaa.raw import maindll, timedll, tledll, envdll, astrodll, sgp4dll\ndshsaa.raw.preload()")]
+
+def timed(code):
+	# best of 5 fresh interpreters, in milliseconds, without the interpreter start up
+	script = "import time\nt0 = time.perf_counter()\n%s\nprint((time.perf_counter() - t0) * 1e3)" % (code)
+	return min(float(subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout.split()[-1]) for i in range(5))
+
+if __name__ == "__main__":
+	print("milliseconds, best of 5 fresh interpreters")
+	for (name, code) in CASES:
+		print("%-32s %10.2f" % (name, timed(code)))
@@ -0,0 +1,59 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of pass prediction for one day: the PassPredictor against sampling every site and satellite pair every 10 seconds, counting propagations and wall time.
+
+Run from the repository root with ``./runbench bench_passes``.
+"""
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import passes, topo
+
+START = 25876.0
+STEP = 10.0 / 86400.0
+MIN_ELEVATION = 5.0
+
+LINES = [('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+		 ('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]
+
+# 40 sites scattered over the globe
+_rng = np.random.default_rng(0)
+SITES = np.stack([_rng.uniform(-60.0, 70.0, 40), _rng.uniform(-180.0, 180.0, 40), np.zeros(40)], axis=1)
+
+def brute_force(satKeys):
+	# one propagation and one look angle per site, satellite and 10 second step
+	times = np.arange(START, START + 1.0, STEP)
+	(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, times)
+	el = topo.TopoEngine(SITES).LookAngles(times, pos, vel)[..., topo.XA_TOPO_EL]
+	up = el >= MIN_ELEVATION
+	return int(up[..., 0].sum() + (up[..., 1:] & ~up[..., :-1]).sum())
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	sgp4dll.Sgp4Init(maindll_handle)
+	satKeys = [tledll.TleAddSatFrLines(line1, line2) for (line1, line2) in LINES]
+	for satKey in satKeys:
+		sgp4dll.Sgp4InitSat(satKey)
+
+	t0 = time.perf_counter()
+	count = brute_force(satKeys)
+	t_brute = time.perf_counter() - t0
+	# the brute force search propagates each satellite once per step per site when done pair by pair
+	n_brute = len(SITES) * len(satKeys) * int(round(1.0 / STEP))
+
+	predictor = passes.PassPredictor(SITES, minElevation=MIN_ELEVATION)
+	t0 = time.perf_counter()
+	found = predictor.FindPasses(satKeys, START, START + 1.0)
+	t_pred = time.perf_counter() - t0
+
+	print("%i sites, %i satellites, one day" % (len(SITES), len(satKeys)))
+	print("%-16s %8s %14s %10s" % ("method", "passes", "propagations", "seconds"))
+	print("%-16s %8i %14i %10.3f" % ("10 s pairwise", count, n_brute, t_brute))
+	print("%-16s %8i %14i %10.3f" % ("PassPredictor", found.shape[0], predictor.propagations, t_pred))
+	print("%.1fx fewer propagations" % (n_brute / predictor.propagations))
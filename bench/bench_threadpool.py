@@ -0,0 +1,69 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of the ThreadPool: every function of threadpool.THREAD_SAFE on 200000 rows, serially and over 2, 4 and all the cores.
+
+Run from the repository root with ``./runbench bench_threadpool``.
+"""
+import os
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll
+from dshsaa import threadpool
+
+ROWS = 200000
+
+def timed(func):
+	# best of 3 runs, in milliseconds
+	best = None
+	for i in range(3):
+		t0 = time.perf_counter()
+		func()
+		t = (time.perf_counter() - t0) * 1e3
+		best = t if best is None else min(best, t)
+	return best
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	rng = np.random.default_rng(0)
+	theta = rng.uniform(0.0, 2 * np.pi, ROWS)
+	pos = rng.uniform(-8000.0, 8000.0, (ROWS, 3))
+	vel = rng.uniform(-8.0, 8.0, (ROWS, 3))
+	llh = np.stack([rng.uniform(-90.0, 90.0, ROWS), rng.uniform(-180.0, 180.0, ROWS), rng.uniform(0.0, 2.0, ROWS)], axis=1)
+	kep = np.stack([rng.uniform(6600.0, 42000.0, ROWS), rng.uniform(0.0, 0.5, ROWS), rng.uniform(0.0, 180.0, ROWS),
+					rng.uniform(0.0, 360.0, ROWS), rng.uniform(0.0, 360.0, ROWS), rng.uniform(0.0, 360.0, ROWS)], axis=1)
+	ds50 = 25876.0 + rng.uniform(0.0, 10.0, ROWS)
+	args = {'ECIToEFGBatch': (theta, pos, vel),
+			'ECIToTopoCompsBatch': (theta, 38.8, llh * 10.0, pos, vel),
+			'ECRToEFGBatch': (theta * 0.01, 0.3, pos, vel),
+			'EFGPosToLLHBatch': (pos,),
+			'EFGToECIBatch': (theta, pos, vel),
+			'EFGToECRBatch': (theta * 0.01, 0.3, pos, vel),
+			'KepToPosVelBatch': (kep,),
+			'LLHToEFGPosBatch': (llh,),
+			'PosVelToKepBatch': (pos, vel),
+			'SolveKepEqtnBatch': (kep,),
+			'XYZToLLHBatch': (theta, pos),
+			'TAIToUT1Array': (ds50,),
+			'TAIToUTCArray': (ds50,),
+			'ThetaGrnwchFK5Array': (ds50,),
+			'UTCToETArray': (ds50,),
+			'UTCToTAIArray': (ds50,),
+			'UTCToUT1Array': (ds50,)}
+
+	counts = sorted(set([2, 4, os.cpu_count() or 1]))
+	pools = [threadpool.ThreadPool(nthreads=n) for n in counts]
+	print("%i rows, milliseconds, best of 3" % (ROWS))
+	print("%-20s %10s" % ("function", "serial") + "".join(" %9s" % ("%i threads" % (n)) for n in counts))
+	for (name, a) in args.items():
+		(module, rowsArg) = threadpool.THREAD_SAFE[name]
+		func = getattr(module, name)
+		t_serial = timed(lambda: func(*a))
+		times = [timed(lambda: pool.run(name, *a)) for pool in pools]
+		print("%-20s %10.1f" % (name, t_serial) + "".join(" %8.1fx" % (t_serial / t) for t in times))
+	for pool in pools:
+		pool.close()
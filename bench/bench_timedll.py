@@ -0,0 +1,39 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of the timedll array conversions over one day of one second samples: the DLL path (one call per element) against the TConTable numpy fast path, with the table's validation errors.
+
+Run from the repository root with ``./runbench bench_timedll``.
+"""
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, timedll
+
+START = 25852.0
+
+def timed(func):
+	# best of 5 runs, in milliseconds
+	best = None
+	for i in range(5):
+		t0 = time.perf_counter()
+		func()
+		t = (time.perf_counter() - t0) * 1e3
+		best = t if best is None else min(best, t)
+	return best
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	retcode = timedll.TimeFuncInit(maindll_handle)
+	if retcode != 0:
+		raise Exception("Failed to init timedll with error code %i" % (retcode))
+	ds50 = START + np.arange(86400) / 86400
+	table = timedll.TConTable(START, START + 1.0)
+	errors = table.validate()
+
+	print("86400 samples, milliseconds, best of 5")
+	print("%-16s %10s %10s %9s %12s" % ("function", "dll", "table", "speedup", "max error"))
+	for name in ['UTCToTAI', 'UTCToUT1', 'UTCToET', 'TAIToUTC', 'TAIToUT1', 'ThetaGrnwchFK5']:
+		array = getattr(timedll, name + 'Array')
+		t_dll = timed(lambda: array(ds50))
+		t_table = timed(lambda: array(ds50, table=table))
+		print("%-16s %10.2f %10.2f %8.1fx %12.3e" % (name, t_dll, t_table, t_dll / t_table, errors[name]))
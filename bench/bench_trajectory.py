@@ -0,0 +1,60 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark of repeated state queries within one day: the TrajectoryStore against direct propagation with Sgp4PropDs50UTC and Sgp4PropDs50UTCBatch, for several segment lengths, with the largest position error of each.
+
+Run from the repository root with ``./runbench bench_trajectory``.
+"""
+import time
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import trajectory
+
+START = 25876.0
+QUERIES = 100000
+SEGMENTS = [1.0 / 12.0, 1.0 / 48.0, 1.0 / 192.0]
+
+LINES = [('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+		 ('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]
+
+if __name__ == "__main__":
+	maindll_handle = maindll.DllMainInit()
+	for initer in [timedll.TimeFuncInit, tledll.TleInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+		retcode = initer(maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+	sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/')
+	sgp4dll.Sgp4Init(maindll_handle)
+	satKeys = [tledll.TleAddSatFrLines(line1, line2) for (line1, line2) in LINES]
+	for satKey in satKeys:
+		sgp4dll.Sgp4InitSat(satKey)
+	ds50UTC = START + np.random.default_rng(0).uniform(0.0, 1.0, QUERIES)
+
+	print("%i satellites, %i random times in one day each" % (len(satKeys), QUERIES))
+	print("%-24s %10s %14s %12s" % ("method", "seconds", "propagations", "max error km"))
+
+	t0 = time.perf_counter()
+	for satKey in satKeys:
+		for t in ds50UTC[:QUERIES // 10].tolist():
+			sgp4dll.Sgp4PropDs50UTC(satKey, t)
+	t_single = (time.perf_counter() - t0) * 10
+	print("%-24s %10.3f %14i %12s" % ("Sgp4PropDs50UTC (est.)", t_single, len(satKeys) * QUERIES, "-"))
+
+	t0 = time.perf_counter()
+	(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, ds50UTC)
+	t_batch = time.perf_counter() - t0
+	print("%-24s %10.3f %14i %12s" % ("Sgp4PropDs50UTCBatch", t_batch, len(satKeys) * QUERIES, "-"))
+
+	for segmentDays in SEGMENTS:
+		store = trajectory.TrajectoryStore(segmentDays=segmentDays)
+		t0 = time.perf_counter()
+		store.cover(satKeys, START, START + 1.0)
+		t_fit = time.perf_counter() - t0
+		t0 = time.perf_counter()
+		(storeRetcode, storePos, storeVel) = store.State(satKeys, ds50UTC)
+		t_query = time.perf_counter() - t0
+		error = np.linalg.norm(storePos - pos, axis=-1).max()
+		name = "store %g min" % (segmentDays * 1440.0)
+		print("%-24s %10.3f %14i %12.2e" % (name + " fit", t_fit, store.propagations, error))
+		print("%-24s %10.3f %14i %12s" % (name + " query", t_query, 0, "-"))
+		store.close()
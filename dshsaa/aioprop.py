@@ -0,0 +1,292 @@
+#! /usr/bin/env python3
+
+"""
+aioprop.py lets asyncio code propagate satellites and call the other SAA functions without blocking its event loop.
+
+Every DLL call blocks the thread that makes it, and the DLLs keep global state which is not safe to touch from several threads at once (see engine.py). The AsyncPropagator starts one owner thread, which initializes the DLLs (session.start) and is the only thread of the propagator to call them. Coroutines queue requests for it and await the results:
+
+	- ds50utc requests made during the same event loop iteration are merged into one list, handed to the owner thread in one piece, and propagated with a single Sgp4PropDs50UTCBatch call. The owner thread also merges every list waiting in its queue when it gets to them, so a burst of requests costs a few batch calls instead of one call each.
+	- batch requests run Sgp4PropDs50UTCBatch as given, and call requests run any function, such as a timedll or astrodll conversion, on the owner thread.
+	- A request whose task is cancelled before the owner thread gets to it is dropped without a DLL call. One which is already running completes, and its result is discarded.
+
+The propagator belongs to the event loop it is first used from. Other code of the process must not call the DLLs while it is running.
+
+.. code-block:: python
+
+	from dshsaa import aioprop
+
+	async with aioprop.AsyncPropagator() as prop:
+		(retcode, mse, pos, vel, llh) = await prop.ds50utc(satKey, 25876.5)
+		results = await asyncio.gather(*[prop.ds50utc(satKey, t) for t in times])	# one DLL call
+		(retcode, mse, pos, vel, llh) = await prop.batch(satKeys, times)
+		ds50ET = await prop.call(timedll.UTCToET, 25876.5)
+"""
+import asyncio
+import queue
+import threading
+import numpy as np
+from dshsaa.raw import settings
+import pdb
+
+class AsyncPropagator:
+	"""
+	An asyncio front end to sgp4dll and the other SAA DLLs, served by a dedicated owner thread, see the module description.
+
+	:param str licFilePath: The directory holding the SGP4 license file, passed to session.start in the owner thread.
+	:param float batchWindow: Seconds to keep collecting ds50utc requests before handing them to the owner thread. The default of 0 collects the requests of one event loop iteration; a small window merges requests arriving over a longer span at the cost of that much latency.
+	:param int maxBatch: The largest number of ds50utc requests propagated in one call.
+	:ivar int requests: The number of requests made so far.
+	:ivar int calls: The number of DLL calls (batches and calls) made by the owner thread so far.
+	:ivar int cancelled: The number of requests dropped because they were cancelled before the owner thread got to them.
+	"""
+	def __init__(self, licFilePath='./dshsaa/libdll/', batchWindow=0.0, maxBatch=4096):
+		if batchWindow < 0:
+			raise Exception("batchWindow must not be negative, got %s" % (batchWindow))
+		if maxBatch < 1:
+			raise Exception("maxBatch must be at least 1, got %s" % (maxBatch))
+		self.batchWindow = batchWindow
+		self.maxBatch = maxBatch
+		self.requests = 0
+		self.calls = 0
+		self.cancelled = 0
+		self._loop = None
+		self._pending = []
+		self._flush = None
+		self._closed = False
+		self._queue = queue.Queue()
+		self._lock = threading.Lock()
+		self._round = []
+		self._ownerError = None
+		self._started = threading.Event()
+		self._startError = None
+		self._thread = threading.Thread(target=self._owner_main, args=(licFilePath,), name='dshsaa-aioprop', daemon=True)
+		self._thread.start()
+		self._started.wait()
+		if self._startError is not None:
+			self._thread.join()
+			raise self._startError
+
+	async def ds50utc(self, satKey, ds50UTC):
+		"""
+		Awaitable sgp4dll.Sgp4PropDs50UTC, merged with the other requests of the same event loop iteration into one batch call.
+
+		:param satKey: The satellite's key.
+		:type satKey: settings.stay_int64, int
+		:param float ds50UTC: The time to propagate to, days since 1950, UTC.
+		:return: (retcode, mse, pos, vel, llh), see sgp4dll.Sgp4PropDs50UTC.
+		"""
+		future = self._submit()
+		self._pending.append((future, settings.int64_value(satKey), float(ds50UTC)))
+		if len(self._pending) >= self.maxBatch:
+			self._send_pending()
+		elif self._flush is None:
+			if self.batchWindow > 0:
+				self._flush = self._loop.call_later(self.batchWindow, self._send_pending)
+			else:
+				self._flush = self._loop.call_soon(self._send_pending)
+		return await future
+
+	async def batch(self, satKeys, ds50UTC):
+		"""
+		Awaitable sgp4dll.Sgp4PropDs50UTCBatch.
+
+		:param satKeys: The satellites to propagate.
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param numpy.ndarray ds50UTC: The times, see sgp4dll.Sgp4PropDs50UTCBatch.
+		:return: (retcode, mse, pos, vel, llh), see sgp4dll.Sgp4PropDs50UTCBatch.
+		"""
+		from dshsaa.raw import sgp4dll
+		return await self.call(sgp4dll.Sgp4PropDs50UTCBatch, settings.int64_values(satKeys), np.array(ds50UTC, dtype=np.float64))
+
+	async def call(self, func, *args, **kwargs):
+		"""
+		Runs any function on the owner thread, such as a timedll or astrodll conversion.
+
+		:param callable func: The function.
+		:param args: Its positional arguments.
+		:param kwargs: Its keyword arguments.
+		:return: Whatever func returns. Exceptions raised by func are raised here.
+		"""
+		future = self._submit()
+		self._put(('call', [(future, func, args, kwargs)]))
+		return await future
+
+	def stats(self):
+		"""
+		Returns the counters, for monitoring.
+
+		:return:
+			**stats** (*dict*) - requests, calls, cancelled, and queued (requests waiting for the owner thread).
+		"""
+		return {'requests': self.requests,
+				'calls': self.calls,
+				'cancelled': self.cancelled,
+				'queued': self._queue.qsize() + len(self._pending)}
+
+	def close(self):
+		"""
+		Stops the owner thread once the requests already queued are served. Requests made afterwards raise an exception. Calling close more than once is harmless.
+
+		The propagator also closes itself if the owner thread is stopped by an exception which is not an Exception (such as SystemExit or KeyboardInterrupt raised by a call). The requests it held or had queued then raise an exception chained to it, as do later requests.
+		"""
+		if self._closed:
+			return
+		if self._pending:
+			self._send_pending()
+		self._closed = True
+		self._queue.put(None)
+		self._thread.join()
+
+	async def aclose(self):
+		"""
+		close, without blocking the event loop while the owner thread finishes.
+		"""
+		if self._closed:
+			return
+		if self._pending:
+			self._send_pending()
+		self._closed = True
+		self._queue.put(None)
+		await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, tb):
+		await self.aclose()
+
+	def _submit(self):
+		# a future of the propagator's event loop for one request
+		if self._ownerError is not None:
+			raise Exception("AsyncPropagator is closed, its owner thread stopped on %r" % (self._ownerError,))
+		if self._closed:
+			raise Exception("AsyncPropagator is closed")
+		loop = asyncio.get_running_loop()
+		if self._loop is None:
+			self._loop = loop
+		elif loop is not self._loop:
+			raise Exception("AsyncPropagator is bound to another event loop")
+		self.requests += 1
+		return loop.create_future()
+
+	def _send_pending(self):
+		if self._flush is not None:
+			self._flush.cancel()
+			self._flush = None
+		(pending, self._pending) = (self._pending, [])
+		if pending:
+			self._put(('ds50utc', pending))
+
+	def _put(self, job):
+		# queue a job for the owner thread, or fail it at once if the owner thread is gone
+		with self._lock:
+			if self._ownerError is None:
+				self._queue.put(job)
+				return
+		self._fail([job], self._ownerError)
+
+	def _owner_main(self, licFilePath):
+		# body of the owner thread: initialize the DLLs, then serve requests until close
+		try:
+			from dshsaa import session
+			session.start(licFilePath)
+		except BaseException as e:
+			self._startError = e
+			return
+		finally:
+			self._started.set()
+		try:
+			self._serve()
+		except BaseException as e:
+			# whatever stopped the thread, nothing may be left waiting: fail the requests of this round and
+			# everything queued, and refuse new ones
+			with self._lock:
+				self._ownerError = e
+				self._closed = True
+			jobs = list(self._round)
+			while True:
+				try:
+					jobs.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			self._fail(jobs, e)
+
+	def _serve(self):
+		stop = False
+		while not stop:
+			jobs = [self._queue.get()]
+			# everything else already waiting is served in the same round, ds50utc requests merged
+			while True:
+				try:
+					jobs.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			self._round = jobs
+			singles = []
+			for job in jobs:
+				if job is None:
+					stop = True
+					continue
+				(kind, requests) = job
+				if kind == 'ds50utc':
+					singles.extend(requests)
+				else:
+					self._serve_calls(requests)
+			for first in range(0, len(singles), self.maxBatch):
+				self._serve_ds50utc(singles[first:first + self.maxBatch])
+
+	def _serve_calls(self, requests):
+		for (future, func, args, kwargs) in requests:
+			if future.cancelled():
+				self.cancelled += 1
+				continue
+			try:
+				result = func(*args, **kwargs)
+			except Exception as e:
+				self._resolve(future, exception=e)
+			else:
+				self._resolve(future, result)
+			self.calls += 1
+
+	def _serve_ds50utc(self, requests):
+		from dshsaa.raw import sgp4dll
+		live = [request for request in requests if not request[0].cancelled()]
+		self.cancelled += len(requests) - len(live)
+		if not live:
+			return
+		satKeys = [satKey for (future, satKey, t) in live]
+		times = np.array([[t] for (future, satKey, t) in live], dtype=np.float64)
+		try:
+			(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, times)
+		except Exception as e:
+			for (future, satKey, t) in live:
+				self._resolve(future, exception=e)
+			return
+		finally:
+			self.calls += 1
+		for (i, (future, satKey, t)) in enumerate(live):
+			self._resolve(future, (int(retcode[i, 0]), float(mse[i, 0]), pos[i, 0].tolist(), vel[i, 0].tolist(), llh[i, 0].tolist()))
+
+	def _fail(self, jobs, cause):
+		for job in jobs:
+			if job is None:
+				continue
+			for request in job[1]:
+				error = Exception("AsyncPropagator owner thread stopped on %r" % (cause,))
+				error.__cause__ = cause
+				self._resolve(request[0], exception=error)
+
+	def _resolve(self, future, result=None, exception=None):
+		# hand a result to the event loop, which drops it if the request was cancelled meanwhile
+		def resolve():
+			if future.done():
+				return
+			if exception is not None:
+				future.set_exception(exception)
+			else:
+				future.set_result(result)
+		try:
+			self._loop.call_soon_threadsafe(resolve)
+		except RuntimeError:
+			# the event loop is closed, nobody is waiting any more
+			pass
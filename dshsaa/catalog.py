@@ -0,0 +1,243 @@
+#! /usr/bin/env python3
+
+"""
+catalog.py holds a TLE catalog as columns in a numpy structured array.
+
+Reading a catalog back out of tledll costs one TleGetAllFieldsGP call per satKey. The TleCatalog instead keeps the fields it was loaded with, one row per satellite, so catalog-wide questions are array operations:
+
+.. code-block:: python
+
+	from dshsaa import catalog
+
+	cat = catalog.TleCatalog.from_file('catalog.3le')
+	retrograde = cat.data[cat.data['incli'] > 90.0]
+	stale = cat.data[cat.data['epoch'] < now_ds50UTC - 30.0]
+	sgp4dll.Sgp4PropMseBatch(retrograde['satKey'], mse)
+
+Every row is registered in tledll as it is loaded, so the satKey column can be handed straight to the sgp4dll functions (after Sgp4InitSat).
+
+A refresh from a newer TLE set does not need TleRemoveAllSats and a full reload. TleCatalog.sync compares the new set against the catalog by satNum, epoch and elsetNum, and only removes, adds and initializes the TLEs that differ:
+
+.. code-block:: python
+
+	cat = catalog.TleCatalog.from_file('catalog.3le')
+	cat.init_sgp4()
+	...
+	cat.sync(catalog.read_tle_file('catalog_today.3le'), sgp4=True)
+"""
+import numpy as np
+from dshsaa.raw import settings, tledll, sgp4dll
+import pdb
+
+CATALOG_DTYPE = np.dtype([('satNum', np.int32),
+						  ('epoch', np.float64),
+						  ('bstar', np.float64),
+						  ('incli', np.float64),
+						  ('node', np.float64),
+						  ('eccen', np.float64),
+						  ('omega', np.float64),
+						  ('mnAnomaly', np.float64),
+						  ('mnMotion', np.float64),
+						  ('revNum', np.int32),
+						  ('elsetNum', np.int32),
+						  ('satKey', np.int64)])
+"""
+The row layout of TleCatalog.data.
+
+	- **satNum** - Satellite number
+	- **epoch** - Element epoch time, days since 1950, UTC
+	- **bstar** - B* drag term (1/er)
+	- **incli** - Orbit inclination (degrees)
+	- **node** - Right ascension of ascending node (degrees)
+	- **eccen** - Eccentricity
+	- **omega** - Argument of perigee (degrees)
+	- **mnAnomaly** - Mean anomaly (degrees)
+	- **mnMotion** - Mean motion (rev/day)
+	- **revNum** - Revolution number at epoch
+	- **elsetNum** - Element set number
+	- **satKey** - The satellite's unique key in tledll
+"""
+
+# catalog column and the xa_tle index it is read from
+_COLUMNS = [('satNum', tledll.XA_TLE_SATNUM),
+			('epoch', tledll.XA_TLE_EPOCH),
+			('bstar', tledll.XA_TLE_BSTAR),
+			('incli', tledll.XA_TLE_INCLI),
+			('node', tledll.XA_TLE_NODE),
+			('eccen', tledll.XA_TLE_ECCEN),
+			('omega', tledll.XA_TLE_OMEGA),
+			('mnAnomaly', tledll.XA_TLE_MNANOM),
+			('mnMotion', tledll.XA_TLE_MNMOTN),
+			('revNum', tledll.XA_TLE_REVNUM),
+			('elsetNum', tledll.XA_TLE_ELSETNUM)]
+
+def read_tle_file(tleFile):
+	"""
+	Reads the two line element sets out of a TLE or 3LE text file.
+
+	Line 1 / line 2 pairs are found by their leading ``1 `` and ``2 ``. Anything else, such as the name line of a 3LE or blank lines, is skipped.
+
+	:param str tleFile: The name of the file to read.
+	:return:
+		**lines** (*list*) - The (line1, line2) string pairs, in file order.
+	"""
+	with open(tleFile, 'r') as f:
+		text = [line.rstrip() for line in f]
+	lines = []
+	i = 0
+	while i < len(text) - 1:
+		if text[i].startswith('1 ') and text[i + 1].startswith('2 '):
+			lines.append((text[i], text[i + 1]))
+			i += 2
+		else:
+			i += 1
+	return lines
+
+class TleCatalog:
+	"""
+	A TLE catalog stored as a numpy structured array, see CATALOG_DTYPE for the columns.
+
+	tledll must be initialized (TleInit) before TLEs are added.
+
+	:ivar numpy.ndarray data: One row per satellite, in the order the TLEs were added.
+	:ivar list rejected: The (line1, line2) pairs that could not be parsed or that tledll refused to add, such as duplicates.
+	"""
+	def __init__(self):
+		self.data = np.zeros(0, dtype=CATALOG_DTYPE)
+		self.rejected = []
+
+	@classmethod
+	def from_file(cls, tleFile):
+		"""
+		Builds a catalog from a TLE or 3LE text file.
+
+		:param str tleFile: The name of the file to read.
+		:return:
+			**catalog** (*TleCatalog*) - The new catalog.
+		"""
+		return cls.from_lines(read_tle_file(tleFile))
+
+	@classmethod
+	def from_lines(cls, lines):
+		"""
+		Builds a catalog from a list of line pairs.
+
+		:param list lines: The two line element sets, as (line1, line2) string pairs.
+		:return:
+			**catalog** (*TleCatalog*) - The new catalog.
+		"""
+		catalog = cls()
+		catalog.add_lines(lines)
+		return catalog
+
+	def add_lines(self, lines):
+		"""
+		Parses line pairs, registers them in tledll, and appends them to the catalog in one pass (see tledll.TleAddSatFrLinesBatch).
+
+		:param list lines: The two line element sets, as (line1, line2) string pairs.
+		:return:
+			**added** (*int*) - The number of rows appended. The other pairs are appended to **rejected**.
+		"""
+		lines = list(lines)
+		(retcode, satKeys, xa_tle) = tledll.TleAddSatFrLinesBatch(lines)
+		ok = (retcode == 0) & (satKeys > 0)
+		rows = np.zeros(int(ok.sum()), dtype=CATALOG_DTYPE)
+		for (name, index) in _COLUMNS:
+			rows[name] = xa_tle[ok, index]
+		rows['satKey'] = satKeys[ok]
+		self.rejected.extend(lines[i] for i in np.flatnonzero(~ok))
+		self.data = np.concatenate((self.data, rows))
+		return rows.shape[0]
+
+	def init_sgp4(self):
+		"""
+		Initializes every satellite of the catalog in sgp4dll (Sgp4InitSat).
+
+		:return:
+			**failed** (*numpy.ndarray*) - int64 array of the satKeys which Sgp4InitSat refused.
+		"""
+		return _init_sgp4(self.data['satKey'])
+
+	def sync(self, lines, sgp4=False):
+		"""
+		Brings the catalog, and tledll, in line with a new TLE set. The new set is still parsed in full, but the DLL calls which modify the TLE tree and the sgp4dll satellite set, the slow part of a reload, are only made for the TLEs which changed.
+
+		A TLE is identified by its satNum, epoch and elsetNum. The new set is parsed without loading it (tledll.TleLinesToArrayBatch), then the rows whose TLE is not in the new set are removed from tledll (TleRemoveSat) and the TLEs which are not in the catalog yet are added (tledll.TleAddSatFrArrayBatch). Unchanged rows keep their satKey and their place in the catalog, new rows are appended.
+
+		:param list lines: The complete new TLE set, as (line1, line2) string pairs.
+		:param bool sgp4: If True, the catalog is assumed to be initialized in sgp4dll, and removed satellites are also removed from sgp4dll (Sgp4RemoveSat) while added ones are initialized (Sgp4InitSat).
+		:return:
+			**counts** (*dict*) - The number of satNums 'added' (new satNums), 'removed' (satNums no longer in the set) and 'updated' (satNums with a new TLE), the number of TLEs 'unchanged', the number of line pairs 'rejected' (appended to **rejected**), and when sgp4 is True the number of added TLEs for which Sgp4InitSat 'failed'.
+		"""
+		lines = list(lines)
+		(retcode, xa_tle, xs_tle) = tledll.TleLinesToArrayBatch(lines)
+		identity = _identity(xa_tle[:, tledll.XA_TLE_SATNUM], xa_tle[:, tledll.XA_TLE_EPOCH], xa_tle[:, tledll.XA_TLE_ELSETNUM])
+		loaded = dict(zip(_identity(self.data['satNum'], self.data['epoch'], self.data['elsetNum']), range(self.data.shape[0])))
+		keep = np.zeros(self.data.shape[0], dtype=bool)
+		new = []
+		rejected = []
+		seen = set()
+		for i in range(len(lines)):
+			if retcode[i] != 0 or identity[i] in seen:
+				rejected.append(i)
+				continue
+			seen.add(identity[i])
+			row = loaded.get(identity[i])
+			if row is None:
+				new.append(i)
+			else:
+				keep[row] = True
+
+		# remove first, a new elsetNum at the same epoch has the same satKey as the TLE it replaces
+		stale = self.data[~keep]
+		for satKey in stale['satKey'].tolist():
+			satKey = settings.stay_int64(satKey)
+			if sgp4:
+				sgp4dll.Sgp4RemoveSat(satKey)
+			tledll.TleRemoveSat(satKey)
+
+		satKeys = tledll.TleAddSatFrArrayBatch(xa_tle[new], [xs_tle[i] for i in new])
+		ok = satKeys > 0
+		new = np.array(new, dtype=np.int64)
+		rejected.extend(new[~ok].tolist())
+		rows = np.zeros(int(ok.sum()), dtype=CATALOG_DTYPE)
+		for (name, index) in _COLUMNS:
+			rows[name] = xa_tle[new[ok], index]
+		rows['satKey'] = satKeys[ok]
+		self.data = np.concatenate((self.data[keep], rows))
+		self.rejected.extend(lines[i] for i in sorted(rejected))
+
+		staleSatNums = set(stale['satNum'].tolist())
+		newSatNums = set(rows['satNum'].tolist())
+		counts = {'added': len(newSatNums - staleSatNums),
+				  'removed': len(staleSatNums - newSatNums),
+				  'updated': len(newSatNums & staleSatNums),
+				  'unchanged': int(keep.sum()),
+				  'rejected': len(rejected)}
+		if sgp4:
+			counts['failed'] = _init_sgp4(rows['satKey']).shape[0]
+		return counts
+
+	def satKeys(self):
+		"""
+		Returns the satKeys of the catalog, ready to pass to the sgp4dll batch functions.
+
+		:return:
+			**satKeys** (*numpy.ndarray*) - int64 array with one satKey per row.
+		"""
+		return self.data['satKey']
+
+	def __len__(self):
+		return self.data.shape[0]
+
+	def __getitem__(self, index):
+		return self.data[index]
+
+def _identity(satNum, epoch, elsetNum):
+	# hashable (satNum, epoch, elsetNum) per TLE
+	return list(zip(np.asarray(satNum).astype(np.int64).tolist(), np.asarray(epoch, dtype=np.float64).tolist(), np.asarray(elsetNum).astype(np.int64).tolist()))
+
+def _init_sgp4(satKeys):
+	# Sgp4InitSat on each satKey, returning those which failed
+	failed = [satKey for satKey in satKeys.tolist() if sgp4dll.Sgp4InitSat(settings.stay_int64(satKey)) != 0]
+	return np.array(failed, dtype=np.int64)
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+
+"""
+chebyshev.py fits and evaluates the piecewise Chebyshev interpolants of the cached ephemerides (sunmoon, trajectory).
+
+Each segment is mapped onto x in [-1, 1]. A function sampled at the degree + 1 nodes of the segment is turned into coefficients by one matrix product, and the coefficients of many segments are evaluated at once, one x per segment, with the Clenshaw recurrence.
+
+.. code-block:: python
+
+	from dshsaa import chebyshev
+
+	(nodes, fit) = chebyshev.nodes(12)
+	coeffs = fit @ values			# values of shape (13, m), sampled at the nodes
+	chebyshev.evaluate(coeffs[np.newaxis], np.array([0.25]))
+"""
+import numpy as np
+import pdb
+
+def nodes(degree):
+	"""
+	The Chebyshev nodes of the first kind on [-1, 1], and the matrix taking the values of a function at those nodes to the coefficients of its interpolating polynomial.
+
+	:param int degree: The degree of the polynomials.
+	:return:
+		- **nodes** (*numpy.ndarray*) - float64 array of shape (degree + 1,), the nodes.
+		- **fit** (*numpy.ndarray*) - float64 array of shape (degree + 1, degree + 1). ``fit @ values`` gives the coefficients, lowest degree first, for values sampled at the nodes (one row per node).
+	"""
+	n = degree + 1
+	x = np.cos(np.pi * (np.arange(n) + 0.5) / n)
+	return (x, np.linalg.inv(np.polynomial.chebyshev.chebvander(x, degree)))
+
+def evaluate(coeffs, x):
+	"""
+	Evaluates many Chebyshev series, each at its own point.
+
+	:param numpy.ndarray coeffs: float64 array of shape (n, degree + 1, m), the coefficients of m series for each of n points, lowest degree first.
+	:param numpy.ndarray x: float64 array of shape (n,), the points, in [-1, 1].
+	:return:
+		**values** (*numpy.ndarray*) - float64 array of shape (n, m).
+	"""
+	x = np.asarray(x, dtype=np.float64)[:, np.newaxis]
+	# Clenshaw recurrence, for every point at once
+	b1 = np.zeros((coeffs.shape[0], coeffs.shape[2]))
+	b2 = np.zeros((coeffs.shape[0], coeffs.shape[2]))
+	for k in range(coeffs.shape[1] - 1, 0, -1):
+		(b1, b2) = (2 * x * b1 - b2 + coeffs[:, k], b1)
+	return x * b1 - b2 + coeffs[:, 0]
@@ -0,0 +1,250 @@
+#! /usr/bin/env python3
+
+"""
+conjunction.py screens a catalog for close approaches between satellites.
+
+Checking every pair at every time step costs O(N²) per step. The ConjunctionScreener prunes the pairs in three stages, so that the cost of a full catalog screening grows close to linearly:
+
+	1. **apogee/perigee filter** - two satellites can only meet if their radial shells (perigee to apogee) overlap, see shells.ShellIndex. Satellites whose shell overlaps no other shell are not even propagated.
+	2. **spatial grid** - at each time step the positions are binned into cubic cells as wide as the screening distance, and only satellites in the same or neighbouring cells are compared.
+	3. **time of closest approach** - each surviving pair is refined with a root finder on the range rate (relative position . relative velocity), and kept if its miss distance is within the threshold.
+
+The screening distance at the samples is the threshold plus the distance the pair can close in half a step at maxRelativeSpeed, so no approach between two samples is missed.
+
+.. code-block:: python
+
+	from dshsaa import conjunction
+
+	screener = conjunction.ConjunctionScreener(catalog.satKeys(), threshold=5.0)
+	found = screener.Screen(start, start + 1.0)
+	found[np.argsort(found['missDistance'])]
+"""
+import numpy as np
+from dshsaa.raw import settings, sgp4dll
+from dshsaa import rootfind, shells
+import pdb
+
+CONJUNCTION_DTYPE = np.dtype([('sat1', np.int32),
+							  ('sat2', np.int32),
+							  ('satKey1', np.int64),
+							  ('satKey2', np.int64),
+							  ('tca', np.float64),
+							  ('missDistance', np.float64),
+							  ('relativeSpeed', np.float64)])
+"""
+One close approach between two satellites.
+
+	- **sat1**, **sat2** - The indexes of the satellites in the satKeys given to the screener, sat1 < sat2
+	- **satKey1**, **satKey2** - The satellites' keys
+	- **tca** - Time of closest approach, days since 1950, UTC
+	- **missDistance** - Distance at closest approach (km)
+	- **relativeSpeed** - Relative speed at closest approach (km/s)
+"""
+
+# the neighbouring cells searched from each cell: itself and the 13 of the 26 neighbours which come first in
+# lexicographic order, so that each pair of cells is visited once
+_NEIGHBORS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) >= (0, 0, 0)]
+
+# cell coordinates are packed 21 bits per axis into one int64 key
+_CELL_BITS = 21
+_CELL_LIMIT = 2 ** (_CELL_BITS - 1) - 2
+
+class ConjunctionScreener:
+	"""
+	Conjunction screening of a set of satellites against each other. sgp4dll must be initialized, and the satellites initialized with Sgp4InitSat.
+
+	:param satKeys: The satellites to screen.
+	:type satKeys: settings.stay_int64[nsat], int[nsat]
+	:param float threshold: The miss distance below which an approach is reported (km).
+	:param float step: The time between position samples (days).
+	:param float shellPad: Extra margin on the apogee/perigee filter (km), to cover the change of the shells over the screening window.
+	:param float maxRelativeSpeed: The highest relative speed between two satellites (km/s), which sets the screening distance at the samples.
+	:param float tolerance: The accuracy of the times of closest approach (days).
+	:param int chunkSize: The number of time steps propagated at once.
+	:ivar int propagations: The number of satellite propagations made so far.
+	:ivar int distanceChecks: The number of pair distances computed by the spatial grid so far.
+	"""
+	def __init__(self, satKeys, threshold=5.0, step=10.0 / 86400.0, shellPad=10.0, maxRelativeSpeed=16.0, tolerance=1e-3 / 86400.0, chunkSize=360):
+		if threshold <= 0 or step <= 0 or tolerance <= 0 or chunkSize < 2:
+			raise Exception("threshold, step and tolerance must be positive and chunkSize at least 2")
+		self.satKeys = np.array(settings.int64_values(satKeys), dtype=np.int64)
+		self.threshold = threshold
+		self.step = step
+		self.shellPad = shellPad
+		self.maxRelativeSpeed = maxRelativeSpeed
+		self.tolerance = tolerance
+		self.chunkSize = int(chunkSize)
+		self.propagations = 0
+		self.distanceChecks = 0
+
+	@property
+	def screeningDistance(self):
+		"""
+		The distance below which a pair is kept at a sample (km).
+		"""
+		return self.threshold + self.maxRelativeSpeed * self.step * 86400.0 / 2
+
+	def Screen(self, startDs50UTC, stopDs50UTC, index=None):
+		"""
+		Finds every approach closer than the threshold between two times.
+
+		:param float startDs50UTC: The start of the screening window, days since 1950, UTC.
+		:param float stopDs50UTC: The end of the screening window, days since 1950, UTC.
+		:param index: The shells to filter pairs with. Defaults to an index built from Sgp4GetPropOut at startDs50UTC; pass one to reuse it across screenings. Satellites missing from the index are not screened, including those whose TLE changed since they were added to it (see shells.ShellIndex).
+		:type index: shells.ShellIndex, optional
+		:return:
+			**conjunctions** (*numpy.ndarray*) - CONJUNCTION_DTYPE array, sorted by time of closest approach.
+		"""
+		if stopDs50UTC <= startDs50UTC:
+			raise Exception("stopDs50UTC %f must be after startDs50UTC %f" % (stopDs50UTC, startDs50UTC))
+		nstep = max(int(np.ceil((stopDs50UTC - startDs50UTC) / self.step)), 1)
+		times = np.minimum(startDs50UTC + self.step * np.arange(nstep + 1), stopDs50UTC)
+
+		if index is None:
+			index = shells.ShellIndex.from_sgp4(self.satKeys, startDs50UTC)
+			self.propagations += self.satKeys.shape[0]
+			pairs = index.pairs(self.threshold + self.shellPad)
+			index.close()
+		else:
+			pairs = index.pairs(self.threshold + self.shellPad)
+		return self._screen_pairs(self._sat_pairs(pairs), times)
+
+	def _sat_pairs(self, pairs):
+		# satKey pairs from the shell index to pairs of indexes into satKeys, dropping satellites not screened
+		order = np.argsort(self.satKeys, kind='stable')
+		sortedKeys = self.satKeys[order]
+		if sortedKeys.shape[0] == 0:
+			return np.zeros((0, 2), dtype=np.int64)
+		where = np.minimum(np.searchsorted(sortedKeys, pairs), sortedKeys.shape[0] - 1)
+		known = np.all(sortedKeys[where] == pairs, axis=1)
+		return _ordered_pairs(order[where[known, 0]], order[where[known, 1]])
+
+	def _screen_pairs(self, pairs, times):
+		# grid screening and refinement of the candidate pairs over the sample times
+		found = np.zeros(0, dtype=CONJUNCTION_DTYPE)
+		if pairs.shape[0] == 0:
+			return found
+		# only satellites with a candidate partner are propagated, pairs are renumbered into that set
+		active = np.unique(pairs)
+		local = np.searchsorted(active, pairs)
+		nactive = active.shape[0]
+		allowed = np.sort(local[:, 0] * nactive + local[:, 1])
+
+		brackets = []
+		last = times.shape[0] - 1
+		for first in range(0, last, self.chunkSize - 1):
+			# consecutive chunks share one sample, so every bracket [k, k+1] lies inside a chunk
+			chunk = np.arange(first, min(first + self.chunkSize, last + 1))
+			(retcode, _, pos, vel, _) = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys[active], times[chunk])
+			self.propagations += nactive * chunk.shape[0]
+			for (m, k) in enumerate(chunk):
+				ok = np.flatnonzero(retcode[:, m] == 0)
+				(i, j) = self._grid_pairs(pos[ok, m], ok)
+				code = i * nactive + j
+				keep = _sorted_isin(code, allowed)
+				(i, j) = (i[keep], j[keep])
+				# bracket the minimum of the range with the range rate on each side of the sample
+				rdot = _range_rate(pos[i, m], vel[i, m], pos[j, m], vel[j, m])
+				closing = rdot < 0
+				if m + 1 < chunk.shape[0]:
+					ahead = closing & (retcode[i, m + 1] == 0) & (retcode[j, m + 1] == 0)
+					ahead[ahead] &= _range_rate(pos[i[ahead], m + 1], vel[i[ahead], m + 1], pos[j[ahead], m + 1], vel[j[ahead], m + 1]) >= 0
+					brackets.append((i[ahead], j[ahead], np.full(int(ahead.sum()), k)))
+				if m > 0:
+					behind = ~closing & (retcode[i, m - 1] == 0) & (retcode[j, m - 1] == 0)
+					behind[behind] &= _range_rate(pos[i[behind], m - 1], vel[i[behind], m - 1], pos[j[behind], m - 1], vel[j[behind], m - 1]) < 0
+					brackets.append((i[behind], j[behind], np.full(int(behind.sum()), k - 1)))
+				# minima on the edges of the window are not refined
+				if k == 0:
+					brackets.append((i[~closing], j[~closing], np.full(int((~closing).sum()), -1)))
+				if k == last:
+					brackets.append((i[closing], j[closing], np.full(int(closing.sum()), last)))
+
+		(i, j, k) = [np.concatenate(parts).astype(np.int64) for parts in zip(*brackets)]
+		(i, j, k) = np.unique(np.stack([i, j, k], axis=1), axis=0).T if i.shape[0] else (i, j, k)
+		keys1 = self.satKeys[active[i]]
+		keys2 = self.satKeys[active[j]]
+
+		# refine the interior brackets on the range rate, the edge ones are the window ends
+		tca = np.where(k < 0, times[0], times[np.minimum(k, last)])
+		interior = np.flatnonzero((k >= 0) & (k < last))
+		if interior.shape[0]:
+			def rangeRate(index, t):
+				(p1, v1, p2, v2) = self._pair_states(keys1[interior[index]], keys2[interior[index]], t)
+				return _range_rate(p1, v1, p2, v2)
+			tca[interior] = rootfind.regula_falsi(rangeRate, times[k[interior]], times[k[interior] + 1], self.tolerance)
+
+		(p1, v1, p2, v2) = self._pair_states(keys1, keys2, tca)
+		missDistance = np.linalg.norm(p1 - p2, axis=-1)
+		close = missDistance <= self.threshold
+		found = np.zeros(int(close.sum()), dtype=CONJUNCTION_DTYPE)
+		found['sat1'] = active[i[close]]
+		found['sat2'] = active[j[close]]
+		found['satKey1'] = keys1[close]
+		found['satKey2'] = keys2[close]
+		found['tca'] = tca[close]
+		found['missDistance'] = missDistance[close]
+		found['relativeSpeed'] = np.linalg.norm(v1 - v2, axis=-1)[close]
+		return found[np.argsort(found['tca'], kind='stable')]
+
+	def _grid_pairs(self, pos, index):
+		# pairs closer than the screening distance among the positions pos, returned as entries of index
+		distance = self.screeningDistance
+		n = pos.shape[0]
+		cell = np.clip(np.floor(pos / distance), -_CELL_LIMIT, _CELL_LIMIT).astype(np.int64)
+		key = _pack(cell)
+		order = np.argsort(key, kind='stable')
+		sortedKey = key[order]
+		i = []
+		j = []
+		for offset in _NEIGHBORS:
+			neighbor = _pack(cell + np.array(offset, dtype=np.int64))
+			lo = np.searchsorted(sortedKey, neighbor, side='left')
+			hi = np.searchsorted(sortedKey, neighbor, side='right')
+			(a, b) = _expand_ranges(lo, hi)
+			b = order[b]
+			if offset == (0, 0, 0):
+				(a, b) = (a[a < b], b[a < b])
+			i.append(a)
+			j.append(b)
+		i = np.concatenate(i)
+		j = np.concatenate(j)
+		self.distanceChecks += i.shape[0]
+		near = np.sum((pos[i] - pos[j]) ** 2, axis=-1) <= distance ** 2
+		return _ordered_pairs(index[i[near]], index[j[near]]).T
+
+	def _pair_states(self, keys1, keys2, t):
+		# states of both satellites of each pair at that pair's own time
+		n = keys1.shape[0]
+		(retcode, _, pos, vel, _) = sgp4dll.Sgp4PropDs50UTCBatch(np.concatenate([keys1, keys2]), np.concatenate([t, t])[:, np.newaxis])
+		self.propagations += 2 * n
+		pos = np.where(retcode[:, :1] == 0, pos[:, 0], np.nan)
+		vel = np.where(retcode[:, :1] == 0, vel[:, 0], np.nan)
+		return (pos[:n], vel[:n], pos[n:], vel[n:])
+
+def _range_rate(p1, v1, p2, v2):
+	# relative position . relative velocity, half the derivative of the squared range
+	return np.sum((p1 - p2) * (v1 - v2), axis=-1)
+
+def _pack(cell):
+	# one int64 key per cell, 21 bits per axis
+	biased = cell + 2 ** (_CELL_BITS - 1)
+	return (biased[:, 0] << (2 * _CELL_BITS)) | (biased[:, 1] << _CELL_BITS) | biased[:, 2]
+
+def _expand_ranges(start, stop):
+	# every (r, x) with start[r] <= x < stop[r], without a python loop
+	counts = stop - start
+	row = np.repeat(np.arange(start.shape[0]), counts)
+	first = np.repeat(start - (np.cumsum(counts) - counts), counts)
+	return (row, first + np.arange(row.shape[0]))
+
+def _ordered_pairs(i, j):
+	# (min, max) rows
+	return np.stack([np.minimum(i, j), np.maximum(i, j)], axis=1).astype(np.int64)
+
+def _sorted_isin(values, sortedSet):
+	# np.isin for a sorted set
+	if sortedSet.shape[0] == 0:
+		return np.zeros(values.shape[0], dtype=bool)
+	where = np.minimum(np.searchsorted(sortedSet, values), sortedSet.shape[0] - 1)
+	return sortedSet[where] == values
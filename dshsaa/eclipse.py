@@ -0,0 +1,241 @@
+#! /usr/bin/env python3
+
+"""
+eclipse.py finds the intervals during which satellites are in the Earth's shadow.
+
+astrodll.IsPointSunlit would answer the question one point at a time, but it always returns 1 (see exceptions.KnownFault), so the EclipseFinder applies its own shadow test to batch propagated trajectories instead. The Sun positions come from a sunmoon.SunMoonEphemeris, so that the thousands of samples of a search cost no astrodll call each. Three shadow models are offered:
+
+	- ``'umbra'``, a conical shadow: the satellite is eclipsed when the Earth's disk hides the whole Sun disk, as seen from the satellite
+	- ``'penumbra'``, a conical shadow: the satellite is eclipsed as soon as the Earth's disk hides any part of the Sun disk
+	- ``'cylindrical'``, the shadow of a Sun at infinite distance, a cylinder of the Earth's radius behind the Earth
+
+Each model is a signed function of the satellite position which is negative in shadow. As in passes.py, each satellite is sampled coarsely, at a fraction of its nodal period, then:
+
+	- a change of sign between two samples brackets an entry or an exit, which regula falsi (Illinois variant) pins down to the tolerance
+	- a local minimum of the samples which stays out of the shadow may hide a short eclipse between the samples, which happens when the orbit only grazes the shadow; the minimum is refined by parabolic interpolation and becomes an eclipse if it dips into the shadow
+
+The Earth is a sphere of radius EARTH_RADIUS, and the Sun positions of astrodll are used as given in the frame of the propagated positions; both approximations move the edge of the shadow by at most a few km.
+
+.. code-block:: python
+
+	from dshsaa import eclipse
+
+	finder = eclipse.EclipseFinder(model='umbra')
+	found = finder.FindEclipses(satKeys, start, start + 1.0)
+	found[found['sat'] == 0]['entry']
+	eclipse.intervals(found, len(satKeys))[0]	# (n, 2) array of entry and exit times of the first satellite
+"""
+import numpy as np
+from dshsaa.raw import settings, sgp4dll, timedll
+from dshsaa import rootfind, sunmoon
+import pdb
+
+ECLIPSE_DTYPE = np.dtype([('sat', np.int32),
+						  ('satKey', np.int64),
+						  ('entry', np.float64),
+						  ('exit', np.float64)])
+"""
+One eclipse of one satellite.
+
+	- **sat** - The index of the satellite in the satKeys given to FindEclipses
+	- **satKey** - The satellite's key
+	- **entry** - The time the satellite enters the shadow, days since 1950, UTC. The start of the search window if the satellite is already in the shadow.
+	- **exit** - The time the satellite leaves the shadow, days since 1950, UTC. The end of the search window if the satellite is still in the shadow.
+"""
+
+EARTH_RADIUS = 6378.135
+"""
+The equatorial radius of the Earth (km), WGS-72 as used by SGP4.
+"""
+
+SUN_RADIUS = 696000.0
+"""
+The radius of the Sun (km).
+"""
+
+MODELS = ('umbra', 'penumbra', 'cylindrical')
+
+# the shadow function given to samples whose propagation failed, so that they never count as eclipsed
+_FAILED_SHADOW = np.pi
+
+class EclipseFinder:
+	"""
+	Eclipse prediction over batch propagated trajectories. astrodll, timedll and sgp4dll must be initialized, and the satellites initialized with Sgp4InitSat.
+
+	:param str model: The shadow model, one of MODELS, see the module description.
+	:param int stepsPerRev: The number of coarse samples per nodal period. An eclipse shorter than about two coarse steps, which only happens for eclipses grazing the shadow, can be missed; raise this to catch more of them.
+	:param float maxStep: The longest coarse step (days), whatever the period.
+	:param float tolerance: The accuracy of the refined times (days).
+	:param table: Timing constants table for the numpy fast path of the UTC to ET conversion, see timedll.TConTable.
+	:type table: timedll.TConTable, optional
+	:param ephemeris: The Sun positions. A new one is made by default; pass a shared one to reuse its cached segments.
+	:type ephemeris: sunmoon.SunMoonEphemeris, optional
+	:ivar int propagations: The number of satellite propagations made so far, for comparing against other methods.
+	"""
+	def __init__(self, model='umbra', stepsPerRev=20, maxStep=10.0 / 1440.0, tolerance=1.0 / 86400.0, table=None, ephemeris=None):
+		if model not in MODELS:
+			raise Exception("model must be one of %s, got %s" % (MODELS, model))
+		if stepsPerRev < 4:
+			raise Exception("stepsPerRev must be at least 4, got %s" % (stepsPerRev))
+		if tolerance <= 0:
+			raise Exception("tolerance must be positive, got %s" % (tolerance))
+		self.model = model
+		self.stepsPerRev = stepsPerRev
+		self.maxStep = maxStep
+		self.tolerance = tolerance
+		self.table = table
+		self.ephemeris = ephemeris if ephemeris is not None else sunmoon.SunMoonEphemeris()
+		self.propagations = 0
+
+	def Step(self, satKey, ds50UTC):
+		"""
+		The coarse sampling step of a satellite: its nodal period divided by stepsPerRev, capped at maxStep.
+
+		:param satKey: The satellite's key.
+		:type satKey: settings.stay_int64, int
+		:param float ds50UTC: The time at which to read the period, days since 1950, UTC.
+		:return:
+			**step** (*float*) - The step (days).
+		"""
+		satKey = settings.stay_int64(settings.int64_value(satKey))
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTC(satKey, ds50UTC)
+		self.propagations += 1
+		if retcode != 0:
+			return self.maxStep
+		(retcode, nodalApPer) = sgp4dll.Sgp4GetPropOut(satKey, 2)
+		period = nodalApPer[0] / 1440.0
+		if retcode != 0 or period <= 0:
+			return self.maxStep
+		return min(period / self.stepsPerRev, self.maxStep)
+
+	def Shadow(self, ds50UTC, pos):
+		"""
+		The shadow function of the model: negative in shadow, positive in sunlight, zero on the edge. The conical models return an angle (rad), the cylindrical model a distance (km).
+
+		:param numpy.ndarray ds50UTC: Days since 1950, UTC, any shape.
+		:param numpy.ndarray pos: The ECI positions (km) at those times, shape ds50UTC.shape + (3,).
+		:return:
+			**shadow** (*numpy.ndarray*) - float64 array of shape ds50UTC.shape.
+		"""
+		ds50ET = timedll.UTCToETArray(np.asarray(ds50UTC, dtype=np.float64), table=self.table)
+		(uvecSun, sunVecMag) = self.ephemeris.CompSunPos(ds50ET)
+		return shadow(self.model, pos, uvecSun * sunVecMag[..., np.newaxis])
+
+	def FindEclipses(self, satKeys, startDs50UTC, stopDs50UTC):
+		"""
+		Finds every eclipse of every satellite between two times.
+
+		:param satKeys: The satellites to search.
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param float startDs50UTC: The start of the search window, days since 1950, UTC.
+		:param float stopDs50UTC: The end of the search window, days since 1950, UTC.
+		:return:
+			**eclipses** (*numpy.ndarray*) - ECLIPSE_DTYPE array, sorted by entry time.
+		"""
+		if stopDs50UTC <= startDs50UTC:
+			raise Exception("stopDs50UTC %f must be after startDs50UTC %f" % (stopDs50UTC, startDs50UTC))
+		satKeys = np.array(settings.int64_values(satKeys), dtype=np.int64)
+		found = [self._sat_eclipses(k, satKeys[k], startDs50UTC, stopDs50UTC) for k in range(satKeys.shape[0])]
+		found = np.concatenate(found) if found else np.zeros(0, dtype=ECLIPSE_DTYPE)
+		return found[np.argsort(found['entry'], kind='stable')]
+
+	def _sat_eclipses(self, k, satKey, start, stop):
+		step = self.Step(satKey, start)
+		nstep = max(int(np.ceil((stop - start) / step)), 1)
+		times = np.minimum(start + step * np.arange(nstep + 1), stop)
+		f = self._f(satKey, times)
+		dark = f < 0
+
+		# brackets of the crossings, as left samples
+		entryIndex = np.flatnonzero(~dark[:-1] & dark[1:])
+		exitIndex = np.flatnonzero(dark[:-1] & ~dark[1:])
+
+		# local minima out of the shadow may hide a short eclipse between the samples
+		hideIndex = np.flatnonzero((f[1:-1] >= 0) & (f[1:-1] < f[:-2]) & (f[1:-1] <= f[2:])) + 1
+		# only those whose parabola through the three samples comes within one step's change of the shadow
+		(f0, f1, f2) = (f[hideIndex - 1], f[hideIndex], f[hideIndex + 1])
+		with np.errstate(divide='ignore', invalid='ignore'):
+			trough = f1 - (f2 - f0) ** 2 / (8 * (f0 + f2 - 2 * f1))
+		near = ~(trough - np.maximum(f0 - f1, f2 - f1) > 0)
+		hideIndex = hideIndex[near]
+		(hideTime, hideF) = rootfind.maximize(lambda index, t: -self._f(satKey, t), times[hideIndex - 1], times[hideIndex + 1], self.tolerance)
+		hidden = -hideF < 0
+		(hideIndex, hideTime) = (hideIndex[hidden], hideTime[hidden])
+
+		# refine every crossing in one go
+		crossEntry = np.concatenate([np.ones_like(entryIndex, dtype=bool), np.zeros_like(exitIndex, dtype=bool), np.ones_like(hideIndex, dtype=bool), np.zeros_like(hideIndex, dtype=bool)])
+		lo = np.concatenate([times[entryIndex], times[exitIndex], times[hideIndex - 1], hideTime])
+		hi = np.concatenate([times[entryIndex + 1], times[exitIndex + 1], hideTime, times[hideIndex + 1]])
+		crossTime = rootfind.regula_falsi(lambda index, t: self._f(satKey, t), lo, hi, self.tolerance)
+
+		# walk the crossings in time order, pairing every entry with the next exit
+		rows = []
+		order = np.argsort(crossTime, kind='stable')
+		entry = start if dark[0] else None
+		for i in order:
+			if crossEntry[i]:
+				entry = crossTime[i]
+			elif entry is not None:
+				rows.append((entry, crossTime[i]))
+				entry = None
+		if entry is not None:
+			rows.append((entry, stop))
+		found = np.zeros(len(rows), dtype=ECLIPSE_DTYPE)
+		found['sat'] = k
+		found['satKey'] = satKey
+		found['entry'] = [row[0] for row in rows]
+		found['exit'] = [row[1] for row in rows]
+		return found
+
+	def _f(self, satKey, ds50UTC):
+		# the shadow function of one satellite at the times ds50UTC, failed propagations count as sunlit
+		if ds50UTC.shape[0] == 0:
+			return np.zeros(0, dtype=np.float64)
+		(retcode, _, pos, _, _) = sgp4dll.Sgp4PropDs50UTCBatch([satKey], ds50UTC)
+		self.propagations += ds50UTC.shape[0]
+		f = self.Shadow(ds50UTC, pos[0])
+		f[retcode[0] != 0] = _FAILED_SHADOW
+		return f
+
+def shadow(model, pos, sunPos):
+	"""
+	The shadow function of a model at given satellite and Sun positions, see EclipseFinder.Shadow.
+
+	:param str model: One of MODELS.
+	:param numpy.ndarray pos: The satellite positions (km), shape (..., 3).
+	:param numpy.ndarray sunPos: The Sun positions (km) in the same frame, of a shape which broadcasts against pos.
+	:return:
+		**shadow** (*numpy.ndarray*) - float64 array of shape pos.shape[:-1], negative in shadow.
+	"""
+	pos = np.asarray(pos, dtype=np.float64)
+	sunPos = np.asarray(sunPos, dtype=np.float64)
+	r = np.linalg.norm(pos, axis=-1)
+	if model == 'cylindrical':
+		uvecSun = sunPos / np.linalg.norm(sunPos, axis=-1)[..., np.newaxis]
+		along = np.sum(pos * uvecSun, axis=-1)
+		across = np.linalg.norm(pos - along[..., np.newaxis] * uvecSun, axis=-1)
+		# on the day side the distance from the Earth's center takes over, which is continuous at the terminator
+		return np.where(along < 0, across, r) - EARTH_RADIUS
+	if model not in MODELS:
+		raise Exception("model must be one of %s, got %s" % (MODELS, model))
+	# apparent angle between the Earth and Sun centers, and their apparent radii, as seen from the satellite
+	toSun = sunPos - pos
+	d = np.linalg.norm(toSun, axis=-1)
+	separation = np.arccos(np.clip(np.sum(-pos * toSun, axis=-1) / (r * d), -1.0, 1.0))
+	earthRadius = np.arcsin(np.clip(EARTH_RADIUS / r, -1.0, 1.0))
+	sunRadius = np.arcsin(np.clip(SUN_RADIUS / d, -1.0, 1.0))
+	if model == 'umbra':
+		return separation - (earthRadius - sunRadius)
+	return separation - (earthRadius + sunRadius)
+
+def intervals(eclipses, nsat):
+	"""
+	Splits the result of FindEclipses by satellite.
+
+	:param numpy.ndarray eclipses: ECLIPSE_DTYPE array.
+	:param int nsat: The number of satellites searched.
+	:return:
+		**intervals** (*list*) - For each satellite, a float64 array of shape (n, 2) of the entry and exit times of its eclipses, sorted by entry time.
+	"""
+	eclipses = eclipses[np.argsort(eclipses['entry'], kind='stable')]
+	return [np.stack([mine['entry'], mine['exit']], axis=-1) for mine in (eclipses[eclipses['sat'] == k] for k in range(nsat))]
@@ -0,0 +1,238 @@
+#! /usr/bin/env python3
+
+"""
+engine.py propagates a catalog of TLEs across several worker processes.
+
+The SAA DLLs keep global state (the TLE tree in tledll, the satellite set in sgp4dll, the maindll handle) and Sgp4GetPropOut is not thread safe, so one interpreter can only propagate on one core. The PropagationEngine starts one process per core instead. Each worker runs its own DllMainInit / TleInit / Sgp4Init sequence (session.start) and loads a contiguous shard of the catalog. For each request the workers propagate their shard with the sgp4dll batch functions, writing straight into output arrays that live in ``multiprocessing.shared_memory`` blocks shared with the parent.
+
+The workers are started with the ``spawn`` method, so each one gets a fresh interpreter and a fresh copy of the DLLs. LD_LIBRARY_PATH must be set before the parent starts, as for any other use of dshsaa.
+
+.. code-block:: python
+
+	from dshsaa import engine
+
+	with engine.PropagationEngine(lines, nworkers=8) as eng:
+		(retcode, mse, pos, vel, llh) = eng.PropDs50UTC(ds50UTC)
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import traceback
+import numpy as np
+from dshsaa.raw import settings
+import pdb
+
+# (name, dtype, trailing shape) of the arrays returned by the sgp4dll batch functions, in return order
+_OUTPUTS = [('retcode', np.int32, ()),
+			('time', np.float64, ()),
+			('pos', np.float64, (3,)),
+			('vel', np.float64, (3,)),
+			('llh', np.float64, (3,))]
+
+class PropagationEngine:
+	"""
+	A pool of worker processes, each holding one shard of a TLE catalog in its own copy of the SAA DLLs.
+
+	The catalog is split into nworkers contiguous shards in the order given. The satKeys assigned inside each worker are private to that worker, so satellites are identified by their row in the catalog: row i of every output array is the satellite built from ``lines[i]``.
+
+	:param list lines: The catalog, as a list of (line1, line2) TLE string pairs.
+	:param int nworkers: The number of worker processes. Defaults to ``os.cpu_count()``, and is capped at the number of satellites.
+	:param str licFilePath: The directory holding the SGP4 license file, passed to Sgp4SetLicFilePath in every worker.
+	"""
+	def __init__(self, lines, nworkers=None, licFilePath='./dshsaa/libdll/'):
+		self.lines = [(line1, line2) for (line1, line2) in lines]
+		self.nsat = len(self.lines)
+		if self.nsat == 0:
+			raise Exception("Cannot start a PropagationEngine with an empty catalog")
+		if nworkers is None:
+			nworkers = os.cpu_count() or 1
+		nworkers = max(1, min(int(nworkers), self.nsat))
+
+		# contiguous shards, shard w covers rows bounds[w]:bounds[w+1]
+		self.bounds = np.linspace(0, self.nsat, nworkers + 1).round().astype(int).tolist()
+
+		ctx = multiprocessing.get_context('spawn')
+		self._conns = []
+		self._procs = []
+		try:
+			for w in range(nworkers):
+				(conn, child_conn) = ctx.Pipe()
+				shard = self.lines[self.bounds[w]:self.bounds[w + 1]]
+				proc = ctx.Process(target=_worker_main, args=(child_conn, shard, licFilePath), daemon=True)
+				proc.start()
+				child_conn.close()
+				self._conns.append(conn)
+				self._procs.append(proc)
+			self._collect()
+		except:
+			self.close()
+			raise
+
+	@property
+	def nworkers(self):
+		"""
+		The number of worker processes.
+		"""
+		return len(self._procs)
+
+	def PropDs50UTC(self, ds50UTC, out=None):
+		"""
+		Propagates the whole catalog to times expressed in days since 1950, UTC. This is the multi-process form of sgp4dll.Sgp4PropDs50UTCBatch and returns the same arrays.
+
+		:param ds50UTC: The times to propagate to. A 1D array of ntime values is shared by every satellite, a 2D array of shape (nsat, ntime) gives each satellite its own times.
+		:type ds50UTC: numpy.ndarray
+		:param out: Preallocated (retcode, mse, pos, vel, llh) arrays to copy the results into.
+		:type out: tuple, optional
+		:return:
+			- **retcode** (*numpy.ndarray*) - int32 array of shape (nsat, ntime), 0 where the propagation is successful, non-0 where there is an error.
+			- **mse** (*numpy.ndarray*) - float64 array of shape (nsat, ntime), the resulting times in minutes since each satellite's epoch time.
+			- **pos** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI position vectors (km).
+			- **vel** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI velocity vectors (km/s).
+			- **llh** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+		"""
+		return self._propagate('Sgp4PropDs50UTCBatch', ds50UTC, out)
+
+	def PropMse(self, mse, out=None):
+		"""
+		Propagates the whole catalog to times expressed in minutes since each satellite's epoch time. This is the multi-process form of sgp4dll.Sgp4PropMseBatch and returns the same arrays.
+
+		:param mse: The times to propagate to. A 1D array of ntime values is shared by every satellite, a 2D array of shape (nsat, ntime) gives each satellite its own times.
+		:type mse: numpy.ndarray
+		:param out: Preallocated (retcode, ds50UTC, pos, vel, llh) arrays to copy the results into.
+		:type out: tuple, optional
+		:return:
+			- **retcode** (*numpy.ndarray*) - int32 array of shape (nsat, ntime), 0 where the propagation is successful, non-0 where there is an error.
+			- **ds50UTC** (*numpy.ndarray*) - float64 array of shape (nsat, ntime), the resulting times in days since 1950, UTC.
+			- **pos** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI position vectors (km).
+			- **vel** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI velocity vectors (km/s).
+			- **llh** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+		"""
+		return self._propagate('Sgp4PropMseBatch', mse, out)
+
+	def close(self):
+		"""
+		Stops the worker processes. The engine cannot be used afterwards. Calling close more than once is harmless.
+		"""
+		for conn in self._conns:
+			try:
+				conn.send(None)
+			except (BrokenPipeError, OSError):
+				pass
+		for proc in self._procs:
+			proc.join(timeout=5)
+			if proc.is_alive():
+				proc.terminate()
+				proc.join()
+		for conn in self._conns:
+			conn.close()
+		self._conns = []
+		self._procs = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, tb):
+		self.close()
+
+	def _propagate(self, funcName, times, out):
+		if not self._procs:
+			raise Exception("PropagationEngine is closed")
+		times = np.asarray(times, dtype=np.float64)
+		if times.ndim == 1:
+			ntime = times.shape[0]
+		elif times.ndim == 2 and times.shape[0] == self.nsat:
+			ntime = times.shape[1]
+		else:
+			raise Exception("times has shape %s, expecting (ntime,) or (%i, ntime)" % (times.shape, self.nsat))
+		if out is not None:
+			for (ar, (name, dtype, tail)) in zip(out, _OUTPUTS):
+				settings.verify_out_array(ar, (self.nsat, ntime) + tail, dtype)
+
+		blocks = []
+		try:
+			# one shared block per output array, covering the whole catalog
+			for (name, dtype, tail) in _OUTPUTS:
+				shape = (self.nsat, ntime) + tail
+				nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+				blocks.append(shared_memory.SharedMemory(create=True, size=nbytes))
+			spec = [(shm.name, dtype, (self.nsat, ntime) + tail) for (shm, (name, dtype, tail)) in zip(blocks, _OUTPUTS)]
+			for (w, conn) in enumerate(self._conns):
+				(start, stop) = (self.bounds[w], self.bounds[w + 1])
+				shard_times = times if times.ndim == 1 else times[start:stop]
+				conn.send((funcName, shard_times, spec, start, stop))
+			self._collect()
+
+			# copy out of the shared blocks so they can be released
+			results = []
+			for (i, (shm, (_, dtype, shape))) in enumerate(zip(blocks, spec)):
+				view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+				if out is None:
+					results.append(view.copy())
+				else:
+					out[i][...] = view
+					results.append(out[i])
+				del view
+			return tuple(results)
+		finally:
+			for shm in blocks:
+				shm.close()
+				shm.unlink()
+
+	def _collect(self):
+		# wait for every worker to answer the last command, raising the first error reported
+		errors = []
+		for (w, conn) in enumerate(self._conns):
+			try:
+				(status, message) = conn.recv()
+			except EOFError:
+				(status, message) = ('error', 'worker exited unexpectedly')
+			if status != 'ok':
+				errors.append("worker %i: %s" % (w, message))
+		if errors:
+			raise Exception("PropagationEngine worker failure\n" + "\n".join(errors))
+
+def _worker_main(conn, shard, licFilePath):
+	# body of a worker process: load the shard, then serve propagation commands until told to stop
+	try:
+		from dshsaa import session
+		session.start(licFilePath)
+		from dshsaa.raw import tledll, sgp4dll
+		satKeys = []
+		for (line1, line2) in shard:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			# a satellite that fails to load or init keeps its row, its propagation retcode reports the failure
+			if satKey.value > 0:
+				sgp4dll.Sgp4InitSat(satKey)
+			satKeys.append(satKey.value)
+	except Exception:
+		conn.send(('error', traceback.format_exc()))
+		conn.close()
+		return
+	conn.send(('ok', len(satKeys)))
+
+	while True:
+		try:
+			command = conn.recv()
+		except EOFError:
+			break
+		if command is None:
+			break
+		(funcName, times, spec, start, stop) = command
+		blocks = []
+		out = []
+		try:
+			for (name, dtype, shape) in spec:
+				shm = shared_memory.SharedMemory(name=name)
+				blocks.append(shm)
+				out.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop])
+			getattr(sgp4dll, funcName)(satKeys, times, out=tuple(out))
+			reply = ('ok', None)
+		except Exception:
+			reply = ('error', traceback.format_exc())
+		finally:
+			# the views must go before the blocks can be closed
+			out = None
+			for shm in blocks:
+				shm.close()
+		conn.send(reply)
+	conn.close()
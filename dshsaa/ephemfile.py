@@ -0,0 +1,263 @@
+#! /usr/bin/env python3
+
+"""
+ephemfile.py reads and writes propagated ephemerides in a compact binary file which is read back with ``numpy.memmap``.
+
+A file is a 16 byte file header followed by one block per satellite. Each block is a 64 byte block header (BLOCK_DTYPE) followed by ``count`` records (RECORD_DTYPE) at a fixed time step. Everything is little-endian.
+
+Opening a file only reads the block headers; the records stay on disk until they are sliced, so one satellite-hour can be read out of a multi-GB file without loading the rest:
+
+.. code-block:: python
+
+	from dshsaa import ephemfile
+
+	with ephemfile.EphemerisWriter('catalog.ephem') as writer:
+		for (satKey, satNum, epoch) in satellites:
+			chunks = sgp4dll.Sgp4PropDs50UTCStream(satKey, start, stop, step)
+			writer.add_stream(satKey, satNum, epoch, start, step, (ephemfile.pack_records(c[0], c[1], c[3], c[4], c[5]) for c in chunks))
+
+	ephem = ephemfile.EphemerisFile('catalog.ephem')
+	records = ephem.read(ephem.find(satNum=25544)[0], start, start + 1/24)
+	records['pos']
+"""
+import os
+import numpy as np
+from dshsaa.raw import settings
+import pdb
+
+MAGIC = b'DSHEPHEM'
+VERSION = 1
+
+FILE_HEADER_DTYPE = np.dtype([('magic', 'S8'),
+							  ('version', '<u4'),
+							  ('reserved', '<u4')])
+
+BLOCK_DTYPE = np.dtype([('satKey', '<i8'),
+						('satNum', '<i4'),
+						('reserved', '<i4'),
+						('epoch', '<f8'),
+						('start', '<f8'),
+						('step', '<f8'),
+						('count', '<i8'),
+						('padding', 'V16')])
+"""
+The header of a block, 64 bytes.
+
+	- **satKey** - The satellite's key when the ephemeris was generated
+	- **satNum** - Satellite number
+	- **epoch** - The element epoch time, days since 1950, UTC
+	- **start** - The time of the first record, days since 1950, UTC
+	- **step** - The time between records, days
+	- **count** - The number of records in the block
+"""
+
+RECORD_DTYPE = np.dtype([('ds50UTC', '<f8'),
+						 ('pos', '<f8', (3,)),
+						 ('vel', '<f8', (3,)),
+						 ('llh', '<f8', (3,))])
+"""
+One ephemeris sample, 80 bytes.
+
+	- **ds50UTC** - Time, days since 1950, UTC
+	- **pos** - ECI position vector (km) in True Equator and Mean Equinox of Epoch
+	- **vel** - ECI velocity vector (km/s) in True Equator and Mean Equinox of Epoch
+	- **llh** - Geodetic latitude (deg), longitude (deg), and height (km)
+
+Samples whose propagation failed (a non-zero retcode, such as a decayed satellite) keep their time, and have NaN in pos, vel and llh, see pack_records.
+"""
+
+def pack_records(ds50UTC, retcode, pos, vel, llh):
+	"""
+	Packs propagation results, such as the arrays returned by the sgp4dll batch and stream functions for one satellite, into records. The states of failed propagations are whatever the DLL left in its output buffers, so they are replaced by NaN.
+
+	:param numpy.ndarray ds50UTC: float64 array of shape (n,), times in days since 1950, UTC.
+	:param numpy.ndarray retcode: int array of shape (n,), 0 where the propagation succeeded.
+	:param numpy.ndarray pos: float64 array of shape (n, 3), ECI position vectors (km).
+	:param numpy.ndarray vel: float64 array of shape (n, 3), ECI velocity vectors (km/s).
+	:param numpy.ndarray llh: float64 array of shape (n, 3), geodetic latitude (deg), longitude (deg), and height (km).
+	:return:
+		**records** (*numpy.ndarray*) - RECORD_DTYPE array of shape (n,).
+	"""
+	records = np.empty(len(ds50UTC), dtype=RECORD_DTYPE)
+	records['ds50UTC'] = ds50UTC
+	records['pos'] = pos
+	records['vel'] = vel
+	records['llh'] = llh
+	failed = np.asarray(retcode) != 0
+	for field in ['pos', 'vel', 'llh']:
+		records[field][failed] = np.nan
+	return records
+
+class EphemerisWriter:
+	"""
+	Writes an ephemeris file, one satellite block at a time. Existing files are overwritten.
+
+	:param str path: The file to write.
+	"""
+	def __init__(self, path):
+		self.path = path
+		self._f = open(path, 'wb')
+		header = np.zeros(1, dtype=FILE_HEADER_DTYPE)
+		header['magic'] = MAGIC
+		header['version'] = VERSION
+		self._f.write(header.tobytes())
+
+	def add(self, satKey, satNum, epoch, start, step, records):
+		"""
+		Appends the block of one satellite.
+
+		:param satKey: The satellite's key.
+		:type satKey: settings.stay_int64, int
+		:param int satNum: Satellite number.
+		:param float epoch: The element epoch time, days since 1950, UTC.
+		:param float start: The time of the first record, days since 1950, UTC.
+		:param float step: The time between records, days.
+		:param numpy.ndarray records: RECORD_DTYPE array, see pack_records.
+		"""
+		self.add_stream(satKey, satNum, epoch, start, step, [records])
+
+	def add_stream(self, satKey, satNum, epoch, start, step, chunks):
+		"""
+		Appends the block of one satellite from an iterable of record chunks, such as a generator over sgp4dll.Sgp4PropDs50UTCStream. Only one chunk is held in memory at a time; the record count is filled in once the chunks are exhausted. If the chunks raise partway, the partial block is cut off the file before the exception is passed on, so the blocks already written stay readable.
+
+		:param satKey: The satellite's key.
+		:type satKey: settings.stay_int64, int
+		:param int satNum: Satellite number.
+		:param float epoch: The element epoch time, days since 1950, UTC.
+		:param float start: The time of the first record, days since 1950, UTC.
+		:param float step: The time between records, days.
+		:param chunks: RECORD_DTYPE arrays, in time order.
+		:type chunks: iterable
+		:return:
+			**count** (*int*) - The number of records written.
+		"""
+		header = np.zeros(1, dtype=BLOCK_DTYPE)
+		header['satKey'] = settings.int64_value(satKey)
+		header['satNum'] = satNum
+		header['epoch'] = epoch
+		header['start'] = start
+		header['step'] = step
+		header_offset = self._f.tell()
+		self._f.write(header.tobytes())
+		count = 0
+		try:
+			for records in chunks:
+				records = np.ascontiguousarray(records, dtype=RECORD_DTYPE)
+				self._f.write(records.tobytes())
+				count += records.shape[0]
+		except BaseException:
+			# drop the header and the records written so far
+			self._f.seek(header_offset)
+			self._f.truncate()
+			raise
+		# go back and fill in the count
+		end = self._f.tell()
+		header['count'] = count
+		self._f.seek(header_offset)
+		self._f.write(header.tobytes())
+		self._f.seek(end)
+		return count
+
+	def close(self):
+		"""
+		Closes the file.
+		"""
+		self._f.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, tb):
+		self.close()
+
+class EphemerisFile:
+	"""
+	Reads an ephemeris file written by EphemerisWriter. Only the block headers are read when the file is opened; records are memory mapped on demand.
+
+	:param str path: The file to read.
+	:ivar numpy.ndarray headers: BLOCK_DTYPE array with the header of every block, in file order.
+	:ivar numpy.ndarray offsets: int64 array with the byte offset of the first record of every block.
+	"""
+	def __init__(self, path):
+		self.path = path
+		size = os.path.getsize(path)
+		with open(path, 'rb') as f:
+			header = np.fromfile(f, dtype=FILE_HEADER_DTYPE, count=1)
+			if header.shape[0] != 1 or header['magic'][0] != MAGIC:
+				raise Exception("%s is not an ephemeris file" % (path))
+			if header['version'][0] != VERSION:
+				raise Exception("%s has ephemeris file version %i, expecting %i" % (path, header['version'][0], VERSION))
+			headers = []
+			offsets = []
+			# hop from block header to block header without touching the records
+			while True:
+				block = np.fromfile(f, dtype=BLOCK_DTYPE, count=1)
+				if block.shape[0] == 0:
+					break
+				count = int(block['count'][0])
+				if count < 0 or f.tell() + count * RECORD_DTYPE.itemsize > size:
+					raise Exception("%s is a corrupt ephemeris file: block %i has a record count of %i which does not fit in the file" % (path, len(headers), count))
+				headers.append(block[0])
+				offsets.append(f.tell())
+				f.seek(count * RECORD_DTYPE.itemsize, 1)
+		self.headers = np.array(headers, dtype=BLOCK_DTYPE)
+		self.offsets = np.array(offsets, dtype=np.int64)
+
+	def __len__(self):
+		return self.headers.shape[0]
+
+	def find(self, satNum=None, satKey=None):
+		"""
+		Finds the blocks of a satellite.
+
+		:param satNum: Match on satellite number.
+		:type satNum: int, optional
+		:param satKey: Match on satKey.
+		:type satKey: settings.stay_int64, int, optional
+		:return:
+			**blocks** (*numpy.ndarray*) - The indexes of the matching blocks.
+		"""
+		match = np.ones(len(self), dtype=bool)
+		if satNum is not None:
+			match &= (self.headers['satNum'] == satNum)
+		if satKey is not None:
+			match &= (self.headers['satKey'] == settings.int64_value(satKey))
+		return np.flatnonzero(match)
+
+	def records(self, block):
+		"""
+		Memory maps every record of a block. Nothing is read from disk until the returned array is accessed.
+
+		:param int block: The index of the block.
+		:return:
+			**records** (*numpy.memmap*) - Read-only RECORD_DTYPE array of shape (count,).
+		"""
+		count = int(self.headers['count'][block])
+		if count == 0:
+			return np.zeros(0, dtype=RECORD_DTYPE)
+		return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', offset=int(self.offsets[block]), shape=(count,))
+
+	def read(self, block, startDs50UTC, stopDs50UTC):
+		"""
+		Memory maps the records of a block between two times, inclusive. The record indexes are computed from the block's start and step, so no records outside the span are read.
+
+		:param int block: The index of the block.
+		:param float startDs50UTC: The first time, days since 1950, UTC.
+		:param float stopDs50UTC: The last time, days since 1950, UTC.
+		:return:
+			**records** (*numpy.memmap*) - Read-only RECORD_DTYPE array of the records in the span.
+		"""
+		header = self.headers[block]
+		count = int(header['count'])
+		start = float(header['start'])
+		step = float(header['step'])
+		if step <= 0:
+			first = 0
+			last = count
+		else:
+			# small tolerance so that records sitting exactly on either end are kept
+			first = int(np.ceil((startDs50UTC - start) / step - 1e-9))
+			last = int(np.floor((stopDs50UTC - start) / step + 1e-9)) + 1
+		first = min(max(first, 0), count)
+		last = min(max(last, first), count)
+		return self.records(block)[first:last]
@@ -0,0 +1,214 @@
+#! /usr/bin/env python3
+
+"""
+passes.py predicts when satellites rise above and set below the elevation mask of ground sites.
+
+Sampling every site and satellite pair at a fixed fine step wastes most propagations on samples where nothing happens. The PassPredictor samples each satellite coarsely, at a fraction of its nodal period (Sgp4GetPropOut index 2), so one propagation per step serves every site. It then brackets the crossings of the mask and refines them with a root finder:
+
+	- a change of sign of (elevation - mask) between two samples brackets a rise or a set, which regula falsi (Illinois variant) pins down to the tolerance
+	- a local maximum of the samples which stays below the mask may hide a short, low pass between the samples, so the maximum is refined by parabolic interpolation and becomes a pass if it clears the mask
+	- the culmination of every pass is refined by parabolic interpolation around its highest sample
+
+All refinements of a satellite run together, one batch propagation per iteration, and each event converges in a handful of propagations.
+
+.. code-block:: python
+
+	from dshsaa import passes
+
+	predictor = passes.PassPredictor(sites, minElevation=10.0)
+	found = predictor.FindPasses(satKeys, start, start + 1.0)
+	found[found['site'] == 0]['rise']
+"""
+import numpy as np
+from dshsaa.raw import settings, sgp4dll
+from dshsaa import topo, rootfind
+import pdb
+
+PASS_DTYPE = np.dtype([('site', np.int32),
+					   ('sat', np.int32),
+					   ('satKey', np.int64),
+					   ('rise', np.float64),
+					   ('culmination', np.float64),
+					   ('set', np.float64),
+					   ('riseAzimuth', np.float64),
+					   ('maxElevation', np.float64),
+					   ('setAzimuth', np.float64)])
+"""
+One pass of one satellite over one site.
+
+	- **site** - The index of the site
+	- **sat** - The index of the satellite in the satKeys given to FindPasses
+	- **satKey** - The satellite's key
+	- **rise** - The time the satellite rises above the mask, days since 1950, UTC. The start of the search window if the pass is already under way.
+	- **culmination** - The time of maximum elevation, days since 1950, UTC
+	- **set** - The time the satellite sets below the mask, days since 1950, UTC. The end of the search window if the pass is still under way.
+	- **riseAzimuth** - Azimuth at rise (deg)
+	- **maxElevation** - Elevation at culmination (deg)
+	- **setAzimuth** - Azimuth at set (deg)
+"""
+
+# the elevation given to samples whose propagation failed, so that they never count as visible
+_FAILED_ELEVATION = -90.0
+
+class PassPredictor:
+	"""
+	Pass prediction for a fixed set of ground sites. astrodll, timedll and sgp4dll must be initialized, and the satellites initialized with Sgp4InitSat.
+
+	:param numpy.ndarray sites: (nsite, 3) array of geodetic latitude (deg), longitude (deg), and height (km) of each site.
+	:param float minElevation: The elevation mask (deg).
+	:param int stepsPerRev: The number of coarse samples per nodal period. A pass shorter than about two coarse steps, which only happens for passes grazing the mask, can be missed; raise this to catch more of them.
+	:param float maxStep: The longest coarse step (days), whatever the period.
+	:param float tolerance: The accuracy of the refined times (days).
+	:param table: Timing constants table for the numpy fast path, see timedll.TConTable.
+	:type table: timedll.TConTable, optional
+	:ivar int propagations: The number of satellite propagations made so far, for comparing against other methods.
+	"""
+	def __init__(self, sites, minElevation=0.0, stepsPerRev=20, maxStep=10.0 / 1440.0, tolerance=1.0 / 86400.0, table=None):
+		if stepsPerRev < 4:
+			raise Exception("stepsPerRev must be at least 4, got %s" % (stepsPerRev))
+		if tolerance <= 0:
+			raise Exception("tolerance must be positive, got %s" % (tolerance))
+		self.topo = topo.TopoEngine(sites)
+		self.minElevation = minElevation
+		self.stepsPerRev = stepsPerRev
+		self.maxStep = maxStep
+		self.tolerance = tolerance
+		self.table = table
+		self.propagations = 0
+
+	def Step(self, satKey, ds50UTC):
+		"""
+		The coarse sampling step of a satellite: its nodal period divided by stepsPerRev, capped at maxStep.
+
+		:param satKey: The satellite's key.
+		:type satKey: settings.stay_int64, int
+		:param float ds50UTC: The time at which to read the period, days since 1950, UTC.
+		:return:
+			**step** (*float*) - The step (days).
+		"""
+		satKey = settings.stay_int64(settings.int64_value(satKey))
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTC(satKey, ds50UTC)
+		self.propagations += 1
+		if retcode != 0:
+			return self.maxStep
+		(retcode, nodalApPer) = sgp4dll.Sgp4GetPropOut(satKey, 2)
+		period = nodalApPer[0] / 1440.0
+		if retcode != 0 or period <= 0:
+			return self.maxStep
+		return min(period / self.stepsPerRev, self.maxStep)
+
+	def FindPasses(self, satKeys, startDs50UTC, stopDs50UTC):
+		"""
+		Finds every pass of every satellite over every site between two times.
+
+		:param satKeys: The satellites to search.
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param float startDs50UTC: The start of the search window, days since 1950, UTC.
+		:param float stopDs50UTC: The end of the search window, days since 1950, UTC.
+		:return:
+			**passes** (*numpy.ndarray*) - PASS_DTYPE array, sorted by rise time.
+		"""
+		if stopDs50UTC <= startDs50UTC:
+			raise Exception("stopDs50UTC %f must be after startDs50UTC %f" % (stopDs50UTC, startDs50UTC))
+		satKeys = np.array(settings.int64_values(satKeys), dtype=np.int64)
+		found = [self._sat_passes(k, satKeys[k], startDs50UTC, stopDs50UTC) for k in range(satKeys.shape[0])]
+		found = np.concatenate(found) if found else np.zeros(0, dtype=PASS_DTYPE)
+		return found[np.argsort(found['rise'], kind='stable')]
+
+	def _sat_passes(self, k, satKey, start, stop):
+		step = self.Step(satKey, start)
+		nstep = max(int(np.ceil((stop - start) / step)), 1)
+		times = np.minimum(start + step * np.arange(nstep + 1), stop)
+		(retcode, _, pos, vel, _) = sgp4dll.Sgp4PropDs50UTCBatch([satKey], times)
+		self.propagations += times.shape[0]
+		el = self.topo.LookAngles(times, pos, vel, table=self.table)[:, 0, :, topo.XA_TOPO_EL]
+		el[:, retcode[0] != 0] = _FAILED_ELEVATION
+		f = el - self.minElevation
+		up = f >= 0
+
+		# brackets of the crossings, as (site, left sample) pairs
+		(riseSite, riseIndex) = np.nonzero(~up[:, :-1] & up[:, 1:])
+		(setSite, setIndex) = np.nonzero(up[:, :-1] & ~up[:, 1:])
+
+		# local maxima below the mask may hide a short pass between the samples
+		(hideSite, hideIndex) = np.nonzero((f[:, 1:-1] < 0) & (f[:, 1:-1] > f[:, :-2]) & (f[:, 1:-1] >= f[:, 2:]))
+		hideIndex = hideIndex + 1
+		# only those whose parabola through the three samples comes within one step's change in elevation of the mask
+		(f0, f1, f2) = (f[hideSite, hideIndex - 1], f[hideSite, hideIndex], f[hideSite, hideIndex + 1])
+		with np.errstate(divide='ignore', invalid='ignore'):
+			peak = f1 + (f2 - f0) ** 2 / (8 * (2 * f1 - f0 - f2))
+		near = ~(peak + np.maximum(f1 - f0, f1 - f2) < 0)
+		(hideSite, hideIndex) = (hideSite[near], hideIndex[near])
+		(hideTime, hideF) = self._maximize(hideSite, satKey, times[hideIndex - 1], times[hideIndex + 1])
+		hidden = hideF >= 0
+		(hideSite, hideIndex, hideTime) = (hideSite[hidden], hideIndex[hidden], hideTime[hidden])
+
+		# refine every crossing in one go
+		crossSite = np.concatenate([riseSite, setSite, hideSite, hideSite])
+		crossRise = np.concatenate([np.ones_like(riseSite, dtype=bool), np.zeros_like(setSite, dtype=bool), np.ones_like(hideSite, dtype=bool), np.zeros_like(hideSite, dtype=bool)])
+		lo = np.concatenate([times[riseIndex], times[setIndex], times[hideIndex - 1], hideTime])
+		hi = np.concatenate([times[riseIndex + 1], times[setIndex + 1], hideTime, times[hideIndex + 1]])
+		crossTime = self._crossing(crossSite, satKey, lo, hi)
+
+		# walk the crossings of each site in time order, pairing every rise with the next set
+		rows = []
+		for s in range(self.topo.nsite):
+			mine = np.flatnonzero(crossSite == s)
+			mine = mine[np.argsort(crossTime[mine], kind='stable')]
+			rise = start if up[s, 0] else None
+			for i in mine:
+				if crossRise[i]:
+					rise = crossTime[i]
+				elif rise is not None:
+					rows.append((s, rise, crossTime[i]))
+					rise = None
+			if rise is not None:
+				rows.append((s, rise, stop))
+		found = np.zeros(len(rows), dtype=PASS_DTYPE)
+		if not rows:
+			return found
+		found['site'] = [row[0] for row in rows]
+		found['sat'] = k
+		found['satKey'] = satKey
+		found['rise'] = [row[1] for row in rows]
+		found['set'] = [row[2] for row in rows]
+
+		# culmination: refined around the highest coarse sample of each pass, kept inside the pass
+		site = found['site'].astype(np.int64)
+		best = np.empty(found.shape[0], dtype=np.int64)
+		for (j, row) in enumerate(found):
+			inside = np.flatnonzero((times >= row['rise']) & (times <= row['set']))
+			best[j] = inside[np.argmax(el[row['site'], inside])] if inside.shape[0] else np.searchsorted(times, row['rise'])
+		lo = np.maximum(times[np.maximum(best - 1, 0)], found['rise'])
+		hi = np.minimum(times[np.minimum(best + 1, times.shape[0] - 1)], found['set'])
+		(found['culmination'], _) = self._maximize(site, satKey, lo, hi)
+
+		# azimuths and elevation at the refined times
+		events = np.concatenate([found['rise'], found['culmination'], found['set']])
+		xa_topo = self._look(np.tile(site, 3), satKey, events).reshape(3, found.shape[0], topo.XA_TOPO_SIZE)
+		found['riseAzimuth'] = xa_topo[0, :, topo.XA_TOPO_AZ]
+		found['maxElevation'] = xa_topo[1, :, topo.XA_TOPO_EL]
+		found['setAzimuth'] = xa_topo[2, :, topo.XA_TOPO_AZ]
+		return found
+
+	def _look(self, site, satKey, ds50UTC):
+		# xa_topo of one satellite at paired (site, time) rows, failed propagations get a very low elevation
+		xa_topo = np.zeros((ds50UTC.shape[0], topo.XA_TOPO_SIZE), dtype=np.float64)
+		if ds50UTC.shape[0] == 0:
+			return xa_topo
+		(retcode, _, pos, vel, _) = sgp4dll.Sgp4PropDs50UTCBatch([satKey], ds50UTC)
+		self.propagations += ds50UTC.shape[0]
+		xa_topo[...] = self.topo.PairLookAngles(site, ds50UTC, pos[0], vel[0], table=self.table)
+		xa_topo[retcode[0] != 0, topo.XA_TOPO_EL] = _FAILED_ELEVATION
+		return xa_topo
+
+	def _f(self, site, satKey, ds50UTC):
+		return self._look(site, satKey, ds50UTC)[:, topo.XA_TOPO_EL] - self.minElevation
+
+	def _crossing(self, site, satKey, lo, hi):
+		# refine the crossings bracketed by [lo, hi]
+		return rootfind.regula_falsi(lambda index, t: self._f(site[index], satKey, t), lo, hi, self.tolerance)
+
+	def _maximize(self, site, satKey, lo, hi):
+		# the maximum elevation in [lo, hi], returns the times and (elevation - mask) there
+		return rootfind.maximize(lambda index, t: self._f(site[index], satKey, t), lo, hi, self.tolerance)
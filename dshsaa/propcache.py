@@ -0,0 +1,136 @@
+#! /usr/bin/env python3
+
+"""
+propcache.py memoizes sgp4dll propagation results per (satKey, time), for services which ask for the same satellites at the same handful of times over and over.
+
+The cache is optional: code which wants it calls the propagation functions through a PropagationCache instead of through sgp4dll. Results are evicted least recently used first once the cache is full, and dropped as soon as the satellite changes in the DLLs (Sgp4InitSat, Sgp4RemoveSat, Sgp4RemoveAllSats, Sgp4ReepochTLE, TleUpdateSatFr*, TleSetField, TleRemoveSat, TleRemoveAllSats), see dshsaa.raw.events.
+
+.. code-block:: python
+
+	from dshsaa import propcache
+
+	cache = propcache.PropagationCache(maxsize=100000)
+	(retcode, mse, pos, vel, llh) = cache.Sgp4PropDs50UTC(satKey, ds50UTC)
+	cache.stats()
+"""
+import collections
+import numpy as np
+from dshsaa.raw import settings, sgp4dll, events
+import pdb
+
+class PropagationCache:
+	"""
+	A bounded least recently used cache in front of the sgp4dll propagation functions. Each method takes the same arguments and returns the same values as the sgp4dll function of the same name.
+
+	Failed propagations are cached too, since the DLL gives the same answer until the satellite changes, and a change invalidates the entry.
+
+	:param int maxsize: The maximum number of results kept, across all functions and satellites.
+	"""
+	def __init__(self, maxsize=65536):
+		if maxsize < 1:
+			raise Exception("maxsize must be at least 1, got %s" % (maxsize))
+		self.maxsize = maxsize
+		self._results = collections.OrderedDict()
+		self._keysBySat = {}
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.invalidations = 0
+		self._callback = events.subscribe_weak(self._on_event)
+
+	def Sgp4PropDs50UTC(self, satKey, ds50UTC):
+		"""
+		Cached sgp4dll.Sgp4PropDs50UTC.
+
+		:return: (retcode, mse, pos, vel, llh), see sgp4dll.Sgp4PropDs50UTC.
+		"""
+		return self._get(sgp4dll.Sgp4PropDs50UTC, satKey, ds50UTC)
+
+	def Sgp4PropMse(self, satKey, mse):
+		"""
+		Cached sgp4dll.Sgp4PropMse.
+
+		:return: (retcode, ds50UTC, pos, vel, llh), see sgp4dll.Sgp4PropMse.
+		"""
+		return self._get(sgp4dll.Sgp4PropMse, satKey, mse)
+
+	def Sgp4PropDs50UtcPos(self, satKey, ds50UTC):
+		"""
+		Cached sgp4dll.Sgp4PropDs50UtcPos.
+
+		:return: (retcode, pos), see sgp4dll.Sgp4PropDs50UtcPos.
+		"""
+		return self._get(sgp4dll.Sgp4PropDs50UtcPos, satKey, ds50UTC)
+
+	def Sgp4PropDs50UtcLLH(self, satKey, ds50UTC):
+		"""
+		Cached sgp4dll.Sgp4PropDs50UtcLLH.
+
+		:return: (retcode, llh), see sgp4dll.Sgp4PropDs50UtcLLH.
+		"""
+		return self._get(sgp4dll.Sgp4PropDs50UtcLLH, satKey, ds50UTC)
+
+	def stats(self):
+		"""
+		Returns the counters, for monitoring.
+
+		:return:
+			**stats** (*dict*) - hits, misses, evictions (results dropped to make room), invalidations (results dropped because their satellite changed), size and maxsize.
+		"""
+		return {'hits': self.hits,
+				'misses': self.misses,
+				'evictions': self.evictions,
+				'invalidations': self.invalidations,
+				'size': len(self._results),
+				'maxsize': self.maxsize}
+
+	def clear(self):
+		"""
+		Drops every cached result. The counters are kept.
+		"""
+		self._results.clear()
+		self._keysBySat.clear()
+
+	def close(self):
+		"""
+		Drops every cached result and stops listening for satellite changes.
+		"""
+		self.clear()
+		events.unsubscribe(self._callback)
+
+	def __len__(self):
+		return len(self._results)
+
+	def _get(self, func, satKey, t):
+		key_value = settings.int64_value(satKey)
+		key = (func.__name__, key_value, float(t))
+		result = self._results.get(key)
+		if result is not None:
+			self.hits += 1
+			self._results.move_to_end(key)
+			return _copy_result(result)
+		self.misses += 1
+		result = func(satKey, t)
+		self._results[key] = result
+		self._keysBySat.setdefault(key_value, set()).add(key)
+		while len(self._results) > self.maxsize:
+			(old, old_result) = self._results.popitem(last=False)
+			keys = self._keysBySat[old[1]]
+			keys.discard(old)
+			if not keys:
+				del self._keysBySat[old[1]]
+			self.evictions += 1
+		return _copy_result(result)
+
+	def _on_event(self, event, satKey):
+		if event == 'remove_all':
+			self.invalidations += len(self._results)
+			self.clear()
+			return
+		for key in self._keysBySat.pop(satKey, ()):
+			del self._results[key]
+			self.invalidations += 1
+
+def _copy_result(result):
+	# hand out copies so that a caller modifying a returned list cannot corrupt the cache
+	return tuple(value.copy() if isinstance(value, (list, np.ndarray)) else value for value in result)
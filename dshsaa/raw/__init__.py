@@ -0,0 +1,13 @@
+#! /usr/bin/env python3
+
+"""
+The raw package wraps the SAA libraries one module per library. The libraries are loaded on the first call of one of their functions, see lazydll.
+"""
+
+def preload():
+	"""
+	Loads every SAA library and binds every prototype now rather than on first use, for long running services which would rather not pay that cost on their first request.
+	"""
+	from dshsaa.raw import maindll, timedll, tledll, envdll, astrodll, sgp4dll
+	for lib in [maindll.C_MAINDLL, timedll.C_TIMEDLL, tledll.C_TLEDLL, envdll.C_ENVDLL, astrodll.C_ASTRODLL, sgp4dll.C_SGP4DLL]:
+		lib.load()
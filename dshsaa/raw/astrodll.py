@@ -1,11 +1,14 @@
 #! /usr/bin/env python3
 
 import dshsaa.raw.settings as settings
+import dshsaa.raw.lazydll as lazydll
 import dshsaa.raw.exceptions as exceptions
+import dshsaa.raw.fastcall as fastcall
 import ctypes as c
+import numpy as np
 import pdb
 
-C_ASTRODLL = c.CDLL(settings.LIB_ASTRO_NAME)
+C_ASTRODLL = lazydll.LazyDLL('LIB_ASTRO_NAME', __name__)
 
 ##AstroConvFrTo 
 C_ASTRODLL.AstroConvFrTo.argtypes = [c.c_int, settings.double128, settings.double128]
@@ -327,7 +330,7 @@ def EarthObstructionAngles(earthLimb, satECI, senECI):
 	return (earthSenLimb, earthSenSat, satEarthSen)
 
 ##ECIToEFG
-C_ASTRODLL.ECIToEFG.argtypes = [c.c_double] + [settings.double3] * 4
+_ECIToEFG = fastcall.bind(C_ASTRODLL, 'ECIToEFG', None, [c.c_double] + [settings.double3] * 4)
 def ECIToEFG(thetaG, posECI, velECI):
 	"""
 	Converts ECI position and velocity vectors to EFG position and velocity vectors. 
@@ -339,18 +342,36 @@ def ECIToEFG(thetaG, posECI, velECI):
 		- **posEFG** (*float[3]*) - The resulting EFG position vector (km). (double[3])
 		- **velEFG** (*float[3]*) - The resulting EFG velocity vector (km/s). (double[3])
 	"""
-	thetaG = c.c_double(thetaG)
 	posECI = settings.list_to_array(posECI)
 	velECI = settings.list_to_array(velECI)
 	posEFG = settings.double3()
 	velEFG = settings.double3()
-	C_ASTRODLL.ECIToEFG(thetaG, posECI, velECI, posEFG, velEFG)
+	_ECIToEFG(thetaG, posECI, velECI, posEFG, velEFG)
 	posEFG = settings.array_to_list(posEFG)
 	velEFG = settings.array_to_list(velEFG)
 	return (posEFG, velEFG)
 
+
+##ECIToEFGBatch
+_ECIToEFG_addr = fastcall.bind_variant(C_ASTRODLL, 'ECIToEFG', None, [c.c_double] + [c.c_void_p] * 4)
+def ECIToEFGBatch(thetaG, posECI, velECI, out=None):
+	"""
+	Batch form of ECIToEFG: converts N ECI states, each with its own Greenwich angle, in one call.
+
+	:param thetaG: Theta - Greenwich mean sidereal time (rad), one per row, or a single value for every row.
+	:type thetaG: float, numpy.ndarray
+	:param numpy.ndarray posECI: (N, 3) array of ECI (TEME of Date) position vectors (km).
+	:param numpy.ndarray velECI: (N, 3) array of ECI (TEME of Date) velocity vectors (km/s).
+	:param out: Two float64 (N, 3) arrays (posEFG, velEFG) to write the results into.
+	:type out: tuple, optional
+	:return:
+		- **posEFG** (*numpy.ndarray*) - (N, 3) array of the resulting EFG position vectors (km).
+		- **velEFG** (*numpy.ndarray*) - (N, 3) array of the resulting EFG velocity vectors (km/s).
+	"""
+	return _batch(_ECIToEFG_addr, [thetaG], [posECI, velECI], 2, out)
+
 ##ECIToTopoComps
-C_ASTRODLL.ECIToTopoComps.argtypes = [c.c_double] * 2 + [settings.double3] * 3 + [settings.double10]
+_ECIToTopoComps = fastcall.bind(C_ASTRODLL, 'ECIToTopoComps', None, [c.c_double] * 2 + [settings.double3] * 3 + [settings.double10])
 def ECIToTopoComps(theta, lat, senPos, satPos, satVel):
 	"""
 	Converts satellite ECI position/velocity vectors and sensor location to topocentric components.
@@ -374,18 +395,36 @@ def ECIToTopoComps(theta, lat, senPos, satPos, satVel):
 			- [8]: ElDot (first derivative of elevation) (deg/s) 
 			- [9]: RangeDot (first derivative of range) (km/s) 
 	"""
-	theta = c.c_double(theta)
-	lat = c.c_double(lat)
 	senPos = settings.list_to_array(senPos)
 	satPos = settings.list_to_array(satPos)
 	satVel = settings.list_to_array(satVel)
 	xa_topo = settings.double10()
-	C_ASTRODLL.ECIToTopoComps(theta, lat, senPos, satPos, satVel, xa_topo)
+	_ECIToTopoComps(theta, lat, senPos, satPos, satVel, xa_topo)
 	xa_topo = settings.array_to_list(xa_topo)
 	return xa_topo
+
+##ECIToTopoCompsBatch
+_ECIToTopoComps_addr = fastcall.bind_variant(C_ASTRODLL, 'ECIToTopoComps', None, [c.c_double] * 2 + [c.c_void_p] * 4)
+def ECIToTopoCompsBatch(theta, lat, senPos, satPos, satVel, out=None):
+	"""
+	Batch form of ECIToTopoComps: computes the topocentric components of N sensor/satellite pairs in one call.
+
+	:param theta: Theta - local sidereal time (rad), one per row, or a single value for every row.
+	:type theta: float, numpy.ndarray
+	:param lat: Station's astronomical latitude (deg), one per row, or a single value for every row.
+	:type lat: float, numpy.ndarray
+	:param numpy.ndarray senPos: (N, 3) array of sensor positions in ECI (km).
+	:param numpy.ndarray satPos: (N, 3) array of satellite positions in ECI (km).
+	:param numpy.ndarray satVel: (N, 3) array of satellite velocities in ECI (km/s).
+	:param out: A float64 (N, 10) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**xa_topo** (*numpy.ndarray*) - (N, 10) array of the resulting topocentric components, one row per pair, laid out as in ECIToTopoComps.
+	"""
+	return _batch(_ECIToTopoComps_addr, [theta, lat], [senPos, satPos, satVel], 1, out, width=10)
 	
 ##ECRToEFG
-C_ASTRODLL.ECRToEFG.argtypes = [c.c_double] * 2 + [settings.double3] * 4
+_ECRToEFG = fastcall.bind(C_ASTRODLL, 'ECRToEFG', None, [c.c_double] * 2 + [settings.double3] * 4)
 def ECRToEFG(polarX, polarY, posECR, velECR):
 	"""
 	Converts ECR position and velocity vectors to EFG position and velocity vectors.
@@ -398,19 +437,38 @@ def ECRToEFG(polarX, polarY, posECR, velECR):
 		- **posEFG** (*float[3]*) - The resulting EFG position vector (km). (double[3])
 		- **velEFG** (*float[3]*) -	The resulting EFG velocity vector (km/s). (double[3])
 	"""
-	polarX = c.c_double(polarX)
-	polarY = c.c_double(polarY)
 	posECR = settings.list_to_array(posECR)
 	velECR = settings.list_to_array(velECR)
 	posEFG = settings.double3()
 	velEFG = settings.double3()
-	C_ASTRODLL.ECRToEFG(polarX, polarY, posECR, velECR, posEFG, velEFG)
+	_ECRToEFG(polarX, polarY, posECR, velECR, posEFG, velEFG)
 	posEFG = settings.array_to_list(posEFG)
 	velEFG = settings.array_to_list(velEFG)
 	return (posEFG, velEFG)
 	
+
+##ECRToEFGBatch
+_ECRToEFG_addr = fastcall.bind_variant(C_ASTRODLL, 'ECRToEFG', None, [c.c_double] * 2 + [c.c_void_p] * 4)
+def ECRToEFGBatch(polarX, polarY, posECR, velECR, out=None):
+	"""
+	Batch form of ECRToEFG: converts N ECR states, each with its own polar motion, in one call.
+
+	:param polarX: Polar motion X (arc-sec), one per row, or a single value for every row.
+	:type polarX: float, numpy.ndarray
+	:param polarY: Polar motion Y (arc-sec), one per row, or a single value for every row.
+	:type polarY: float, numpy.ndarray
+	:param numpy.ndarray posECR: (N, 3) array of ECR position vectors (km).
+	:param numpy.ndarray velECR: (N, 3) array of ECR velocity vectors (km/s).
+	:param out: Two float64 (N, 3) arrays (posEFG, velEFG) to write the results into.
+	:type out: tuple, optional
+	:return:
+		- **posEFG** (*numpy.ndarray*) - (N, 3) array of the resulting EFG position vectors (km).
+		- **velEFG** (*numpy.ndarray*) - (N, 3) array of the resulting EFG velocity vectors (km/s).
+	"""
+	return _batch(_ECRToEFG_addr, [polarX, polarY], [posECR, velECR], 2, out)
+
 ##EFGPosToLLH
-C_ASTRODLL.EFGPosToLLH.argtypes = [settings.double3] * 2
+_EFGPosToLLH = fastcall.bind(C_ASTRODLL, 'EFGPosToLLH', None, [settings.double3] * 2)
 def EFGPosToLLH(posEFG):
 	"""
 	Converts an EFG position vector to geodetic latitude, longitude, and height. 
@@ -421,12 +479,27 @@ def EFGPosToLLH(posEFG):
 	"""
 	posEFG = settings.list_to_array(posEFG)
 	metricLLH = settings.double3()
-	C_ASTRODLL.EFGPosToLLH(posEFG, metricLLH)
+	_EFGPosToLLH(posEFG, metricLLH)
 	metricLLH = settings.array_to_list(metricLLH)
 	return metricLLH
 	
+
+##EFGPosToLLHBatch
+_EFGPosToLLH_addr = fastcall.bind_variant(C_ASTRODLL, 'EFGPosToLLH', None, [c.c_void_p] * 2)
+def EFGPosToLLHBatch(posEFG, out=None):
+	"""
+	Batch form of EFGPosToLLH: converts N EFG positions in one call.
+
+	:param numpy.ndarray posEFG: (N, 3) array of EFG position vectors (km).
+	:param out: A float64 (N, 3) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**metricLLH** (*numpy.ndarray*) - (N, 3) array of the resulting geodetic north latitude (degree), east longitude (degree), and height (km).
+	"""
+	return _batch(_EFGPosToLLH_addr, [], [posEFG], 1, out)
+
 ##EFGToECI
-C_ASTRODLL.EFGToECI.argtypes = [c.c_double] + [settings.double3] * 3
+_EFGToECI = fastcall.bind(C_ASTRODLL, 'EFGToECI', None, [c.c_double] + [settings.double3] * 3)
 def EFGToECI(thetaG, posEFG, velEFG):
 	"""
 	Converts EFG position and velocity vectors to ECI position and velocity vectors. 
@@ -438,18 +511,36 @@ def EFGToECI(thetaG, posEFG, velEFG):
 		- **posECI** (*float[3]*) - The resulting ECI (TEME of Date) position vector (km). (double[3])
 		- **velECI** (*float[3]*) - The resulting ECI (TEME of Date) velocity vector (km/s). (double[3])
 	"""
-	thetaG = c.c_double(thetaG)
 	posEFG = settings.list_to_array(posEFG)
 	velEFG = settings.list_to_array(velEFG)
 	posECI = settings.double3()
 	velECI = settings.double3()
-	C_ASTRODLL.EFGToECI(thetaG, posEFG, velEFG, posECI, velECI)
+	_EFGToECI(thetaG, posEFG, velEFG, posECI, velECI)
 	posECI = settings.array_to_list(posECI)
 	velECI = settings.array_to_list(velECI)
 	return (posECI, velECI)
 	
+
+##EFGToECIBatch
+_EFGToECI_addr = fastcall.bind_variant(C_ASTRODLL, 'EFGToECI', None, [c.c_double] + [c.c_void_p] * 4)
+def EFGToECIBatch(thetaG, posEFG, velEFG, out=None):
+	"""
+	Batch form of EFGToECI: converts N EFG states, each with its own Greenwich angle, in one call.
+
+	:param thetaG: Theta - Greenwich mean sidereal time (rad), one per row, or a single value for every row.
+	:type thetaG: float, numpy.ndarray
+	:param numpy.ndarray posEFG: (N, 3) array of EFG position vectors (km).
+	:param numpy.ndarray velEFG: (N, 3) array of EFG velocity vectors (km/s).
+	:param out: Two float64 (N, 3) arrays (posECI, velECI) to write the results into.
+	:type out: tuple, optional
+	:return:
+		- **posECI** (*numpy.ndarray*) - (N, 3) array of the resulting ECI (TEME of Date) position vectors (km).
+		- **velECI** (*numpy.ndarray*) - (N, 3) array of the resulting ECI (TEME of Date) velocity vectors (km/s).
+	"""
+	return _batch(_EFGToECI_addr, [thetaG], [posEFG, velEFG], 2, out)
+
 ##EFGToECR
-C_ASTRODLL.EFGToECR.argtypes = [c.c_double] * 2 + [settings.double3] * 4
+_EFGToECR = fastcall.bind(C_ASTRODLL, 'EFGToECR', None, [c.c_double] * 2 + [settings.double3] * 4)
 def EFGToECR(polarX, polarY, posEFG, velEFG):
 	"""
 	Converts EFG position and velocity vectors to ECR position and velocity vectors.
@@ -462,17 +553,36 @@ def EFGToECR(polarX, polarY, posEFG, velEFG):
 		- **posECR** (*float[3]*) - The resulting ECR position vector (km). (double[3])
 		- **velECR** (*float[3]*) - The resulting ECR velocity vector (km/s). (double[3])
 	"""
-	polarX = c.c_double(polarX)
-	polarY = c.c_double(polarY)
 	posEFG = settings.list_to_array(posEFG)
 	velEFG = settings.list_to_array(velEFG)
 	posECR = settings.double3()
 	velECR = settings.double3()
-	C_ASTRODLL.EFGToECR(polarX, polarY, posEFG, velEFG, posECR, velECR)
+	_EFGToECR(polarX, polarY, posEFG, velEFG, posECR, velECR)
 	posECR = settings.array_to_list(posECR)
 	velECR = settings.array_to_list(velECR)
 	return (posECR, velECR)	
 	
+
+##EFGToECRBatch
+_EFGToECR_addr = fastcall.bind_variant(C_ASTRODLL, 'EFGToECR', None, [c.c_double] * 2 + [c.c_void_p] * 4)
+def EFGToECRBatch(polarX, polarY, posEFG, velEFG, out=None):
+	"""
+	Batch form of EFGToECR: converts N EFG states, each with its own polar motion, in one call.
+
+	:param polarX: Polar motion X (arc-sec), one per row, or a single value for every row.
+	:type polarX: float, numpy.ndarray
+	:param polarY: Polar motion Y (arc-sec), one per row, or a single value for every row.
+	:type polarY: float, numpy.ndarray
+	:param numpy.ndarray posEFG: (N, 3) array of EFG position vectors (km).
+	:param numpy.ndarray velEFG: (N, 3) array of EFG velocity vectors (km/s).
+	:param out: Two float64 (N, 3) arrays (posECR, velECR) to write the results into.
+	:type out: tuple, optional
+	:return:
+		- **posECR** (*numpy.ndarray*) - (N, 3) array of the resulting ECR position vectors (km).
+		- **velECR** (*numpy.ndarray*) - (N, 3) array of the resulting ECR velocity vectors (km/s).
+	"""
+	return _batch(_EFGToECR_addr, [polarX, polarY], [posEFG, velEFG], 2, out)
+
 ##EqnxToClass 
 C_ASTRODLL.EqnxToClass.argtypes = [settings.double6] * 2
 def EqnxToClass(metricEqnx):
@@ -618,6 +728,21 @@ def KepToPosVel(metricKep):
 	vel = settings.array_to_list(vel)
 	return (pos, vel)
 
+##KepToPosVelBatch
+_KepToPosVel_addr = fastcall.bind_variant(C_ASTRODLL, 'KepToPosVel', None, [c.c_void_p] * 3)
+def KepToPosVelBatch(metricKep, out=None):
+	"""
+	Batch form of KepToPosVel: converts N sets of osculating Keplerian elements in one call.
+
+	:param numpy.ndarray metricKep: (N, 6) array of Keplerian elements, laid out as in KepToPosVel.
+	:param out: Two float64 (N, 3) arrays (pos, vel) to write the results into.
+	:type out: tuple, optional
+	:return:
+		- **pos** (*numpy.ndarray*) - (N, 3) array of the resulting position vectors.
+		- **vel** (*numpy.ndarray*) - (N, 3) array of the resulting velocity vectors.
+	"""
+	return _batch(_KepToPosVel_addr, [], [metricKep], 2, out, inWidth=6)
+
 ##KepToUVW
 C_ASTRODLL.KepToUVW.argtypes = [settings.double6] + [settings.double3] * 3
 def KepToUVW(metricKep):
@@ -660,7 +785,7 @@ def KozaiToBrouwer(eccen, incli, nKozai):
 	return nBrouwer
 	
 ##LLHToEFGPos
-C_ASTRODLL.LLHToEFGPos.argtypes = [settings.double3] * 2
+_LLHToEFGPos = fastcall.bind(C_ASTRODLL, 'LLHToEFGPos', None, [settings.double3] * 2)
 def LLHToEFGPos(metricLLH):
 	"""
 	Converts geodetic latitude, longitude, and height to an EFG position vector.
@@ -671,12 +796,27 @@ def LLHToEFGPos(metricLLH):
 	"""
 	metricLLH = settings.list_to_array(metricLLH)
 	posEFG = settings.double3()
-	C_ASTRODLL.LLHToEFGPos(metricLLH, posEFG)
+	_LLHToEFGPos(metricLLH, posEFG)
 	posEFG = settings.array_to_list(posEFG)
 	return posEFG
 
+
+##LLHToEFGPosBatch
+_LLHToEFGPos_addr = fastcall.bind_variant(C_ASTRODLL, 'LLHToEFGPos', None, [c.c_void_p] * 2)
+def LLHToEFGPosBatch(metricLLH, out=None):
+	"""
+	Batch form of LLHToEFGPos: converts N geodetic positions in one call.
+
+	:param numpy.ndarray metricLLH: (N, 3) array of geodetic north latitude (degree), east longitude (degree), and height (km).
+	:param out: A float64 (N, 3) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**posEFG** (*numpy.ndarray*) - (N, 3) array of the resulting EFG position vectors (km).
+	"""
+	return _batch(_LLHToEFGPos_addr, [], [metricLLH], 1, out)
+
 ##LLHToXYZ
-C_ASTRODLL.LLHToXYZ.argtypes = [c.c_double] + [settings.double3] * 2
+_LLHToXYZ = fastcall.bind(C_ASTRODLL, 'LLHToXYZ', None, [c.c_double] + [settings.double3] * 2)
 def LLHToXYZ(thetaG, metricLLH):
 	"""
 	Converts geodetic latitude, longitude, and height to an ECI position vector XYZ. 
@@ -686,10 +826,9 @@ def LLHToXYZ(thetaG, metricLLH):
 	:return:
 		**metricXYZ** (*float[3]*) - The resulting ECI (TEME of Date) position vector (km). (double[3])
 	"""
-	thetaG = c.c_double(thetaG)
 	metricLLH = settings.list_to_array(metricLLH)
 	metricXYZ = settings.double3()
-	C_ASTRODLL.LLHToXYZ(thetaG, metricLLH, metricXYZ)
+	_LLHToXYZ(thetaG, metricLLH, metricXYZ)
 	metricXYZ = settings.array_to_list(metricXYZ)
 	return metricXYZ
 	
@@ -784,6 +923,21 @@ def PosVelToKep(pos, vel):
 	C_ASTRODLL.PosVelToKep(pos, vel, metricKep)
 	metricKep = settings.array_to_list(metricKep)
 	return metricKep	
+
+##PosVelToKepBatch
+_PosVelToKep_addr = fastcall.bind_variant(C_ASTRODLL, 'PosVelToKep', None, [c.c_void_p] * 3)
+def PosVelToKepBatch(pos, vel, out=None):
+	"""
+	Batch form of PosVelToKep: converts N osculating states in one call.
+
+	:param numpy.ndarray pos: (N, 3) array of position vectors.
+	:param numpy.ndarray vel: (N, 3) array of velocity vectors.
+	:param out: A float64 (N, 6) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**metricKep** (*numpy.ndarray*) - (N, 6) array of the resulting Keplerian elements, laid out as in PosVelToKep.
+	"""
+	return _batch(_PosVelToKep_addr, [], [pos, vel], 1, out, width=6)
 	
 ##PosVelToPTW
 C_ASTRODLL.PosVelToPTW.argtypes = [settings.double3] * 5
@@ -994,8 +1148,28 @@ def SolveKepEqtn(metricKep):
 	E = C_ASTRODLL.SolveKepEqtn(metricKep)
 	return E
 
+##SolveKepEqtnBatch
+_SolveKepEqtn_addr = fastcall.bind_variant(C_ASTRODLL, 'SolveKepEqtn', c.c_double, [c.c_void_p])
+def SolveKepEqtnBatch(metricKep, out=None):
+	"""
+	Batch form of SolveKepEqtn: solves Kepler's equation for N sets of Keplerian elements in one call.
+
+	:param numpy.ndarray metricKep: (N, 6) array of Keplerian elements, laid out as in KepToPosVel.
+	:param out: A float64 (N,) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**E** (*numpy.ndarray*) - (N,) array of the eccentric anomalies.
+	"""
+	metricKep = np.ascontiguousarray(metricKep, dtype=np.float64)
+	n = metricKep.shape[0]
+	if metricKep.shape != (n, 6):
+		raise Exception("input array has shape %s, expecting (%i, 6)" % (metricKep.shape, n))
+	(addr, stride) = (metricKep.ctypes.data, metricKep.strides[0])
+	E = np.fromiter((_SolveKepEqtn_addr(addr + i * stride) for i in range(n)), dtype=np.float64, count=n)
+	return _fill_out(E, out)
+
 ##XYZToLLH
-C_ASTRODLL.XYZToLLH.argtypes = [c.c_double] + [settings.double3] * 2
+_XYZToLLH = fastcall.bind(C_ASTRODLL, 'XYZToLLH', None, [c.c_double] + [settings.double3] * 2)
 def XYZToLLH(thetaG, metricPos):
 	"""
 	Converts an ECI position vector XYZ to geodetic latitude, longitude, and height. 
@@ -1005,9 +1179,59 @@ def XYZToLLH(thetaG, metricPos):
 	:return:
 		**metricLLH** (*float[3]*) - The resulting geodetic north latitude (degree), east longitude(degree), and height (km). (double[3])
 	"""
-	thetaG = c.c_double(thetaG)
 	metricPos = settings.list_to_array(metricPos)
 	metricLLH = settings.double3()
-	C_ASTRODLL.XYZToLLH(thetaG, metricPos, metricLLH)
+	_XYZToLLH(thetaG, metricPos, metricLLH)
 	metricLLH = settings.array_to_list(metricLLH)
 	return metricLLH
+
+##XYZToLLHBatch
+_XYZToLLH_addr = fastcall.bind_variant(C_ASTRODLL, 'XYZToLLH', None, [c.c_double] + [c.c_void_p] * 2)
+def XYZToLLHBatch(thetaG, metricPos, out=None):
+	"""
+	Batch form of XYZToLLH: converts N ECI positions, each with its own Greenwich angle, in one call. This turns a propagated trajectory into a ground track.
+
+	:param thetaG: ThetaG - Greenwich mean sidereal time (rad), one per row, or a single value for every row.
+	:type thetaG: float, numpy.ndarray
+	:param numpy.ndarray metricPos: (N, 3) array of ECI (TEME of Date) position vectors (km).
+	:param out: A float64 (N, 3) array to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**metricLLH** (*numpy.ndarray*) - (N, 3) array of the resulting geodetic north latitude (degree), east longitude (degree), and height (km).
+	"""
+	return _batch(_XYZToLLH_addr, [thetaG], [metricPos], 1, out)
+
+## Batch helpers
+def _batch(func, scalars, inputs, nout, out, width=3, inWidth=3):
+	# Shared body of the *Batch functions. func is an address based prototype taking the scalars, then the input
+	# vectors, then the output vectors. Inputs are (N, inWidth) arrays and outputs are (N, width) arrays, row i of
+	# each is passed as its base address + i * row size.
+	inputs = [np.ascontiguousarray(ar, dtype=np.float64) for ar in inputs]
+	n = inputs[0].shape[0]
+	for ar in inputs:
+		if ar.shape != (n, inWidth):
+			raise Exception("input array has shape %s, expecting (%i, %i)" % (ar.shape, n, inWidth))
+	scalars = [np.broadcast_to(np.asarray(sc, dtype=np.float64), (n,)).tolist() for sc in scalars]
+	if out is None:
+		outputs = [np.empty((n, width), dtype=np.float64) for i in range(nout)]
+	else:
+		outputs = [out] if nout == 1 else list(out)
+		for ar in outputs:
+			settings.verify_out_array(ar, (n, width))
+	arrays = inputs + outputs
+	addrs = [ar.ctypes.data for ar in arrays]
+	strides = [ar.strides[0] for ar in arrays]
+	if scalars:
+		for (i, row) in enumerate(zip(*scalars)):
+			func(*row, *[addr + i * stride for (addr, stride) in zip(addrs, strides)])
+	else:
+		for i in range(n):
+			func(*[addr + i * stride for (addr, stride) in zip(addrs, strides)])
+	return outputs[0] if nout == 1 else tuple(outputs)
+
+def _fill_out(result, out):
+	if out is None:
+		return result
+	settings.verify_out_array(out, result.shape)
+	out[...] = result
+	return out
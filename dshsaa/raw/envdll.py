@@ -1,10 +1,11 @@
 #! /usr/bin/env python3
 
 import dshsaa.raw.settings as settings
+import dshsaa.raw.lazydll as lazydll
 import ctypes as c
 import pdb
 
-C_ENVDLL = c.CDLL(settings.LIB_ENV_NAME)
+C_ENVDLL = lazydll.LazyDLL('LIB_ENV_NAME', __name__)
 
 # The pattern for the rest of this file will be:
 # 1. Set parameter types
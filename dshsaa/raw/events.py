@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+
+"""
+events.py is an internal module to the raw package which tells interested code when the satellites held by the DLLs change.
+
+The wrappers which add, change or remove satellites in tledll and sgp4dll call ``events.notify`` after the DLL call. Anything that keeps derived data per satKey, such as a propagation cache, subscribes a callback and drops what the event makes stale.
+
+The events are:
+
+	- **'add'** - one satKey was added (TleAddSatFr*, including the batch forms)
+	- **'load'** - an unknown number of satKeys were added (TleLoadFile), satKey is None
+	- **'update'** - the data of one satKey changed (Sgp4InitSat, Sgp4ReepochTLE, TleUpdateSatFr*, TleSetField)
+	- **'remove'** - one satKey was removed (Sgp4RemoveSat, TleRemoveSat)
+	- **'remove_all'** - every satKey was removed (Sgp4RemoveAllSats, TleRemoveAllSats), satKey is None
+
+Every event also has a source, 'tle' or 'sgp4', the DLL whose satellites changed. A callback can subscribe to the events of one source only, for instance to follow the TLE tree without being told about sgp4dll dropping a satellite.
+
+.. code-block:: python
+
+	def on_change(event, satKey):
+		if event == 'remove_all':
+			cache.clear()
+		else:
+			cache.pop(satKey, None)
+
+	events.subscribe(on_change)
+
+Objects which keep such data, such as propcache.PropagationCache, subscribe one of their methods with subscribe_weak instead, so that an object dropped without being closed is still garbage collected.
+"""
+import weakref
+import dshsaa.raw.settings as settings
+import pdb
+
+_subscribers = []
+_sources = {}
+
+def subscribe(callback, source=None):
+	"""
+	Registers a callback to be called as ``callback(event, satKey)`` after every change. satKey is a plain int, or None for events which are not about one satellite.
+
+	:param callable callback: The function to call.
+	:param source: Only call back for the events of this DLL, 'tle' or 'sgp4'. By default every event is passed on.
+	:type source: str, optional
+	:return:
+		**callback** (*callable*) - The same callback, so subscribe can be used as a decorator.
+	"""
+	if callback not in _subscribers:
+		_subscribers.append(callback)
+		_sources[callback] = source
+	return callback
+
+def subscribe_weak(method, source=None):
+	"""
+	Like subscribe, for a bound method, but only holding a weak reference to its object. Once the object is garbage collected, the callback unsubscribes itself on the next event.
+
+	:param method: The bound method to call as ``method(event, satKey)``.
+	:type method: callable
+	:param source: Only call back for the events of this DLL, 'tle' or 'sgp4'. By default every event is passed on.
+	:type source: str, optional
+	:return:
+		**callback** (*callable*) - The registered callback, to pass to unsubscribe.
+	"""
+	ref = weakref.WeakMethod(method)
+	def callback(event, satKey):
+		method = ref()
+		if method is None:
+			unsubscribe(callback)
+		else:
+			method(event, satKey)
+	return subscribe(callback, source=source)
+
+def unsubscribe(callback):
+	"""
+	Removes a callback registered with subscribe. Removing a callback which is not registered is harmless.
+
+	:param callable callback: The function to remove.
+	"""
+	if callback in _subscribers:
+		_subscribers.remove(callback)
+		del _sources[callback]
+
+def notify(event, satKey=None, source=None):
+	"""
+	Calls every subscribed callback. Used by the wrappers, not intended to be called by users.
+
+	:param str event: The kind of change, see the list above.
+	:param satKey: The satellite concerned, if any.
+	:type satKey: settings.stay_int64, int, None
+	:param str source: The DLL whose satellites changed, 'tle' or 'sgp4'.
+	"""
+	if not _subscribers:
+		return
+	if satKey is not None:
+		satKey = settings.int64_value(satKey)
+	for callback in list(_subscribers):
+		wanted = _sources.get(callback)
+		if wanted is None or wanted == source:
+			callback(event, satKey)
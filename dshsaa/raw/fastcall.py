@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+
+"""
+fastcall.py is an internal module to the raw package which binds DLL functions for the wrappers that sit on hot paths (propagation, time conversion, frame conversion).
+
+Calling ``C_SGP4DLL.Sgp4PropMse(...)`` looks the function up on the CDLL object every call. Binding it once with ``fastcall.bind`` gives the wrapper a module level foreign function to call directly. The prototype (``restype`` and ``argtypes``) is set at the same time, and ctypes then converts python floats and ints itself, so the wrapper does not need to box arguments in ``c.c_double(...)`` by hand.
+
+The pattern used by the wrappers is:
+
+.. code-block:: python
+
+	##Sgp4PropMse
+	_Sgp4PropMse = fastcall.bind(C_SGP4DLL, 'Sgp4PropMse', c.c_int, [settings.stay_int64, c.c_double, ...])
+
+	def Sgp4PropMse(satKey, mse):
+		...
+		retcode = _Sgp4PropMse(satKey, mse, ...)
+
+When the library is not loaded yet (see lazydll), both functions return a placeholder which binds the function when the library is loaded. The placeholder in the wrapper module is then replaced by the real function.
+"""
+import ctypes as c
+import dshsaa.raw.lazydll as lazydll
+import pdb
+
+def bind(lib, name, restype, argtypes):
+	"""
+	Resolves a DLL function once and sets its prototype.
+
+	The returned object is the same function object as ``getattr(lib, name)``, so code which still calls ``lib.name(...)`` shares the prototype.
+
+	:param lib: The DLL, such as ``sgp4dll.C_SGP4DLL``.
+	:type lib: lazydll.LazyDLL, ctypes.CDLL
+	:param str name: The name of the function exported by the DLL.
+	:param restype: The ctypes return type, or None for a void function.
+	:type restype: ctypes type, None
+	:param list argtypes: The ctypes types of the arguments.
+	:return:
+		**func** (*ctypes foreign function*) - The bound function, ready to be called, or a placeholder which behaves like it if the library is not loaded yet.
+	"""
+	if isinstance(lib, lazydll.LazyDLL) and not lib.loaded:
+		return lib.unbound(name, restype, argtypes, variant=False)
+	func = getattr(lib, name)
+	func.restype = restype
+	func.argtypes = argtypes
+	return func
+
+def bind_variant(lib, name, restype, argtypes):
+	"""
+	Resolves an independent copy of a DLL function with its own prototype.
+
+	This leaves the prototype used by ``lib.name`` and ``bind`` untouched. It is used to declare array arguments as raw addresses (``ctypes.c_void_p``), so that the batch wrappers can pass pointers into numpy arrays as plain ints without building a ctypes object per call.
+
+	:param lib: The DLL, such as ``sgp4dll.C_SGP4DLL``.
+	:type lib: lazydll.LazyDLL, ctypes.CDLL
+	:param str name: The name of the function exported by the DLL.
+	:param restype: The ctypes return type, or None for a void function.
+	:type restype: ctypes type, None
+	:param list argtypes: The ctypes types of the arguments.
+	:return:
+		**func** (*ctypes foreign function*) - The bound function, ready to be called, or a placeholder which behaves like it if the library is not loaded yet.
+	"""
+	if isinstance(lib, lazydll.LazyDLL) and not lib.loaded:
+		return lib.unbound(name, restype, argtypes, variant=True)
+	func = lib[name]
+	func.restype = restype
+	func.argtypes = argtypes
+	return func
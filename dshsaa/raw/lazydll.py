@@ -0,0 +1,148 @@
+#! /usr/bin/env python3
+
+"""
+lazydll.py is an internal module to the raw package which defers loading the SAA libraries until they are used.
+
+Each wrapper module creates its library handle as a LazyDLL instead of a ``ctypes.CDLL``. The module level prototype declarations (``C_TLEDLL.TleGetCount.restype = ...``) are recorded, and the functions bound with fastcall.bind and fastcall.bind_variant are placeholders. Nothing is loaded at import. The first call of any function of the library loads it with ``ctypes.CDLL``, applies every recorded prototype, and swaps the placeholders in the wrapper module for the real foreign functions, so that later calls cost exactly what they did before.
+
+A short lived tool which only converts times then only loads the time library. A long running service which would rather pay the loading cost up front calls ``dshsaa.raw.preload()``.
+"""
+import sys
+import threading
+import ctypes as c
+import dshsaa.raw.settings as settings
+import pdb
+
+class LazyDLL:
+	"""
+	Stands in for the ctypes.CDLL of one SAA library until one of its functions is called.
+
+	:param str nameSetting: The settings variable holding the file name of the library, such as 'LIB_TLE_NAME'.
+	:param str module: The name of the wrapper module, whose placeholders are replaced once the library is loaded.
+	"""
+	def __init__(self, nameSetting, module):
+		self._nameSetting = nameSetting
+		self._module = module
+		self._lib = None
+		self._prototypes = {}
+		self._unbound = []
+		self._lock = threading.Lock()
+
+	@property
+	def loaded(self):
+		"""
+		True once the library is loaded.
+		"""
+		return self._lib is not None
+
+	def load(self):
+		"""
+		Loads the library, if it is not loaded yet, and binds every recorded prototype. Raises OSError if the library cannot be found, see settings.start; the next call tries again.
+
+		:return:
+			**lib** (*ctypes.CDLL*) - The loaded library.
+		"""
+		with self._lock:
+			if self._lib is not None:
+				return self._lib
+			settings.start()
+			lib = c.CDLL(getattr(settings, self._nameSetting))
+			for (name, prototype) in self._prototypes.items():
+				func = getattr(lib, name)
+				for (attr, value) in prototype._attrs.items():
+					setattr(func, attr, value)
+				self.__dict__[name] = func
+			for unbound in self._unbound:
+				unbound._resolve(lib)
+			self._lib = lib
+			self._replace_placeholders()
+			return lib
+
+	def unbound(self, name, restype, argtypes, variant):
+		"""
+		A placeholder for a function bound with fastcall.bind or fastcall.bind_variant before the library is loaded. Used by fastcall, not intended to be called by users.
+		"""
+		unbound = _Unbound(self, name, restype, argtypes, variant)
+		self._unbound.append(unbound)
+		return unbound
+
+	def __getattr__(self, name):
+		# only called for names which are not bound yet
+		if name.startswith('_'):
+			raise AttributeError(name)
+		if self._lib is not None:
+			func = getattr(self._lib, name)
+			self.__dict__[name] = func
+			return func
+		prototype = self._prototypes.get(name)
+		if prototype is None:
+			prototype = _Prototype(self, name)
+			self._prototypes[name] = prototype
+		return prototype
+
+	def __getitem__(self, name):
+		return self.load()[name]
+
+	def _replace_placeholders(self):
+		# module level placeholders, and those kept in module level dicts, become the real functions
+		module = sys.modules.get(self._module)
+		if module is None:
+			return
+		namespace = vars(module)
+		for (key, value) in list(namespace.items()):
+			if isinstance(value, _Unbound) and value._library is self:
+				namespace[key] = value._func
+			elif isinstance(value, dict):
+				for (subkey, subvalue) in list(value.items()):
+					if isinstance(subvalue, _Unbound) and subvalue._library is self:
+						value[subkey] = subvalue._func
+
+class _Prototype:
+	# records restype/argtypes set before the library is loaded, and loads it when called
+	def __init__(self, library, name):
+		object.__setattr__(self, '_library', library)
+		object.__setattr__(self, '_name', name)
+		object.__setattr__(self, '_attrs', {})
+
+	def __setattr__(self, attr, value):
+		if self._library.loaded:
+			setattr(getattr(self._library, self._name), attr, value)
+		else:
+			self._attrs[attr] = value
+
+	def __getattr__(self, attr):
+		if attr in self._attrs and not self._library.loaded:
+			return self._attrs[attr]
+		self._library.load()
+		return getattr(getattr(self._library, self._name), attr)
+
+	def __call__(self, *args):
+		self._library.load()
+		return getattr(self._library, self._name)(*args)
+
+class _Unbound:
+	# a function from fastcall.bind or fastcall.bind_variant, bound once the library is loaded
+	def __init__(self, library, name, restype, argtypes, variant):
+		self._library = library
+		self._name = name
+		self._restype = restype
+		self._argtypes = argtypes
+		self._variant = variant
+		self._func = None
+
+	def _resolve(self, lib):
+		func = lib[self._name] if self._variant else getattr(lib, self._name)
+		func.restype = self._restype
+		func.argtypes = self._argtypes
+		self._func = func
+
+	def __getattr__(self, attr):
+		if attr.startswith('_'):
+			raise AttributeError(attr)
+		self._library.load()
+		return getattr(self._func, attr)
+
+	def __call__(self, *args):
+		if self._func is None:
+			self._library.load()
+		return self._func(*args)
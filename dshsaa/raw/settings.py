@@ -6,6 +6,7 @@ settings.py is an internal module to the raw package which addresses operating s
 import os
 import platform
 import ctypes as c
+import numpy as np
 import pdb
 
 ## Global Vars
@@ -18,6 +19,15 @@ LIB_ENV_NAME = None
 LIB_ASTRO_NAME = None
 LIB_SGP4_NAME = None
 
+# True once start() has run
+STARTED = False
+
+# Array mode (see set_array_mode())
+ARRAY_MODE = False
+
+# Per-call argument type checks in the wrappers (see set_debug())
+DEBUG = True
+
 ## Useful ctypes data objects
 double1 = c.c_double * 1
 """A ctypes array double[1]"""
@@ -61,6 +71,59 @@ In many early compiled languages, such as those the SAA DLLs were built on, stri
 This ``string_term`` variable contains the ``\\0`` part of that structure. Some functions in ``settings`` use the ``terminator=`` optional argument. It is recommended that ``terminator=settings.string_term``.
 """
 
+## Array mode
+# ctypes element types which have an exact numpy equivalent. stay_int64 is deliberately absent: memory handles must
+# remain stay_int64 objects so the isinstance checks in the wrappers keep working.
+_ARRAY_MODE_TYPES = (c.c_double, c.c_int32, c.c_int64)
+
+def set_array_mode(enabled):
+	"""
+	Turns array mode on or off for every wrapper in the raw package.
+
+	By default, the wrappers return python lists and copy input lists element by element into ctypes arrays. When array mode is on:
+
+		- ``array_to_list`` and ``array2d_to_list`` return numpy arrays which share memory with the ctypes buffers filled by the DLL, instead of building lists.
+		- ``list_to_array`` hands numpy inputs to the DLL without copying when their dtype already matches, and ``feed_list_into_array`` and ``feed_2d_list_into_array`` copy numpy inputs with a single numpy assignment.
+
+	Conversions then cost O(1) and allocate no python objects per element. Lists are still accepted as inputs in array mode.
+
+	.. code-block:: python
+
+		settings.set_array_mode(True)
+		(posEFG, velEFG) = astrodll.ECIToEFG(thetaG, numpy.array(posECI), numpy.array(velECI))
+		# posEFG and velEFG are numpy.ndarray views of the DLL output buffers
+
+	:param bool enabled: True to return numpy arrays, False to restore the default list behavior.
+	:return:
+		**previous** (*bool*) - The array mode that was in effect before this call, so it can be restored later.
+	"""
+	global ARRAY_MODE
+	previous = ARRAY_MODE
+	ARRAY_MODE = bool(enabled)
+	return previous
+
+def set_debug(enabled):
+	"""
+	Turns the per-call argument type checks in the wrappers on or off.
+
+	With debug on (the default), wrappers verify that memory handles such as satKey are ``settings.stay_int64`` before calling the DLL, and raise a TypeError otherwise. Long running services which have already validated their inputs can turn debug off to skip those checks on every call. With debug off, ctypes still converts plain integers, and still raises ctypes.ArgumentError for arguments it cannot convert.
+
+	:param bool enabled: True to check arguments on every call, False to skip the checks.
+	:return:
+		**previous** (*bool*) - The debug setting that was in effect before this call, so it can be restored later.
+	"""
+	global DEBUG
+	previous = DEBUG
+	DEBUG = bool(enabled)
+	return previous
+
+def _array_mode_compatible(ar):
+	# True if ar is a ctypes array whose innermost element type maps directly onto a numpy dtype
+	ct = type(ar)._type_
+	while hasattr(ct, '_length_'):
+		ct = ct._type_
+	return ct in _ARRAY_MODE_TYPES
+
 ## Useful ctypes conversion patterns
 def byte_to_str(byte_obj):
 	"""
@@ -140,8 +203,10 @@ def array_to_list(vector_obj):
 	:type vector_obj: ctypes.c_int[?], ctypes.c_double[?]
 
 	:return:
-		**new_list** (*int[?] or float[?]*) - A list of ints or floats from the ctypes array.
+		**new_list** (*int[?] or float[?]*) - A list of ints or floats from the ctypes array. In array mode, a numpy array sharing memory with ``vector_obj`` is returned instead.
 	"""
+	if ARRAY_MODE and _array_mode_compatible(vector_obj):
+		return np.ctypeslib.as_array(vector_obj)
 	new_list = []
 	for item in vector_obj:
 		new_list.append(item)
@@ -155,8 +220,10 @@ def array2d_to_list(ar):
 	:type ar: ctypes.c_int[?][?], ctypes.c_double[?][?]
 
 	:return:
-		**li** (*int[?][?] or float[?][?]*) - A list of ints or floats matching the input ``ar``
+		**li** (*int[?][?] or float[?][?]*) - A list of ints or floats matching the input ``ar``. In array mode, a 2D numpy array sharing memory with ``ar`` is returned instead.
 	"""
+	if ARRAY_MODE and _array_mode_compatible(ar):
+		return np.ctypeslib.as_array(ar)
 	ar_len_d1 = len(ar)
 	ar_len_d2 = len(ar[0])
 	for i in range(ar_len_d1):
@@ -180,8 +247,13 @@ def list_to_array(li, ct=c.c_double):
 	:type ct: ctypes type constructor, ctypes.c_double, ctypes.c_int
 
 	:return:
-		**ar** (*see parameter ct*) - A ctypes array representation of the input list ``li`` with each element being type-cast to ``ct``.
+		**ar** (*see parameter ct*) - A ctypes array representation of the input list ``li`` with each element being type-cast to ``ct``. In array mode, a numpy ``li`` of matching dtype is shared with the returned array rather than copied.
 	"""
+	if ARRAY_MODE and isinstance(li, np.ndarray) and ct in _ARRAY_MODE_TYPES:
+		li = np.ascontiguousarray(li, dtype=np.dtype(ct))
+		if not li.flags['WRITEABLE']:
+			li = li.copy()
+		return np.ctypeslib.as_ctypes(li)
 	art = ct * len(li)
 	ar = art()
 	for i in range(len(li)):
@@ -199,6 +271,9 @@ def feed_list_into_array(li, ar):
 	"""
 	if len(li) > len(ar):
 		raise Exception("feeding a list of greater length into a ctypes array of lesser length will result in a memory buffer overflow event")
+	if ARRAY_MODE and isinstance(li, np.ndarray) and _array_mode_compatible(ar):
+		np.ctypeslib.as_array(ar)[:len(li)] = li
+		return ar
 	for i in range(len(li)):
 		ar[i] = ar._type_(li[i])
 	return ar
@@ -216,6 +291,12 @@ def feed_2d_list_into_array(li, ar):
 	:return:
 		**ar** (*ctype[][]*) - The array that has been filled with data from ``li``.
 	"""
+	if ARRAY_MODE and isinstance(li, np.ndarray) and _array_mode_compatible(ar):
+		ar_view = np.ctypeslib.as_array(ar)
+		if li.shape != ar_view.shape:
+			raise Exception("li%s and ar%s are not the same dimension" % (list(li.shape), list(ar_view.shape)))
+		ar_view[...] = li
+		return ar
 	# first, determine the size of the list
 	li_len_d1 = len(li)
 	li_len_d2 = len(li[0])
@@ -233,6 +314,69 @@ def feed_2d_list_into_array(li, ar):
 		for j in range(ar_len_d2):
 			ar[i][j] = ar[i]._type_(li[i][j])
 	return ar
+
+def verify_out_array(ar, shape, dtype=np.float64):
+	"""
+	Checks that a caller-provided numpy array can safely be written into by a DLL. The DLLs write through raw pointers, so an array of the wrong shape, type, or memory layout would silently corrupt memory instead of raising an error.
+
+	:param numpy.ndarray ar: The array the caller wants results written into.
+	:param tuple shape: The exact shape ``ar`` must have.
+	:param dtype: The numpy data type ``ar`` must have (defaults to numpy.float64, which matches ctypes.c_double).
+	:type dtype: numpy.dtype, optional
+	:return:
+		**ar** (*numpy.ndarray*) - The same array, returned so the call can be used inline.
+	"""
+	if not isinstance(ar, np.ndarray):
+		raise TypeError("output array is type %s, should be type %s" % (type(ar), np.ndarray))
+	if ar.shape != tuple(shape):
+		raise Exception("output array has shape %s, expecting %s" % (ar.shape, tuple(shape)))
+	if ar.dtype != np.dtype(dtype):
+		raise Exception("output array has dtype %s, expecting %s" % (ar.dtype, np.dtype(dtype)))
+	if not ar.flags['C_CONTIGUOUS'] or not ar.flags['WRITEABLE']:
+		raise Exception("output array must be C contiguous and writeable")
+	return ar
+
+def out_buffer(out, ar_type):
+	"""
+	Returns a ctypes array that a DLL can write into and which stores its results in the caller's ``out`` buffer. This is how the ``out=`` parameters of the wrappers reuse memory across calls instead of allocating new ctypes arrays every time.
+
+	:param out: The caller's buffer. Either an instance of ``ar_type``, which is returned as is, or a writeable, C contiguous numpy array with the same dtype and length as ``ar_type``, which is wrapped without copying.
+	:type out: ctypes array, numpy.ndarray
+	:param ar_type: The ctypes array type the DLL expects, such as ``settings.double3``.
+	:type ar_type: ctypes array type
+	:return:
+		**ar** (*ar_type*) - A ctypes array backed by the memory of ``out``.
+	"""
+	if isinstance(out, ar_type):
+		return out
+	if isinstance(out, np.ndarray):
+		verify_out_array(out, (ar_type._length_,), np.dtype(ar_type._type_))
+		return ar_type.from_buffer(out)
+	raise TypeError("out buffer is type %s, should be type %s or numpy.ndarray" % (type(out), ar_type))
+
+def int64_values(keys):
+	"""
+	Converts a sequence of memory handles (such as satKeys) into a list of plain python ints. Batch wrappers hand these ints straight to the DLL so that no ``settings.stay_int64`` has to be built per call.
+
+	:param keys: The handles to convert. ``settings.stay_int64`` objects and plain integers are both accepted.
+	:type keys: settings.stay_int64[?], int[?], numpy.ndarray
+	:return:
+		**values** (*int[?]*) - The handles as python ints, in the same order.
+	"""
+	return [int64_value(key) for key in keys]
+
+def int64_value(key):
+	"""
+	Converts one memory handle (such as a satKey) into a plain python int, see int64_values.
+
+	:param key: The handle to convert.
+	:type key: settings.stay_int64, int
+	:return:
+		**value** (*int*) - The handle as a python int.
+	"""
+	if isinstance(key, c.c_int64):
+		return key.value
+	return int(key)
 	
 
 ## 
@@ -255,22 +399,30 @@ def enforce_limit(byte_obj, length, terminator=True):
 	return byte_obj
 
 ## Start
-# This set of functions sets important global variables based on operating system and environment conditions
+# This set of functions sets important global variables based on operating system and environment conditions.
+# It runs when the first library is loaded (see lazydll), not at import.
+
+def start():
+	"""
+	Sets the library file names (LIB_*_NAME) for the operating system. Called before the first library is loaded, calling it again does nothing once it has succeeded.
 
-def __start():
+	Raises OSError if the libraries cannot be found (on Linux, when LD_LIBRARY_PATH is not set). Since this runs on the first DLL call rather than at import, the error is raised by that call, in whatever thread or process makes it.
+	"""
+	global STARTED
+	if STARTED:
+		return 1
 	# Determine the OS
 	current_os = platform.system()
 
 	# based on OS, run start_<os>()
 	if current_os == 'Linux':
 		__start_linux()
-		return 1
 	elif current_os == 'Windows':
 		__start_windows()
-		return 1
 	elif current_os == 'Darwin':
 		__start_darwin()
-		return 1
+	STARTED = True
+	return 1
 	
 def __start_linux():
 	# address global variables
@@ -294,8 +446,7 @@ def __start_linux():
 	# Note: until we make an installable package, there is no other 
 	# way to get the so files
 	if 'LD_LIBRARY_PATH' not in os.environ:
-		print("Set LD_LIBRARY_PATH before running")
-		exit(0) #standard exit
+		raise OSError("Set LD_LIBRARY_PATH before running")
 
 def __start_windows():
 	# address global variables
@@ -316,5 +467,3 @@ def __start_windows():
 
 def __start_darwin():
 	raise Exception('Code not started for MacOS/Darwin')
-
-__start()
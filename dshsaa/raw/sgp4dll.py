@@ -1,9 +1,10 @@
 #! /usr/bin/env python3
-from dshsaa.raw import settings, exceptions
+from dshsaa.raw import settings, exceptions, fastcall, events, lazydll
 import ctypes as c
+import numpy as np
 import pdb
 
-C_SGP4DLL = c.CDLL(settings.LIB_SGP4_NAME)
+C_SGP4DLL = lazydll.LazyDLL('LIB_SGP4_NAME', __name__)
 
 ##Sgp4GetInfo 
 C_SGP4DLL.Sgp4GetInfo.argtypes = [c.c_char_p]
@@ -37,8 +38,12 @@ def Sgp4GetLicFilePath():
 	return licFilePath
 
 ##Sgp4GetPropOut
-C_SGP4DLL.Sgp4GetPropOut.restype = c.c_int
-# argument types defined within the function
+# The length of destArr depends on xf_Sgp4Out, so one prototype is bound per xf_Sgp4Out value.
+_Sgp4GetPropOut_types = { 1:settings.double1, 2:settings.double3, 3:settings.double6, 4:settings.double6 }
+_Sgp4GetPropOut = {}
+for _xf_Sgp4Out, _destArr_type in _Sgp4GetPropOut_types.items():
+	_Sgp4GetPropOut[_xf_Sgp4Out] = fastcall.bind_variant(C_SGP4DLL, 'Sgp4GetPropOut', c.c_int, [settings.stay_int64, c.c_int, _destArr_type])
+
 def Sgp4GetPropOut(satKey, xf_Sgp4Out):
 	"""
 	Retrieves propagator's precomputed results. This function can be used to obtain results from a propagation which are not made available through calls to the propagation functions themselves. 
@@ -81,7 +86,7 @@ def Sgp4GetPropOut(satKey, xf_Sgp4Out):
 	"""
 	
 	# test satKey
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	
 	# test xf_Sgp4Out
@@ -89,14 +94,10 @@ def Sgp4GetPropOut(satKey, xf_Sgp4Out):
 		raise Exception("xf_Sgp4Out is %i, should be 1, 2, 3, or 4. See table in docs." % (xf_Sgp4Out))
 	
 	# determine length of destArr by means of xf_Sgp4Out and initialize a double array of that length
-	xf_Sgp4Out_type_dict = { 1:settings.double1, 2:settings.double3, 3:settings.double6, 4:settings.double6 }
-	destArr = xf_Sgp4Out_type_dict[xf_Sgp4Out]()
-	
-	# set the argtype for Sgp4GetPropOut
-	C_SGP4DLL.Sgp4GetPropOut.argtypes = [settings.stay_int64, c.c_int, xf_Sgp4Out_type_dict[xf_Sgp4Out]]
+	destArr = _Sgp4GetPropOut_types[xf_Sgp4Out]()
 	
-	# call Sgp4GetPropOut
-	retcode = C_SGP4DLL.Sgp4GetPropOut(satKey, xf_Sgp4Out, destArr)
+	# call the Sgp4GetPropOut prototype matching that length
+	retcode = _Sgp4GetPropOut[xf_Sgp4Out](satKey, xf_Sgp4Out, destArr)
 	
 	# convert destArr to a list
 	destArr = settings.array_to_list(destArr)
@@ -138,9 +139,10 @@ def Sgp4InitSat(satKey):
 	:return:
 		**retcode** (*int*) - 0 if the satellite is successfully initialized and added to Sgp4Prop.dll's set of satellites, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	retcode = C_SGP4DLL.Sgp4InitSat(satKey)
+	events.notify('update', satKey, source='sgp4')
 	return retcode
 
 ##Sgp4PosVelToKep
@@ -184,13 +186,12 @@ def Sgp4PosVelToKep(yr, day, pos, vel):
 	return (retcode, posNew, velNew, sgp4MeanKep)
 
 ##Sgp4PropAll
-C_SGP4DLL.Sgp4PropAll.restype = c.c_int
-C_SGP4DLL.Sgp4PropAll.argtypes = [settings.stay_int64,
-								  c.c_int32,
-								  c.c_double,
-								  settings.double64]
+_Sgp4PropAll = fastcall.bind(C_SGP4DLL, 'Sgp4PropAll', c.c_int, [settings.stay_int64,
+																  c.c_int32,
+																  c.c_double,
+																  settings.double64])
 
-def Sgp4PropAll(satKey, timeType, timeIn):
+def Sgp4PropAll(satKey, timeType, timeIn, out=None):
 	"""
 	Propagates a satellite, represented by the satKey, to the time expressed in either minutes since epoch or days since 1950, UTC. All propagation data is returned by this function. 
 
@@ -199,29 +200,33 @@ def Sgp4PropAll(satKey, timeType, timeIn):
 	:param settings.stay_int64 satKey: The unique key of the satellite to propagate.
 	:param int timeType: The propagation time type: 0 = minutes since epoch, 1 = days since 1950, UTC
 	:param float timeIn: The time to propagate to, expressed in either minutes since epoch or days since 1950, UTC.
+	:param out: A buffer to fill in place and return as **xa_Sgp4Out**, so that repeated calls reuse the same memory. Either a ``settings.double64`` or a writeable numpy float64 array of length 64.
+	:type out: settings.double64, numpy.ndarray, optional
 	:return:
 		- **retcode** (*int*) - 0 if the propagation is successful, non-0 if there is an error.
-		- **xa_Sgp4Out** (*float[64]*) - The array that stores all Sgp4 propagation data, see XA_SGP4OUT_? for array arrangement (double[64]) 
+		- **xa_Sgp4Out** (*float[64]*) - The array that stores all Sgp4 propagation data, see XA_SGP4OUT_? for array arrangement (double[64]). This is ``out`` itself when ``out`` is given.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
-	timeType = c.c_int32(timeType)
-	timeIn = c.c_double(timeIn)
-	xa_Sgp4Out = settings.double64()
-	retcode = C_SGP4DLL.Sgp4PropAll(satKey, timeType, timeIn, xa_Sgp4Out)
+	if out is None:
+		xa_Sgp4Out = settings.double64()
+	else:
+		xa_Sgp4Out = settings.out_buffer(out, settings.double64)
+	retcode = _Sgp4PropAll(satKey, timeType, timeIn, xa_Sgp4Out)
+	if out is not None:
+		return (retcode, out)
 	xa_Sgp4Out = settings.array_to_list(xa_Sgp4Out)
 	return (retcode, xa_Sgp4Out)
 
 ##Sgp4PropDs50UTC
-C_SGP4DLL.Sgp4PropDs50UTC.restype = c.c_int
-C_SGP4DLL.Sgp4PropDs50UTC.argtypes = [settings.stay_int64,
-									  c.c_double,
-									  c.POINTER(c.c_double),
-									  settings.double3,
-									  settings.double3,
-									  settings.double3]
-
-def Sgp4PropDs50UTC(satKey, ds50UTC):
+_Sgp4PropDs50UTC = fastcall.bind(C_SGP4DLL, 'Sgp4PropDs50UTC', c.c_int, [settings.stay_int64,
+																		  c.c_double,
+																		  c.POINTER(c.c_double),
+																		  settings.double3,
+																		  settings.double3,
+																		  settings.double3])
+
+def Sgp4PropDs50UTC(satKey, ds50UTC, out=None):
 	"""
 	Propagates a satellite, represented by the satKey, to the time expressed in days since 1950, UTC. The resulting data about the satellite is placed in the various reference parameters.
 	
@@ -238,6 +243,8 @@ def Sgp4PropDs50UTC(satKey, ds50UTC):
 
 	:param settings.stay_int64 satKey: The unique key of the satellite to propagate.
 	:param float ds50UTC: The time to propagate to, expressed in days since 1950, UTC.
+	:param out: Three buffers (pos, vel, llh) to fill in place and return, so that repeated calls reuse the same memory. Each is either a ``settings.double3`` or a writeable numpy float64 array of length 3.
+	:type out: tuple, optional
 	:return:
 		- **retcode** (*int*) - 0 if the propagation is successful, non-0 if there is an error.
 		- **mse** (*float*) - Resulting time in minutes since the satellite's epoch time.
@@ -245,28 +252,58 @@ def Sgp4PropDs50UTC(satKey, ds50UTC):
 		- **vel** (*float[3]*) - Resulting ECI velocity vector (km/s) in True Equator and Mean Equinox of Epoch. (double[3])
 		- **llh** (*float[3]*) - Resulting geodetic latitude (deg), longitude(deg), and height (km). (double[3])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
-	ds50UTC = c.c_double(ds50UTC)
 	mse = c.c_double()
-	pos = settings.double3()
-	vel = settings.double3()
-	llh = settings.double3()
-	retcode = C_SGP4DLL.Sgp4PropDs50UTC(satKey, ds50UTC, c.byref(mse), pos, vel, llh)
+	if out is None:
+		pos = settings.double3()
+		vel = settings.double3()
+		llh = settings.double3()
+	else:
+		pos = settings.out_buffer(out[0], settings.double3)
+		vel = settings.out_buffer(out[1], settings.double3)
+		llh = settings.out_buffer(out[2], settings.double3)
+	retcode = _Sgp4PropDs50UTC(satKey, ds50UTC, c.byref(mse), pos, vel, llh)
 	mse = mse.value
+	if out is not None:
+		return (retcode, mse, out[0], out[1], out[2])
 	pos = settings.array_to_list(pos)
 	vel = settings.array_to_list(vel)
 	llh = settings.array_to_list(llh)
 	return (retcode, mse, pos, vel, llh)
-	
+
+##Sgp4PropDs50UTCBatch
+# Second prototype of Sgp4PropDs50UTC that takes raw addresses for the output arguments, so that each sample can be
+# written straight into a numpy array.
+_Sgp4PropDs50UTC_addr = fastcall.bind_variant(C_SGP4DLL, 'Sgp4PropDs50UTC', c.c_int, [c.c_int64, c.c_double] + [c.c_void_p] * 4)
+
+def Sgp4PropDs50UTCBatch(satKeys, ds50UTC, out=None):
+	"""
+	Propagates many satellites to many times expressed in days since 1950, UTC. This is the batch form of Sgp4PropDs50UTC: the outputs are numpy arrays covering every (satellite, time) sample, filled in a single call so the python overhead is paid once per batch instead of once per sample.
+
+	Every satellite must already be initialized with Sgp4InitSat. A failed sample does not stop the batch; check its entry in **retcode**.
+
+	:param satKeys: The unique keys of the satellites to propagate (nsat entries).
+	:type satKeys: settings.stay_int64[nsat], int[nsat]
+	:param ds50UTC: The times to propagate to, expressed in days since 1950, UTC. A 1D array of ntime values is shared by every satellite, a 2D array of shape (nsat, ntime) gives each satellite its own times.
+	:type ds50UTC: numpy.ndarray
+	:param out: Preallocated (retcode, mse, pos, vel, llh) arrays to fill instead of allocating new ones. Shapes and dtypes must match the returned arrays below exactly.
+	:type out: tuple, optional
+	:return:
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (nsat, ntime), 0 where the propagation is successful, non-0 where there is an error.
+		- **mse** (*numpy.ndarray*) - float64 array of shape (nsat, ntime), the resulting times in minutes since each satellite's epoch time.
+		- **pos** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI position vectors (km) in True Equator and Mean Equinox of Epoch.
+		- **vel** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI velocity vectors (km/s) in True Equator and Mean Equinox of Epoch.
+		- **llh** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+	"""
+	return _prop_batch(_Sgp4PropDs50UTC_addr, satKeys, ds50UTC, out)
 
 ##Sgp4PropDs50UtcLLH
-C_SGP4DLL.Sgp4PropDs50UtcLLH.restype = c.c_int
-C_SGP4DLL.Sgp4PropDs50UtcLLH.argtypes = [settings.stay_int64,
-										 c.c_double,
-										 settings.double3]
+_Sgp4PropDs50UtcLLH = fastcall.bind(C_SGP4DLL, 'Sgp4PropDs50UtcLLH', c.c_int, [settings.stay_int64,
+																				c.c_double,
+																				settings.double3])
 
-def Sgp4PropDs50UtcLLH(satKey, ds50UTC):
+def Sgp4PropDs50UtcLLH(satKey, ds50UTC, out=None):
 	"""
 	Propagates a satellite, represented by the satKey, to the time expressed in days since 1950, UTC. Only the geodetic information is returned by this function. 
 	
@@ -285,25 +322,30 @@ def Sgp4PropDs50UtcLLH(satKey, ds50UTC):
 
 	:param settings.stay_int64 satKey: The unique key of the satellite to propagate.
 	:param float ds50UTC: The time to propagate to, expressed in days since 1950, UTC.
+	:param out: A buffer to fill in place and return as **llh**, so that repeated calls reuse the same memory. Either a ``settings.double3`` or a writeable numpy float64 array of length 3.
+	:type out: settings.double3, numpy.ndarray, optional
 	:return:
 		- **retcode** (*int*) - 0 if the propagation is successful, non-0 if there is an error.
 		- **llh** (*float[3]*) - Resulting geodetic latitude (deg), longitude(deg), and height (km). (double[3])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
-	ds50UTC = c.c_double(ds50UTC)
-	llh = settings.double3()
-	retcode = C_SGP4DLL.Sgp4PropDs50UtcLLH(satKey, ds50UTC, llh)
+	if out is None:
+		llh = settings.double3()
+	else:
+		llh = settings.out_buffer(out, settings.double3)
+	retcode = _Sgp4PropDs50UtcLLH(satKey, ds50UTC, llh)
+	if out is not None:
+		return (retcode, out)
 	llh = settings.array_to_list(llh)
 	return (retcode, llh)
 
 ##Sgp4PropDs50UtcPos
-C_SGP4DLL.Sgp4PropDs50UtcPos.restype = c.c_int
-C_SGP4DLL.Sgp4PropDs50UtcPos.argtypes = [settings.stay_int64,
-										 c.c_double,
-										 settings.double3]
+_Sgp4PropDs50UtcPos = fastcall.bind(C_SGP4DLL, 'Sgp4PropDs50UtcPos', c.c_int, [settings.stay_int64,
+																				c.c_double,
+																				settings.double3])
 
-def Sgp4PropDs50UtcPos(satKey, ds50UTC):
+def Sgp4PropDs50UtcPos(satKey, ds50UTC, out=None):
 	"""
 	Propagates a satellite, represented by the satKey, to the time expressed in days since 1950, UTC. Only the ECI position vector is returned by this function. 
 	
@@ -322,30 +364,35 @@ def Sgp4PropDs50UtcPos(satKey, ds50UTC):
 
 	:param settings.stay_int64 satKey: 
 	:param float ds50UTC: The unique key of the satellite to propagate.
+	:param out: A buffer to fill in place and return as **pos**, so that repeated calls reuse the same memory. Either a ``settings.double3`` or a writeable numpy float64 array of length 3.
+	:type out: settings.double3, numpy.ndarray, optional
 	:return:
 		- **retcode** (*int*) - 0 if the propagation is successful, non-0 if there is an error.
 		- **ds50UTC** (*float*) - The time to propagate to, expressed in days since 1950, UTC.
 		- **pos** (*float[3]*) - Resulting ECI position vector (km) in True Equator and Mean Equinox of Epoch. (double[3]) 
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
-	ds50UTC = c.c_double(ds50UTC)
-	pos = settings.double3()
-	retcode = C_SGP4DLL.Sgp4PropDs50UtcPos(satKey, ds50UTC, pos)
+	if out is None:
+		pos = settings.double3()
+	else:
+		pos = settings.out_buffer(out, settings.double3)
+	retcode = _Sgp4PropDs50UtcPos(satKey, ds50UTC, pos)
+	if out is not None:
+		return (retcode, out)
 	pos = settings.array_to_list(pos)
 	return (retcode, pos)
 	
 	
 ##Sgp4PropMse 
-C_SGP4DLL.Sgp4PropMse.restype = c.c_int
-C_SGP4DLL.Sgp4PropMse.argtypes = [settings.stay_int64,
-								  c.c_double,
-								  c.POINTER(c.c_double),
-								  settings.double3,
-								  settings.double3,
-								  settings.double3]
-
-def Sgp4PropMse(satKey, mse):
+_Sgp4PropMse = fastcall.bind(C_SGP4DLL, 'Sgp4PropMse', c.c_int, [settings.stay_int64,
+																  c.c_double,
+																  c.POINTER(c.c_double),
+																  settings.double3,
+																  settings.double3,
+																  settings.double3])
+
+def Sgp4PropMse(satKey, mse, out=None):
 	"""
 	Propagates a satellite, represented by the satKey, to the time expressed in minutes since the satellite's epoch time. The resulting data about the satellite is placed in the various reference parameters. 
 	
@@ -364,27 +411,203 @@ def Sgp4PropMse(satKey, mse):
 	
 	:param settings.stay_int64 satKey: The satellite's unique key.
 	:param float mse: The time to propagate to, specified in minutes since the satellite's epoch time.
+	:param out: Three buffers (pos, vel, llh) to fill in place and return, so that repeated calls reuse the same memory. Each is either a ``settings.double3`` or a writeable numpy float64 array of length 3.
+	:type out: tuple, optional
 	:return:
 		- **retcode** (*int*) - 0 if the propagation is successful, non-0 if there is an error.
 		- **ds50UTC** (*float*) - Resulting time in days since 1950, UTC.
 		- **pos** (*float[3]*) - Resulting ECI position vector (km) in True Equator and Mean Equinox of Epoch. (double[3])
 		- **vel** (*float[3]*) - Resulting ECI velocity vector (km/s) in True Equator and Mean Equinox of Epoch. (double[3])
 		- **llh** (*float[3]*) - Resulting geodetic latitude (deg), longitude(deg), and height (km). (double[3])
+	
+	Reusing buffers in a propagation loop:
+
+	.. code-block:: python
+
+		out = (settings.double3(), settings.double3(), settings.double3())
+		for mse in range(0, 14400):
+			(retcode, ds50UTC, pos, vel, llh) = sgp4dll.Sgp4PropMse(satKey, mse, out=out)
+			# pos, vel and llh are the buffers in out, overwritten by the next call
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
-	mse = c.c_double(mse)
 	ds50UTC = c.c_double(0)
-	pos = settings.double3()
-	vel = settings.double3()
-	llh = settings.double3()
-	retcode = C_SGP4DLL.Sgp4PropMse(satKey, mse, c.byref(ds50UTC), pos, vel, llh)
+	if out is None:
+		pos = settings.double3()
+		vel = settings.double3()
+		llh = settings.double3()
+	else:
+		pos = settings.out_buffer(out[0], settings.double3)
+		vel = settings.out_buffer(out[1], settings.double3)
+		llh = settings.out_buffer(out[2], settings.double3)
+	retcode = _Sgp4PropMse(satKey, mse, c.byref(ds50UTC), pos, vel, llh)
 	ds50UTC = ds50UTC.value
+	if out is not None:
+		return (retcode, ds50UTC, out[0], out[1], out[2])
 	pos = settings.array_to_list(pos)
 	vel = settings.array_to_list(vel)
 	llh = settings.array_to_list(llh)
 	return (retcode, ds50UTC, pos, vel, llh)
+
+##Sgp4PropMseBatch
+# Second prototype of Sgp4PropMse that takes raw addresses for the output arguments, see Sgp4PropDs50UTCBatch
+_Sgp4PropMse_addr = fastcall.bind_variant(C_SGP4DLL, 'Sgp4PropMse', c.c_int, [c.c_int64, c.c_double] + [c.c_void_p] * 4)
+
+def Sgp4PropMseBatch(satKeys, mse, out=None):
+	"""
+	Propagates many satellites to many times expressed in minutes since each satellite's epoch time. This is the batch form of Sgp4PropMse: the outputs are numpy arrays covering every (satellite, time) sample, filled in a single call so the python overhead is paid once per batch instead of once per sample.
+
+	Every satellite must already be initialized with Sgp4InitSat. A failed sample does not stop the batch; check its entry in **retcode**.
+
+	Example, propagating a catalog over one day at one minute steps:
+
+	.. code-block:: python
+
+		mse = numpy.arange(1440, dtype=numpy.float64)
+		(retcode, ds50UTC, pos, vel, llh) = sgp4dll.Sgp4PropMseBatch(satKeys, mse)
+		ok = (retcode == 0)
+
+	:param satKeys: The unique keys of the satellites to propagate (nsat entries).
+	:type satKeys: settings.stay_int64[nsat], int[nsat]
+	:param mse: The times to propagate to, in minutes since each satellite's epoch time. A 1D array of ntime values is shared by every satellite, a 2D array of shape (nsat, ntime) gives each satellite its own times.
+	:type mse: numpy.ndarray
+	:param out: Preallocated (retcode, ds50UTC, pos, vel, llh) arrays to fill instead of allocating new ones. Shapes and dtypes must match the returned arrays below exactly.
+	:type out: tuple, optional
+	:return:
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (nsat, ntime), 0 where the propagation is successful, non-0 where there is an error.
+		- **ds50UTC** (*numpy.ndarray*) - float64 array of shape (nsat, ntime), the resulting times in days since 1950, UTC.
+		- **pos** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI position vectors (km) in True Equator and Mean Equinox of Epoch.
+		- **vel** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting ECI velocity vectors (km/s) in True Equator and Mean Equinox of Epoch.
+		- **llh** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+	"""
+	return _prop_batch(_Sgp4PropMse_addr, satKeys, mse, out)
+
+def _prop_batch(prop_addr, satKeys, times, out):
+	# shared body of Sgp4PropDs50UTCBatch and Sgp4PropMseBatch, prop_addr is one of the _*_addr prototypes
+	satKeys = settings.int64_values(satKeys)
+	nsat = len(satKeys)
+	times = np.asarray(times, dtype=np.float64)
+	if times.ndim == 1:
+		times = np.broadcast_to(times, (nsat, times.shape[0]))
+	elif times.ndim != 2 or times.shape[0] != nsat:
+		raise Exception("times has shape %s, expecting (ntime,) or (%i, ntime)" % (times.shape, nsat))
+	ntime = times.shape[1]
+	
+	# allocate or verify the output arrays
+	if out is None:
+		retcode = np.empty((nsat, ntime), dtype=np.int32)
+		timeOut = np.empty((nsat, ntime), dtype=np.float64)
+		pos = np.empty((nsat, ntime, 3), dtype=np.float64)
+		vel = np.empty((nsat, ntime, 3), dtype=np.float64)
+		llh = np.empty((nsat, ntime, 3), dtype=np.float64)
+	else:
+		(retcode, timeOut, pos, vel, llh) = out
+		settings.verify_out_array(retcode, (nsat, ntime), np.int32)
+		settings.verify_out_array(timeOut, (nsat, ntime))
+		settings.verify_out_array(pos, (nsat, ntime, 3))
+		settings.verify_out_array(vel, (nsat, ntime, 3))
+		settings.verify_out_array(llh, (nsat, ntime, 3))
 	
+	# the DLL writes each sample directly into the arrays, addressed as base + byte offset of the sample
+	timeOut_addr = timeOut.ctypes.data
+	pos_addr = pos.ctypes.data
+	vel_addr = vel.ctypes.data
+	llh_addr = llh.ctypes.data
+	for i in range(nsat):
+		satKey = satKeys[i]
+		k = i * ntime
+		row = []
+		for t in times[i].tolist():
+			row.append(prop_addr(satKey, t, timeOut_addr + 8 * k, pos_addr + 24 * k, vel_addr + 24 * k, llh_addr + 24 * k))
+			k += 1
+		retcode[i] = row
+	return (retcode, timeOut, pos, vel, llh)
+	
+##Sgp4PropMseStream
+def Sgp4PropMseStream(satKey, startMse, stopMse, stepMse, chunkSize=10000, reuse=False):
+	"""
+	Generates the ephemeris of a satellite over a span of minutes since its epoch time, in fixed-size chunks. This is a generator: each chunk is propagated with Sgp4PropMseBatch only when the consumer asks for it, so memory use is bounded by **chunkSize** no matter how long the span is.
+
+	The samples are at ``startMse + i * stepMse`` for every i which does not pass **stopMse**. Every chunk holds **chunkSize** samples except possibly the last one.
+
+	Example, writing two weeks of one second ephemeris to a file:
+
+	.. code-block:: python
+
+		for (mse, retcode, ds50UTC, pos, vel, llh) in sgp4dll.Sgp4PropMseStream(satKey, 0, 20160, 1/60):
+			numpy.column_stack((ds50UTC, pos, vel)).tofile(f)
+
+	:param settings.stay_int64 satKey: The satellite's unique key. The satellite must already be initialized with Sgp4InitSat.
+	:param float startMse: The first time, in minutes since the satellite's epoch time.
+	:param float stopMse: The last time, in minutes since the satellite's epoch time.
+	:param float stepMse: The step between samples, in minutes. Must be positive.
+	:param int chunkSize: The number of samples per chunk.
+	:param bool reuse: If True, every chunk is written into the same arrays, which are overwritten by the next chunk. This keeps memory fixed but the consumer must copy anything it wants to keep. If False (the default), each chunk gets new arrays.
+	:return:
+		Yields, per chunk:
+
+		- **mse** (*numpy.ndarray*) - float64 array of shape (m,), the requested times in minutes since the satellite's epoch time.
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (m,), 0 where the propagation is successful, non-0 where there is an error.
+		- **ds50UTC** (*numpy.ndarray*) - float64 array of shape (m,), the resulting times in days since 1950, UTC.
+		- **pos** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting ECI position vectors (km) in True Equator and Mean Equinox of Epoch.
+		- **vel** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting ECI velocity vectors (km/s) in True Equator and Mean Equinox of Epoch.
+		- **llh** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+	"""
+	return _prop_stream(_Sgp4PropMse_addr, satKey, startMse, stopMse, stepMse, chunkSize, reuse)
+
+##Sgp4PropDs50UTCStream
+def Sgp4PropDs50UTCStream(satKey, startDs50UTC, stopDs50UTC, stepDays, chunkSize=10000, reuse=False):
+	"""
+	Generates the ephemeris of a satellite over a span of days since 1950, UTC, in fixed-size chunks. This is the Sgp4PropDs50UTCBatch counterpart of Sgp4PropMseStream, see there for how the chunks are produced.
+
+	:param settings.stay_int64 satKey: The satellite's unique key. The satellite must already be initialized with Sgp4InitSat.
+	:param float startDs50UTC: The first time, in days since 1950, UTC.
+	:param float stopDs50UTC: The last time, in days since 1950, UTC.
+	:param float stepDays: The step between samples, in days. Must be positive.
+	:param int chunkSize: The number of samples per chunk.
+	:param bool reuse: If True, every chunk is written into the same arrays, which are overwritten by the next chunk. If False (the default), each chunk gets new arrays.
+	:return:
+		Yields, per chunk:
+
+		- **ds50UTC** (*numpy.ndarray*) - float64 array of shape (m,), the requested times in days since 1950, UTC.
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (m,), 0 where the propagation is successful, non-0 where there is an error.
+		- **mse** (*numpy.ndarray*) - float64 array of shape (m,), the resulting times in minutes since the satellite's epoch time.
+		- **pos** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting ECI position vectors (km) in True Equator and Mean Equinox of Epoch.
+		- **vel** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting ECI velocity vectors (km/s) in True Equator and Mean Equinox of Epoch.
+		- **llh** (*numpy.ndarray*) - float64 array of shape (m, 3), the resulting geodetic latitude (deg), longitude (deg), and height (km).
+	"""
+	return _prop_stream(_Sgp4PropDs50UTC_addr, satKey, startDs50UTC, stopDs50UTC, stepDays, chunkSize, reuse)
+
+def _prop_stream(prop_addr, satKey, start, stop, step, chunkSize, reuse):
+	# shared body of Sgp4PropMseStream and Sgp4PropDs50UTCStream, checks the arguments before the generator starts
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
+		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
+	if not step > 0:
+		raise Exception("step must be positive, got %s" % (step))
+	if int(chunkSize) < 1:
+		raise Exception("chunkSize must be at least 1, got %s" % (chunkSize))
+	# small tolerance so that a stop which is a whole number of steps away is included despite rounding
+	nsample = max(0, int(np.floor((stop - start) / step + 1e-9)) + 1)
+	return _prop_stream_chunks(prop_addr, [satKey], start, step, nsample, int(chunkSize), reuse)
+
+def _prop_stream_chunks(prop_addr, satKeys, start, step, nsample, chunkSize, reuse):
+	def new_buffers():
+		return (np.empty((1, chunkSize), dtype=np.int32),
+				np.empty((1, chunkSize), dtype=np.float64),
+				np.empty((1, chunkSize, 3), dtype=np.float64),
+				np.empty((1, chunkSize, 3), dtype=np.float64),
+				np.empty((1, chunkSize, 3), dtype=np.float64))
+	buffers = new_buffers()
+	for first in range(0, nsample, chunkSize):
+		m = min(chunkSize, nsample - first)
+		# times from the sample index, so the step error does not accumulate over long spans
+		times = start + step * np.arange(first, first + m, dtype=np.float64)
+		if not reuse and first > 0:
+			buffers = new_buffers()
+		out = tuple(buf[:, :m] for buf in buffers)
+		_prop_batch(prop_addr, satKeys, times, out)
+		yield (times, out[0][0], out[1][0], out[2][0], out[3][0], out[4][0])
+
 ##Sgp4ReepochTLE
 C_SGP4DLL.Sgp4ReepochTLE.restype = c.c_int
 C_SGP4DLL.Sgp4ReepochTLE.argtypes = [settings.stay_int64,
@@ -403,12 +626,13 @@ def Sgp4ReepochTLE(satKey, reepochDs50UTC):
 		- **line1Out** (*str*) - A string to hold the first line of the reepoched TLE. (byte[512])
 		- **line2Out** (*str*) - A string to hold the second line of the reepoched TLE. (byte[512])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	reepochDs50UTC = c.c_double(reepochDs50UTC)
 	line1Out = c.c_char_p(bytes(512))
 	line2Out = c.c_char_p(bytes(512))
 	retcode = C_SGP4DLL.Sgp4ReepochTLE(satKey, reepochDs50UTC, line1Out, line2Out)
+	events.notify('update', satKey, source='sgp4')
 	line1Out = settings.byte_to_str(line1Out)
 	line2Out = settings.byte_to_str(line2Out)
 	return (retcode, line1Out, line2Out)
@@ -427,6 +651,7 @@ def Sgp4RemoveAllSats():
 		**retcode** (*int*) - 0 if all satellites are removed successfully from memory, non-0 if there is an error.
 	"""
 	retcode = C_SGP4DLL.Sgp4RemoveAllSats()
+	events.notify('remove_all', source='sgp4')
 	return retcode
 
 ##Sgp4RemoveSat
@@ -445,9 +670,10 @@ def Sgp4RemoveSat(satKey):
 	:return:
 		**retcode** (*int*) - 0 if the satellite is removed successfully, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	retcode = C_SGP4DLL.Sgp4RemoveSat(satKey)
+	events.notify('remove', satKey, source='sgp4')
 	return retcode
 
 ##Sgp4SetLicFilePath
@@ -1,10 +1,13 @@
 #! /usr/bin/env python3
 
 import dshsaa.raw.settings as settings
+import dshsaa.raw.lazydll as lazydll
+import dshsaa.raw.fastcall as fastcall
 import ctypes as c
+import numpy as np
 import pdb
 
-C_TIMEDLL = c.CDLL(settings.LIB_TIME_NAME)
+C_TIMEDLL = lazydll.LazyDLL('LIB_TIME_NAME', __name__)
 
 # The pattern for the rest of this file will be:
 # 1. Set parameter types
@@ -125,8 +128,7 @@ def Set6P(startFrEpoch, stopFrEpoch, startTime, stopTime, stepSize):
 	C_TIMEDLL.Set6P(startFrEpoch, stopFrEpoch, startTime, stopTime, stepSize)
 
 ## TAIToUT1
-C_TIMEDLL.TAIToUT1.restype = c.c_double
-C_TIMEDLL.TAIToUT1.argtypes = [c.c_double]
+_TAIToUT1 = fastcall.bind(C_TIMEDLL, 'TAIToUT1', c.c_double, [c.c_double])
 def TAIToUT1(ds50TAI):
 	"""
 	Converts a time in ds50TAI to a time in ds50UT1 using timing constants records in memory. If no timing constants records were loaded, ds50TAI and ds50UT1 are the same. 
@@ -135,12 +137,31 @@ def TAIToUT1(ds50TAI):
 	:return:
 		**ds50UT1** (*float*) - The number of days since 1950, UT1. Partial days will be represented as decimal days.
 	"""
-	ds50UT1 = C_TIMEDLL.TAIToUT1(ds50TAI)
+	ds50UT1 = _TAIToUT1(ds50TAI)
 	return ds50UT1
 
+
+## TAIToUT1Array
+def TAIToUT1Array(ds50TAI, table=None, out=None):
+	"""
+	Array form of TAIToUT1: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of TAIToUT1. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50TAI: Days since 1950, TAI to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**ds50UT1** (*numpy.ndarray*) - float64 array of the same shape, the days since 1950, UT1.
+	"""
+	if table is not None:
+		return _fill_out(table.TAIToUT1(ds50TAI), out)
+	return _map_array(_TAIToUT1, ds50TAI, out)
+
 ## TAIToUTC
-C_TIMEDLL.TAIToUTC.restype = c.c_double
-C_TIMEDLL.TAIToUTC.argtypes = [c.c_double]
+_TAIToUTC = fastcall.bind(C_TIMEDLL, 'TAIToUTC', c.c_double, [c.c_double])
 def TAIToUTC(ds50TAI):
 	"""
 	Converts a time in ds50TAI to a time in ds50UTC using timing constants records in memory. If no timing constants records were loaded, ds50TAI and ds50UTC are the same. 
@@ -149,9 +170,29 @@ def TAIToUTC(ds50TAI):
 	:return:
 		**ds50UTC** (*float*) - The number of Days since 1950, UTC. Partial days may be returned.
 	"""
-	ds50UTC = C_TIMEDLL.TAIToUTC(ds50TAI)
+	ds50UTC = _TAIToUTC(ds50TAI)
 	return ds50UTC
 
+
+## TAIToUTCArray
+def TAIToUTCArray(ds50TAI, table=None, out=None):
+	"""
+	Array form of TAIToUTC: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of TAIToUTC. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50TAI: Days since 1950, TAI to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**ds50UTC** (*numpy.ndarray*) - float64 array of the same shape, the days since 1950, UTC.
+	"""
+	if table is not None:
+		return _fill_out(table.TAIToUTC(ds50TAI), out)
+	return _map_array(_TAIToUTC, ds50TAI, out)
+
 ## TConAddARec
 C_TIMEDLL.TConAddARec.restype = c.c_int
 C_TIMEDLL.TConAddARec.argtypes = [c.c_double] * 7
@@ -265,8 +306,7 @@ def ThetaGrnwch(ds50UT1, envFk):
 	return thetaGrnwhch	
 	
 ## ThetaGrnwchFK4
-C_TIMEDLL.ThetaGrnwchFK4.restype = c.c_double
-C_TIMEDLL.ThetaGrnwchFK4.argtypes = [c.c_double]
+_ThetaGrnwchFK4 = fastcall.bind(C_TIMEDLL, 'ThetaGrnwchFK4', c.c_double, [c.c_double])
 def ThetaGrnwchFK4(ds50UT1):
 	"""
 	Computes right ascension of Greenwich at the specified time in ds50UT1 using the Fourth Fundamental Catalogue (FK4). There is no need to load or initialize EnvConst.dll when computing right ascension using this function. 
@@ -275,13 +315,11 @@ def ThetaGrnwchFK4(ds50UT1):
 	:return:
 		**thetaGrnwhchFK4** (*float*) - Right ascension of Greenwich in radians at the specified time using FK4.
 	"""
-	ds50UT1 = c.c_double(ds50UT1)
-	thetaGrnwchcFK4 = C_TIMEDLL.ThetaGrnwchFK4(ds50UT1)
+	thetaGrnwchcFK4 = _ThetaGrnwchFK4(ds50UT1)
 	return thetaGrnwchcFK4
 
 ## ThetaGrnwchFK5
-C_TIMEDLL.ThetaGrnwchFK5.restype = c.c_double
-C_TIMEDLL.ThetaGrnwchFK5.argtypes = [c.c_double]
+_ThetaGrnwchFK5 = fastcall.bind(C_TIMEDLL, 'ThetaGrnwchFK5', c.c_double, [c.c_double])
 def ThetaGrnwchFK5(ds50UT1):
 	"""
 	Computes right ascension of Greenwich at the specified time in ds50UT1 using the Fifth Fundamental Catalogue (FK5). There is no need to load or initialize EnvConst.dll when computing right ascension using this function. 
@@ -290,10 +328,29 @@ def ThetaGrnwchFK5(ds50UT1):
 	:return:
 		**thetaGrnwhchFK5** (*float*) - Right ascension of Greenwich in radians at the specified time using FK5.
 	"""
-	ds50UT1 = c.c_double(ds50UT1)
-	thetaGrnwchcFK5 = C_TIMEDLL.ThetaGrnwchFK5(ds50UT1)
+	thetaGrnwchcFK5 = _ThetaGrnwchFK5(ds50UT1)
 	return thetaGrnwchcFK5
 
+
+## ThetaGrnwchFK5Array
+def ThetaGrnwchFK5Array(ds50UT1, table=None, out=None):
+	"""
+	Array form of ThetaGrnwchFK5: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of ThetaGrnwchFK5. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50UT1: Days since 1950, UT1 to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**thetaGrnwchFK5** (*numpy.ndarray*) - float64 array of the same shape, the right ascensions of Greenwich in radians using FK5.
+	"""
+	if table is not None:
+		return _fill_out(table.ThetaGrnwchFK5(ds50UT1), out)
+	return _map_array(_ThetaGrnwchFK5, ds50UT1, out)
+
 ## TimeComps1ToUTC
 C_TIMEDLL.TimeComps1ToUTC.restype = c.c_double
 C_TIMEDLL.TimeComps1ToUTC.argtypes = [c.c_int, c.c_int, c.c_int, c.c_int, c.c_double]
@@ -493,8 +550,7 @@ def UTCToDTG20(ds50UTC):
 	return dtg20
 
 ## UTCToET
-C_TIMEDLL.UTCToET.restype = c.c_double
-C_TIMEDLL.UTCToET.argtypes = [c.c_double]
+_UTCToET = fastcall.bind(C_TIMEDLL, 'UTCToET', c.c_double, [c.c_double])
 def UTCToET(ds50UTC):
 	"""
 	Converts a time in ds50UTC to a time in ds50ET using timing constants records in memory. If no timing constants records were loaded, ds50UTC and ds50UT1 are the same. 
@@ -503,13 +559,31 @@ def UTCToET(ds50UTC):
 	:return:
 		**ds50ET** (*float*) - The number of days since 1950, ET. Partial days may be returned.
 	"""
-	ds50UTC = c.c_double(ds50UTC)
-	ds50ET = C_TIMEDLL.UTCToET(ds50UTC)
+	ds50ET = _UTCToET(ds50UTC)
 	return ds50ET
 
+
+## UTCToETArray
+def UTCToETArray(ds50UTC, table=None, out=None):
+	"""
+	Array form of UTCToET: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of UTCToET. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50UTC: Days since 1950, UTC to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**ds50ET** (*numpy.ndarray*) - float64 array of the same shape, the days since 1950, ET.
+	"""
+	if table is not None:
+		return _fill_out(table.UTCToET(ds50UTC), out)
+	return _map_array(_UTCToET, ds50UTC, out)
+
 ## UTCToTAI
-C_TIMEDLL.UTCToTAI.restype = c.c_double
-C_TIMEDLL.UTCToTAI.argtypes = [c.c_double]
+_UTCToTAI = fastcall.bind(C_TIMEDLL, 'UTCToTAI', c.c_double, [c.c_double])
 def UTCToTAI(ds50UTC):
 	"""
 	Converts a time in ds50UTC to a time in ds50TAI using timing constants records in memory. If no timing constants records were loaded, ds50UTC and ds50TAI are the same. 
@@ -518,10 +592,29 @@ def UTCToTAI(ds50UTC):
 	:return:
 		**ds50TAI** (*double*) - The number of days since 1950, TAI. Partial days may be returned.
 	"""
-	ds50UTC = c.c_double(ds50UTC)
-	ds50TAI = C_TIMEDLL.UTCToTAI(ds50UTC)
+	ds50TAI = _UTCToTAI(ds50UTC)
 	return ds50TAI
 
+
+## UTCToTAIArray
+def UTCToTAIArray(ds50UTC, table=None, out=None):
+	"""
+	Array form of UTCToTAI: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of UTCToTAI. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50UTC: Days since 1950, UTC to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**ds50TAI** (*numpy.ndarray*) - float64 array of the same shape, the days since 1950, TAI.
+	"""
+	if table is not None:
+		return _fill_out(table.UTCToTAI(ds50UTC), out)
+	return _map_array(_UTCToTAI, ds50UTC, out)
+
 ## UTCToTConRec
 C_TIMEDLL.UTCToTConRec.argtypes = [c.c_double] + [c.POINTER(c.c_double)] * 5
 def UTCToTConRec(ds50UTC):
@@ -609,8 +702,7 @@ def UTCToTimeComps2(ds50UTC):
 	return(year, month, dayOfMonth, hh, mm, sss)
 
 ## UTCToUT1
-C_TIMEDLL.UTCToUT1.restype = c.c_double
-C_TIMEDLL.UTCToUT1.argtypes = [c.c_double]
+_UTCToUT1 = fastcall.bind(C_TIMEDLL, 'UTCToUT1', c.c_double, [c.c_double])
 def UTCToUT1(ds50UTC):
 	"""
 	Converts a time in ds50UTC to a time in ds50UT1 using timing constants records in memory. If no timing constants records were loaded, ds50UTC and ds50UT1 are the same. 
@@ -619,10 +711,29 @@ def UTCToUT1(ds50UTC):
 	:return:
 		**ds50UT1** (*float*) - The number of days since 1950, UT1. Partial days may be returned.
 	"""
-	ds50UTC = c.c_double(ds50UTC)
-	ds50UT1 = C_TIMEDLL.UTCToUT1(ds50UTC)
+	ds50UT1 = _UTCToUT1(ds50UTC)
 	return ds50UT1
 
+
+## UTCToUT1Array
+def UTCToUT1Array(ds50UTC, table=None, out=None):
+	"""
+	Array form of UTCToUT1: converts every element of a numpy array.
+
+	Without a table, every element goes through the DLL, so the results are exactly those of UTCToUT1. With a TConTable covering the times, the conversion is done in numpy from the table instead, which is much faster for long arrays; see TConTable for its accuracy.
+
+	:param numpy.ndarray ds50UTC: Days since 1950, UTC to be converted, any shape.
+	:param table: A table built from the loaded timing constants, to use the numpy fast path.
+	:type table: TConTable, optional
+	:param out: A float64 array of the same shape to write the results into.
+	:type out: numpy.ndarray, optional
+	:return:
+		**ds50UT1** (*numpy.ndarray*) - float64 array of the same shape, the days since 1950, UT1.
+	"""
+	if table is not None:
+		return _fill_out(table.UTCToUT1(ds50UTC), out)
+	return _map_array(_UTCToUT1, ds50UTC, out)
+
 ## UTCToYrDays
 C_TIMEDLL.UTCToYrDays.argtypes = [c.c_double, c.POINTER(c.c_int), c.POINTER(c.c_double)]
 def UTCToYrDays(ds50UTC):
@@ -658,3 +769,145 @@ def YrDaysToUTC(year, dayOfYear):
 	dayOfYear = c.c_double(dayOfYear)
 	ds50UTC = C_TIMEDLL.YrDaysToUTC(year, dayOfYear)
 	return ds50UTC
+
+## Array helpers
+def _map_array(func, times, out):
+	# calls a bound scalar DLL function on every element of times
+	times = np.asarray(times, dtype=np.float64)
+	result = np.fromiter(map(func, times.ravel().tolist()), dtype=np.float64, count=times.size).reshape(times.shape)
+	return _fill_out(result, out)
+
+def _fill_out(result, out):
+	if out is None:
+		return result
+	settings.verify_out_array(out, result.shape)
+	out[...] = result
+	return out
+
+## TConTable
+# TT (ET) minus TAI, seconds
+_TT_MINUS_TAI = 32.184
+
+# nominal rate of the Greenwich angle, radians per day
+_SIDEREAL_RATE = 2 * np.pi * 1.00273790935
+
+class TConTable:
+	"""
+	A numpy copy of the timing constants loaded in the DLL over a span of time, used as the fast path of the *Array conversion functions.
+
+	The table samples UTCToTConRec once per **step** days, starting at 0h UTC. TAI minus UTC is held constant between samples, which is exact as long as leap seconds fall on sample times (leap seconds are introduced at 0h UTC, so the default daily step qualifies). UT1 minus UTC is interpolated linearly between samples, with leap seconds removed from the slope. ThetaGrnwchFK5 is sampled directly every **thetaStep** days and interpolated linearly after unwinding the whole turns. ET is TAI plus 32.184 seconds.
+
+	The table is a snapshot: build a new one after loading different timing constants. Use validate to measure how closely it follows the DLL.
+
+	.. code-block:: python
+
+		table = timedll.TConTable(25852.0, 25853.0)
+		ds50UTC = 25852.0 + numpy.arange(86400) / 86400
+		ds50UT1 = timedll.UTCToUT1Array(ds50UTC, table=table)
+		thetaG = timedll.ThetaGrnwchFK5Array(ds50UT1, table=table)
+
+	:param float startDs50UTC: The first time the table must cover, days since 1950, UTC.
+	:param float stopDs50UTC: The last time the table must cover, days since 1950, UTC.
+	:param float step: The spacing of the timing constant samples, days.
+	:param float thetaStep: The spacing of the Greenwich angle samples, days.
+	"""
+	def __init__(self, startDs50UTC, stopDs50UTC, step=1.0, thetaStep=1/24):
+		if stopDs50UTC < startDs50UTC:
+			raise Exception("stopDs50UTC %f is before startDs50UTC %f" % (stopDs50UTC, startDs50UTC))
+		self.startDs50UTC = startDs50UTC
+		self.stopDs50UTC = stopDs50UTC
+		# one extra sample on each side, so that the UT1, TAI and theta spans also cover the requested UTC span
+		first = np.floor(startDs50UTC) - step
+		count = int(np.ceil((stopDs50UTC + step - first) / step)) + 1
+		self.knots = first + step * np.arange(count, dtype=np.float64)
+		records = np.array([UTCToTConRec(t) for t in self.knots.tolist()], dtype=np.float64)
+		self.taiMinusUTC = records[:, 0]
+		self.ut1MinusUTC = records[:, 1]
+
+		# Greenwich angle samples, unwound with the nominal sidereal rate so the interpolation never crosses a turn
+		count = int(np.ceil((self.knots[-1] - self.knots[0]) / thetaStep)) + 1
+		self.thetaKnots = self.knots[0] + thetaStep * np.arange(count, dtype=np.float64)
+		theta = np.array([_ThetaGrnwchFK5(t) for t in self.thetaKnots.tolist()], dtype=np.float64)
+		advance = np.diff(theta)
+		nominal = _SIDEREAL_RATE * thetaStep
+		turns = np.round((nominal - advance) / (2 * np.pi))
+		self.theta = theta[0] + np.concatenate(([0.0], np.cumsum(advance + 2 * np.pi * turns)))
+
+	def _index(self, ds50UTC):
+		# index of the sample at or before each time, refusing times outside the table
+		if ds50UTC.size and (ds50UTC.min() < self.knots[0] or ds50UTC.max() > self.knots[-1]):
+			raise Exception("times from %f to %f are outside the table, which covers %f to %f" % (ds50UTC.min(), ds50UTC.max(), self.knots[0], self.knots[-1]))
+		return np.clip(np.searchsorted(self.knots, ds50UTC, side='right') - 1, 0, self.knots.shape[0] - 2)
+
+	def _taiMinusUTC(self, ds50UTC):
+		return self.taiMinusUTC[self._index(ds50UTC)]
+
+	def UTCToTAI(self, ds50UTC):
+		"""
+		Numpy form of timedll.UTCToTAI.
+		"""
+		ds50UTC = np.asarray(ds50UTC, dtype=np.float64)
+		return ds50UTC + self._taiMinusUTC(ds50UTC) / 86400.0
+
+	def UTCToET(self, ds50UTC):
+		"""
+		Numpy form of timedll.UTCToET.
+		"""
+		ds50UTC = np.asarray(ds50UTC, dtype=np.float64)
+		return ds50UTC + (self._taiMinusUTC(ds50UTC) + _TT_MINUS_TAI) / 86400.0
+
+	def UTCToUT1(self, ds50UTC):
+		"""
+		Numpy form of timedll.UTCToUT1.
+		"""
+		ds50UTC = np.asarray(ds50UTC, dtype=np.float64)
+		i = self._index(ds50UTC)
+		left = self.ut1MinusUTC[i]
+		# a leap second at the right sample is a jump, not part of the slope
+		right = self.ut1MinusUTC[i + 1] - (self.taiMinusUTC[i + 1] - self.taiMinusUTC[i])
+		frac = (ds50UTC - self.knots[i]) / (self.knots[i + 1] - self.knots[i])
+		return ds50UTC + (left + frac * (right - left)) / 86400.0
+
+	def TAIToUTC(self, ds50TAI):
+		"""
+		Numpy form of timedll.TAIToUTC.
+		"""
+		ds50TAI = np.asarray(ds50TAI, dtype=np.float64)
+		# guess with the offset at the TAI time, then correct with the offset at the guessed UTC time
+		ds50UTC = ds50TAI - self._taiMinusUTC(np.clip(ds50TAI, self.knots[0], self.knots[-1])) / 86400.0
+		return ds50TAI - self._taiMinusUTC(ds50UTC) / 86400.0
+
+	def TAIToUT1(self, ds50TAI):
+		"""
+		Numpy form of timedll.TAIToUT1.
+		"""
+		return self.UTCToUT1(self.TAIToUTC(ds50TAI))
+
+	def ThetaGrnwchFK5(self, ds50UT1):
+		"""
+		Numpy form of timedll.ThetaGrnwchFK5.
+		"""
+		ds50UT1 = np.asarray(ds50UT1, dtype=np.float64)
+		if ds50UT1.size and (ds50UT1.min() < self.thetaKnots[0] or ds50UT1.max() > self.thetaKnots[-1]):
+			raise Exception("times from %f to %f are outside the table, which covers %f to %f" % (ds50UT1.min(), ds50UT1.max(), self.thetaKnots[0], self.thetaKnots[-1]))
+		return np.mod(np.interp(ds50UT1, self.thetaKnots, self.theta), 2 * np.pi)
+
+	def validate(self, nsample=1000, seed=0):
+		"""
+		Cross-validates the table against the DLL at random times within the span it was built for.
+
+		:param int nsample: The number of random times to compare.
+		:param int seed: The random seed, so that a validation can be repeated.
+		:return:
+			**errors** (*dict*) - The largest absolute difference from the DLL for each conversion, keyed by function name. Time conversions are in days, ThetaGrnwchFK5 in radians (wrapped to [-pi, pi]).
+		"""
+		rng = np.random.default_rng(seed)
+		ds50 = rng.uniform(self.startDs50UTC, self.stopDs50UTC, nsample)
+		errors = {}
+		for name in ['UTCToTAI', 'UTCToUT1', 'UTCToET', 'TAIToUTC', 'TAIToUT1']:
+			fast = getattr(self, name)(ds50)
+			exact = _map_array(globals()['_' + name], ds50, None)
+			errors[name] = float(np.max(np.abs(fast - exact))) if nsample else 0.0
+		diff = self.ThetaGrnwchFK5(ds50) - _map_array(_ThetaGrnwchFK5, ds50, None)
+		errors['ThetaGrnwchFK5'] = float(np.max(np.abs(np.mod(diff + np.pi, 2 * np.pi) - np.pi))) if nsample else 0.0
+		return errors
@@ -1,9 +1,27 @@
 #! /usr/bin/env python3
-from dshsaa.raw import settings, exceptions
+from dshsaa.raw import settings, exceptions, fastcall, events, lazydll
 import ctypes as c
+import numpy as np
 import pdb
 
-C_TLEDLL = c.CDLL(settings.LIB_TLE_NAME)
+C_TLEDLL = lazydll.LazyDLL('LIB_TLE_NAME', __name__)
+
+## Indexes of the GP fields in xa_tle (double[64])
+XA_TLE_SATNUM = 0
+XA_TLE_EPOCH = 1
+XA_TLE_NDOT = 2
+XA_TLE_NDOTDOT = 3
+XA_TLE_BSTAR = 4
+XA_TLE_EPHTYPE = 5
+XA_TLE_INCLI = 20
+XA_TLE_NODE = 21
+XA_TLE_ECCEN = 22
+XA_TLE_OMEGA = 23
+XA_TLE_MNANOM = 24
+XA_TLE_MNMOTN = 25
+XA_TLE_REVNUM = 26
+XA_TLE_ELSETNUM = 30
+XA_TLE_SIZE = 64
 
 ##TleAddSatFrArray
 C_TLEDLL.TleAddSatFrArray.restype = settings.stay_int64
@@ -20,6 +38,7 @@ def TleAddSatFrArray(xa_tle, xs_tle):
 	xa_tle = settings.list_to_array(xa_tle)
 	xs_tle = settings.str_to_c_char_p(xs_tle, fixed_width=512)
 	satKey = C_TLEDLL.TleAddSatFrArray(xa_tle, xs_tle)
+	events.notify('add', satKey, source='tle')
 	return satKey
 	
 ##TleAddSatFrArrayML
@@ -37,6 +56,7 @@ def TleAddSatFrArrayML(xa_tle, xs_tle):
 	xa_tle = settings.list_to_array(xa_tle)
 	xs_tle = settings.str_to_c_char_p(xs_tle, fixed_width=512)
 	satKey = C_TLEDLL.TleAddSatFrArrayML(xa_tle, xs_tle)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
 ##TleAddSatFrFieldsGP
@@ -94,6 +114,7 @@ def TleAddSatFrFieldsGP(satNum, secClass, satName, epochYr, epochDays, bstar, ep
 	mnMotion  = c.c_double(mnMotion)
 	revNum    = c.c_int32(revNum)
 	satKey    = C_TLEDLL.TleAddSatFrFieldsGP(satNum, secClass, satName, epochYr, epochDays, bstar, ephType, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
 ##TleAddSatFrFieldsGP2
@@ -157,6 +178,7 @@ def TleAddSatFrFieldsGP2(satNum, secClass, satName, epochYr, epochDays, bstar, e
 	nDotO2    = c.c_double(nDotO2)
 	n2DotO6   = c.c_double(n2DotO6)
 	satKey    = C_TLEDLL.TleAddSatFrFieldsGP2(satNum, secClass, satName, epochYr, epochDays, bstar, ephType, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum, nDotO2, n2DotO6)
+	events.notify('add', satKey, source='tle')
 	return satKey
 	
 	
@@ -221,6 +243,7 @@ def TleAddSatFrFieldsGP2ML(satNum, secClass, satName, epochYr, epochDays, bstar,
 	nDotO2 = c.c_double(nDotO2)
 	n2DotO6 = c.c_double(n2DotO6)
 	satKey = C_TLEDLL.TleAddSatFrFieldsGP2ML(satNum, secClass, satName, epochYr, epochDays, bstar, ephType, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum, nDotO2, n2DotO6)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
 
@@ -283,6 +306,7 @@ def TleAddSatFrFieldsSP(satNum, secClass, satName, epochYr, epochDays, bTerm, og
 	mnMotion = c.c_double(mnMotion)
 	revNum = c.c_int32(revNum)
 	satKey = C_TLEDLL.TleAddSatFrFieldsSP(satNum, secClass, satName, epochYr, epochDays, bTerm, ogParm, agom, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
+	events.notify('add', satKey, source='tle')
 	return satKey
 	
 ##TleAddSatFrFieldsSPML
@@ -344,6 +368,7 @@ def TleAddSatFrFieldsSPML(satNum, secClass, satName, epochYr, epochDays, bTerm,
 	mnMotion = c.c_double(mnMotion)
 	revNum = c.c_int32(revNum)
 	satKey = C_TLEDLL.TleAddSatFrFieldsSPML(satNum, secClass, satName, epochYr, epochDays, bTerm, ogParm, agom, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
 ##TleAddSatFrLines
@@ -362,8 +387,52 @@ def TleAddSatFrLines(line1, line2):
 	line1 = settings.str_to_c_char_p(line1, fixed_width=None, limit=None, terminator=None)
 	line2 = settings.str_to_c_char_p(line2, fixed_width=None, limit=None, terminator=None)
 	satKey = C_TLEDLL.TleAddSatFrLines(line1, line2)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
+##TleAddSatFrLinesBatch
+# Address based prototypes of TleLinesToArray and TleAddSatFrArray, so that each xa_tle can be a row of a numpy array
+_TleLinesToArray_addr = fastcall.bind_variant(C_TLEDLL, 'TleLinesToArray', c.c_int, [c.c_char_p, c.c_char_p, c.c_void_p, c.c_char_p])
+_TleAddSatFrArray_addr = fastcall.bind_variant(C_TLEDLL, 'TleAddSatFrArray', c.c_int64, [c.c_void_p, c.c_char_p])
+
+def TleAddSatFrLinesBatch(lines):
+	"""
+	Adds many TLEs (satellites) from their first and second lines. This is the batch form of TleAddSatFrLines which also hands back the parsed numerical fields of every TLE, so that nothing has to be read back from the DLL one satKey at a time.
+
+	Each line pair is parsed with TleLinesToArray straight into a row of **xa_tle**, then added with TleAddSatFrArray. The parse buffers are allocated once for the whole batch. A line pair that fails to parse is not added and gets a satKey of 0.
+
+	:param lines: The two line element sets, as (line1, line2) string pairs.
+	:type lines: list
+	:return:
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (n,), the TleLinesToArray result for each pair, 0 if the TLE is parsed successfully, non-0 if there is an error.
+		- **satKeys** (*numpy.ndarray*) - int64 array of shape (n,), the satKey of each newly added TLE, a negative value if the DLL refused it (for instance a duplicate), 0 if it could not be parsed.
+		- **xa_tle** (*numpy.ndarray*) - float64 array of shape (n, 64), the numerical fields of each TLE, see the XA_TLE_* indexes. Rows that failed to parse are zero.
+	"""
+	(retcode, xa_tle, xs_tle) = TleLinesToArrayBatch(lines)
+	satKeys = np.zeros(retcode.shape[0], dtype=np.int64)
+	ok = np.flatnonzero(retcode == 0)
+	satKeys[ok] = TleAddSatFrArrayBatch(xa_tle[ok], [xs_tle[i] for i in ok])
+	return (retcode, satKeys, xa_tle)
+
+##TleAddSatFrArrayBatch
+def TleAddSatFrArrayBatch(xa_tle, xs_tle):
+	"""
+	Adds many TLEs (satellites) from their numerical and text fields, as returned by TleLinesToArrayBatch. This is the batch form of TleAddSatFrArray.
+
+	:param numpy.ndarray xa_tle: float64 array of shape (n, 64), the numerical fields of each TLE, see the XA_TLE_* indexes.
+	:param list xs_tle: The text fields of each TLE, see the XS_TLE_* columns (string[512]).
+	:return:
+		**satKeys** (*numpy.ndarray*) - int64 array of shape (n,), the satKey of each newly added TLE, a negative value if the DLL refused it (for instance a duplicate).
+	"""
+	xa_tle = np.ascontiguousarray(xa_tle, dtype=np.float64).reshape(-1, XA_TLE_SIZE)
+	n = xa_tle.shape[0]
+	satKeys = np.zeros(n, dtype=np.int64)
+	xa_addr = xa_tle.ctypes.data
+	for i in range(n):
+		satKeys[i] = _TleAddSatFrArray_addr(xa_addr + 8 * XA_TLE_SIZE * i, settings.str_to_byte(xs_tle[i], fixed_width=512))
+		events.notify('add', int(satKeys[i]), source='tle')
+	return satKeys
+
 ##TleAddSatFrLinesML
 C_TLEDLL.TleAddSatFrLinesML.restype = settings.stay_int64
 C_TLEDLL.TleAddSatFrLinesML.argtypes = [c.c_char_p, c.c_char_p]
@@ -380,6 +449,7 @@ def TleAddSatFrLinesML(line1, line2):
 	line1 = settings.str_to_c_char_p(line1, fixed_width=None, limit=None, terminator=None)
 	line2 = settings.str_to_c_char_p(line2, fixed_width=None, limit=None, terminator=None)
 	satKey = C_TLEDLL.TleAddSatFrLinesML(line1, line2)
+	events.notify('add', satKey, source='tle')
 	return satKey
 
 ##TleDataToArray
@@ -395,7 +465,7 @@ def TleDataToArray(satKey):
 		* **xa_tle** (*float[64]*) - Array containing TLE's numerical fields, see XA_TLE_? for array arrangement (double[64])
 		* **xs_tle** (*str*) - Output string that contains all TLE's text fields, see XS_TLE_? for column arrangement (byte[512])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	xa_tle = settings.double64()
 	xs_tle = c.c_char_p(bytes(512))
@@ -494,7 +564,7 @@ def TleGetAllFieldsGP(satKey):
 		* **mnMotion** (*float*) - Mean motion (rev/day) (ephType = 0: Kozai mean motion, ephType = 2: Brouwer mean motion)
 		* **revNum** (*int*) - Revolution number at epoch
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	satNum    = c.c_int32()
 	secClass  = c.c_char(b' ')
@@ -593,7 +663,7 @@ def TleGetAllFieldsGP2(satKey):
 		* **nDotO2** (*float*) - Mean motion derivative (rev/day /2)
 		* **n2DotO6** (*float*) - Mean motion second derivative (rev/day**2 /6)
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	satNum    = c.c_int32()
 	secClass  = c.c_char()
@@ -696,7 +766,7 @@ def TleGetAllFieldsSP(satKey):
 		* **mnMotion** (*float*) - Mean motion (rev/day)
 		* **revNum** (*int*) - Revolution number at epoch
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	satNum    = c.c_int32()
 	secClass  = c.c_char()
@@ -814,7 +884,7 @@ def TleGetField(satKey, xf_Tle):
 		* **retcode** (*int*) - 0 if the TLE data is successfully retrieved, non-0 if there is an error.
 		* **valueStr** (*str*) - A string to contain the value of the requested field. (byte[512])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	xf_Tle = c.c_int32(xf_Tle)
 	valueStr = c.c_char_p(bytes(512))
@@ -849,7 +919,7 @@ def TleGetLines(satKey):
 		**line1** (*str*) - A string to hold the first line of the TLE. (byte[512])
 		**line2** (*str*) - A string to hold the second line of the TLE (if available, line3 can be extracted from line2's 101-180th columns). (byte[512])
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	line1 = c.c_char_p(bytes(512))
 	line2 = c.c_char_p(bytes(512))
@@ -1076,6 +1146,36 @@ def TleLinesToArray(line1, line2):
 	xs_tle = settings.byte_to_str(xs_tle)
 	return (retcode, xa_tle, xs_tle)
 
+##TleLinesToArrayBatch
+def TleLinesToArrayBatch(lines):
+	"""
+	Parses many two line element sets into their numerical and text fields. This is the batch form of TleLinesToArray: each TLE is parsed straight into a row of **xa_tle**, and the buffers are allocated once for the whole batch.
+	This function only parses data from the input TLEs but DOES NOT load/add them to memory. The rows can be added later with TleAddSatFrArrayBatch.
+
+	:param lines: The two line element sets, as (line1, line2) string pairs.
+	:type lines: list
+	:return:
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (n,), 0 where the TLE is parsed successfully, non-0 where there is an error.
+		- **xa_tle** (*numpy.ndarray*) - float64 array of shape (n, 64), the numerical fields of each TLE, see the XA_TLE_* indexes. Rows that failed to parse are zero.
+		- **xs_tle** (*list*) - The text fields of each TLE, see the XS_TLE_* columns. Empty strings where the TLE failed to parse.
+	"""
+	lines = list(lines)
+	n = len(lines)
+	retcode = np.zeros(n, dtype=np.int32)
+	xa_tle = np.zeros((n, XA_TLE_SIZE), dtype=np.float64)
+	xs_tle = [''] * n
+	xs_buffer = c.create_string_buffer(512)
+	xa_addr = xa_tle.ctypes.data
+	for i in range(n):
+		(line1, line2) = lines[i]
+		rc = _TleLinesToArray_addr(line1.encode('ascii'), line2.encode('ascii'), xa_addr + 8 * XA_TLE_SIZE * i, xs_buffer)
+		retcode[i] = rc
+		if rc != 0:
+			xa_tle[i] = 0
+			continue
+		xs_tle[i] = settings.byte_to_str(xs_buffer)
+	return (retcode, xa_tle, xs_tle)
+
 ##TleLoadFile
 C_TLEDLL.TleLoadFile.restype = c.c_int
 C_TLEDLL.TleLoadFile.argtypes = [c.c_char_p]
@@ -1092,6 +1192,7 @@ def TleLoadFile(tleFile):
 	"""
 	tleFile = settings.str_to_byte(tleFile)
 	retcode = C_TLEDLL.TleLoadFile(tleFile)
+	events.notify('load', source='tle')
 	return retcode
 
 ##TleParseGP
@@ -1200,6 +1301,86 @@ def TleParseGP(line1, line2):
 	revNum    = revNum.value
 	return(retcode, satNum, secClass, satName, epochYr, epochDays, nDotO2, n2DotO6, bstar, ephType, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
 	
+##TleParseGPBatch
+# Outputs of TleParseGP, in argument order
+TLEPARSEGP_DTYPE = np.dtype([('satNum', np.int32),
+							 ('secClass', 'U1'),
+							 ('satName', 'U8'),
+							 ('epochYr', np.int32),
+							 ('epochDays', np.float64),
+							 ('nDotO2', np.float64),
+							 ('n2DotO6', np.float64),
+							 ('bstar', np.float64),
+							 ('ephType', np.int32),
+							 ('elsetNum', np.int32),
+							 ('incli', np.float64),
+							 ('node', np.float64),
+							 ('eccen', np.float64),
+							 ('omega', np.float64),
+							 ('mnAnomaly', np.float64),
+							 ('mnMotion', np.float64),
+							 ('revNum', np.int32)])
+"""The row layout of the fields returned by TleParseGPBatch, one column per output of TleParseGP."""
+
+_TleParseGP_addr = fastcall.bind_variant(C_TLEDLL, 'TleParseGP', c.c_int, [c.c_char_p] * 2 + [c.c_void_p] * 17)
+
+def TleParseGPBatch(lines):
+	"""
+	Parses GP data from many two line element sets. This is the batch form of TleParseGP: the results are columns of a numpy structured array instead of 17 python values per TLE, and the DLL output buffers are allocated once for the whole batch instead of once per TLE.
+	This function only parses data from the input TLEs but DOES NOT load/add them to memory, so it can be used to triage a large dump before deciding what to load.
+
+	Example, keeping the rows which parsed and have a recent epoch:
+
+	.. code-block:: python
+
+		(retcode, fields) = tledll.TleParseGPBatch(lines)
+		good = fields[(retcode == 0) & (fields['epochYr'] >= 2020)]
+
+	:param lines: The two line element sets, as (line1, line2) string pairs.
+	:type lines: list
+	:return:
+		- **retcode** (*numpy.ndarray*) - int32 array of shape (n,), 0 where the TLE is parsed successfully, non-0 where there is an error.
+		- **fields** (*numpy.ndarray*) - structured array of shape (n,) with the TLEPARSEGP_DTYPE columns, named as the outputs of TleParseGP. Rows that failed to parse are zero (empty strings).
+	"""
+	lines = list(lines)
+	n = len(lines)
+	retcode = np.zeros(n, dtype=np.int32)
+	fields = np.zeros(n, dtype=TLEPARSEGP_DTYPE)
+	
+	# the numbers land in one scratch record which is copied into its row after each call, the strings have their
+	# own scratch buffers
+	numeric = [name for name in TLEPARSEGP_DTYPE.names if TLEPARSEGP_DTYPE[name].kind != 'U']
+	numbers = np.zeros(n, dtype=np.dtype([(name, TLEPARSEGP_DTYPE[name]) for name in numeric], align=True))
+	scratch = np.zeros(1, dtype=numbers.dtype)
+	secClass = c.create_string_buffer(2)
+	satName = c.create_string_buffer(9)
+	args = []
+	for name in TLEPARSEGP_DTYPE.names:
+		if name == 'secClass':
+			args.append(c.addressof(secClass))
+		elif name == 'satName':
+			args.append(c.addressof(satName))
+		else:
+			args.append(scratch.ctypes.data + scratch.dtype.fields[name][1])
+	secClasses = [''] * n
+	satNames = [''] * n
+	
+	for i in range(n):
+		(line1, line2) = lines[i]
+		rc = _TleParseGP_addr(line1.encode('ascii'), line2.encode('ascii'), *args)
+		retcode[i] = rc
+		if rc != 0:
+			continue
+		numbers[i] = scratch[0]
+		secClasses[i] = secClass.value.decode('ascii').rstrip()
+		satNames[i] = satName.value.decode('ascii').rstrip()
+	
+	for name in numeric:
+		fields[name] = numbers[name]
+	fields['secClass'] = secClasses
+	fields['satName'] = satNames
+	return (retcode, fields)
+
 ##TleParseSP
 C_TLEDLL.TleParseSP.restype = c.c_int
 C_TLEDLL.TleParseSP.argtypes = [c.c_char_p,
@@ -1312,6 +1493,7 @@ def TleRemoveAllSats():
 		**retcode** (*int*) - 0 if all TLE's are removed successfully from memory, non-0 if there is an error.
 	"""
 	retcode = C_TLEDLL.TleRemoveAllSats()
+	events.notify('remove_all', source='tle')
 	return retcode
 
 ##TleRemoveSat
@@ -1326,9 +1508,10 @@ def TleRemoveSat(satKey):
 	:return:
 		**retcode** (*int*) - 0 if the TLE is removed successfully, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	retcode = C_TLEDLL.TleRemoveSat(satKey)
+	events.notify('remove', satKey, source='tle')
 	return retcode
 
 ##TleSaveFile
@@ -1401,11 +1584,12 @@ def TleSetField(satKey, xf_Tle, valueStr):
 	:return:
 		**retcode** (*int*) - 0 if the TLE is successfully updated, non-0 if there is an error
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	xf_Tle = c.c_int32(xf_Tle)
 	valueStr = settings.str_to_byte(valueStr)
 	retcode = C_TLEDLL.TleSetField(satKey, xf_Tle, valueStr)
+	events.notify('update', satKey, source='tle')
 	return retcode
 	
 ##TleSPFieldsToLines
@@ -1490,11 +1674,12 @@ def TleUpdateSatFrArray(satKey, xa_tle, xs_tle):
 	:return:
 		**retcode** (*int*) -  : 0 if the TLE is successfully updated, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	xa_tle = settings.list_to_array(xa_tle)
 	xs_tle = settings.str_to_c_char_p(xs_tle, fixed_width=512)
 	retcode = C_TLEDLL.TleUpdateSatFrArray(satKey, xa_tle, xs_tle)
+	events.notify('update', satKey, source='tle')
 	return retcode
 	
 ##TleUpdateSatFrFieldsGP
@@ -1531,7 +1716,7 @@ def TleUpdateSatFrFieldsGP(satKey, secClass, satName, bstar, elsetNum, incli, no
 	:return:
 		**retcode** (*int*) - 0 if the TLE is successfully updated, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	secClass = c.c_char(secClass.encode('ascii', 'strict'))
 	satName = settings.str_to_c_char_p(satName, fixed_width=8)
@@ -1545,6 +1730,7 @@ def TleUpdateSatFrFieldsGP(satKey, secClass, satName, bstar, elsetNum, incli, no
 	mnMotion = c.c_double(mnMotion)
 	revNum = c.c_int32(revNum)
 	retcode = C_TLEDLL.TleUpdateSatFrFieldsGP(satKey, secClass, satName, bstar, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
+	events.notify('update', satKey, source='tle')
 	return retcode
 
 ##TleUpdateSatFrFieldsGP2
@@ -1585,7 +1771,7 @@ def TleUpdateSatFrFieldsGP2(satKey, secClass, satName, bstar, elsetNum, incli, n
 	:return:
 		**retcode** (*int*) - 0 if the TLE is successfully updated, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	secClass = c.c_char(secClass.encode('ascii', 'strict'))
 	satName = settings.str_to_c_char_p(satName, fixed_width=8)
@@ -1601,6 +1787,7 @@ def TleUpdateSatFrFieldsGP2(satKey, secClass, satName, bstar, elsetNum, incli, n
 	nDot02 = c.c_double(nDot02)
 	n2Dot06 = c.c_double(n2Dot06)
 	retcode = C_TLEDLL.TleUpdateSatFrFieldsGP2(satKey, secClass, satName, bstar, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum, nDot02, n2Dot06)
+	events.notify('update', satKey, source='tle')
 	return retcode
 
 ##TleUpdateSatFrFieldsSP
@@ -1641,7 +1828,7 @@ def TleUpdateSatFrFieldsSP(satKey, secClass, satName, bterm, ogParm, agom, elset
 	:return:
 		**retcode** (*int*) - 0 if the TLE is successfully updated, non-0 if there is an error.
 	"""
-	if not isinstance(satKey, settings.stay_int64):
+	if settings.DEBUG and not isinstance(satKey, settings.stay_int64):
 		raise TypeError("satKey is type %s, should be type %s" % (type(satKey), settings.stay_int64))
 	secClass = c.c_char(secClass.encode('ascii', 'strict'))
 	satName = settings.str_to_c_char_p(satName, fixed_width=8)
@@ -1657,4 +1844,5 @@ def TleUpdateSatFrFieldsSP(satKey, secClass, satName, bterm, ogParm, agom, elset
 	mnMotion = c.c_double(mnMotion)
 	revNum = c.c_int32(revNum)
 	retcode = C_TLEDLL.TleUpdateSatFrFieldsSP(satKey, secClass, satName, bterm, ogParm, agom, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum)
+	events.notify('update', satKey, source='tle')
 	return retcode
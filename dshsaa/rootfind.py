@@ -0,0 +1,137 @@
+#! /usr/bin/env python3
+
+"""
+rootfind.py refines many independent brackets at once, for the event finders built on the sgp4dll batch functions (passes, conjunction).
+
+Each function takes ``func(index, t)``, which evaluates the function of the brackets listed in the int array ``index`` at the times ``t``, one per entry. Every iteration makes a single call covering all the brackets that are still converging, so the caller can serve it with one batch propagation.
+
+.. code-block:: python
+
+	from dshsaa import rootfind
+
+	def func(index, t):
+		return elevation(site[index], t) - mask
+	rise = rootfind.regula_falsi(func, lo, hi, 1.0 / 86400.0)
+"""
+import numpy as np
+import pdb
+
+# golden section ratio
+_INVPHI = (np.sqrt(5.0) - 1.0) / 2.0
+
+# safety cap on iterations, convergence normally takes far fewer
+MAX_ITERATIONS = 60
+
+def regula_falsi(func, lo, hi, tolerance, flo=None, fhi=None):
+	"""
+	Finds a root inside each bracket with the Illinois variant of regula falsi, which converges in a handful of steps on smooth functions and never leaves the bracket.
+
+	:param callable func: ``func(index, t)``, returns the function values of the brackets ``index`` at times ``t``.
+	:param numpy.ndarray lo: float64 array of shape (n,), the left ends of the brackets.
+	:param numpy.ndarray hi: float64 array of shape (n,), the right ends. The function must change sign between lo and hi, zero counting as positive.
+	:param float tolerance: The accuracy of the roots.
+	:param flo: The function values at lo, if already known.
+	:type flo: numpy.ndarray, optional
+	:param fhi: The function values at hi, if already known.
+	:type fhi: numpy.ndarray, optional
+	:return:
+		**t** (*numpy.ndarray*) - float64 array of shape (n,), the roots.
+	"""
+	lo = np.array(lo, dtype=np.float64)
+	hi = np.array(hi, dtype=np.float64)
+	n = lo.shape[0]
+	if n == 0:
+		return lo
+	index = np.arange(n)
+	flo = func(index, lo) if flo is None else np.array(flo, dtype=np.float64)
+	fhi = func(index, hi) if fhi is None else np.array(fhi, dtype=np.float64)
+	hiPositive = fhi >= 0
+	# the last point evaluated, which is always one end of the bracket; none yet
+	t = np.full(n, np.nan)
+	side = np.zeros(n, dtype=np.int8)
+	# bracket widths of the last two iterations
+	widths = [np.full(n, np.inf), np.full(n, np.inf)]
+	active = np.ones(n, dtype=bool)
+	for iteration in range(MAX_ITERATIONS):
+		# false position, with a bisection fallback where the end values cannot be trusted, or where the bracket did
+		# not halve over the last two steps (flat functions, where even the Illinois variant is slow)
+		denom = fhi - flo
+		guess = hi - fhi * (hi - lo) / np.where(denom == 0, 1.0, denom)
+		slow = hi - lo > widths[0] / 2
+		widths = [widths[1], hi - lo]
+		guess = np.where(slow | (denom == 0) | ~np.isfinite(guess) | (guess <= lo) | (guess >= hi), (lo + hi) / 2, guess)
+		# a guess within half the tolerance of the last point is pushed half the tolerance past it, into the bracket,
+		# so that the bracket closes on the next evaluation instead of creeping up on the root from one side
+		near = np.abs(guess - t) < tolerance / 2
+		guess = np.where(near, t + np.where(t >= hi, -0.5, 0.5) * tolerance, guess)
+		# only the width of the bracket proves convergence, the guess of a converged bracket lies inside it
+		converged = hi - lo < tolerance
+		t = np.where(active, guess, t)
+		active &= ~converged
+		if not active.any():
+			break
+		idx = np.flatnonzero(active)
+		ft = func(idx, t[idx])
+		# the new point replaces the end with the same sign; when the same end is kept twice in a row the value at
+		# the other end is halved, which stops false position from stalling on one side
+		moveHi = (ft >= 0) == hiPositive[idx]
+		lo[idx] = np.where(moveHi, lo[idx], t[idx])
+		hi[idx] = np.where(moveHi, t[idx], hi[idx])
+		newFlo = np.where(moveHi, flo[idx], ft)
+		newFhi = np.where(moveHi, ft, fhi[idx])
+		newFlo = np.where(moveHi & (side[idx] == 1), newFlo / 2, newFlo)
+		newFhi = np.where(~moveHi & (side[idx] == -1), newFhi / 2, newFhi)
+		flo[idx] = newFlo
+		fhi[idx] = newFhi
+		side[idx] = np.where(moveHi, 1, -1)
+	return t
+
+def maximize(func, lo, hi, tolerance):
+	"""
+	Finds the maximum inside each bracket by successive parabolic interpolation, falling back on a golden section step wherever the parabola is no help. Minimize by negating the function.
+
+	:param callable func: ``func(index, t)``, returns the function values of the brackets ``index`` at times ``t``.
+	:param numpy.ndarray lo: float64 array of shape (n,), the left ends of the brackets.
+	:param numpy.ndarray hi: float64 array of shape (n,), the right ends.
+	:param float tolerance: The accuracy of the maxima.
+	:return:
+		- **t** (*numpy.ndarray*) - float64 array of shape (n,), the times of the maxima.
+		- **ft** (*numpy.ndarray*) - float64 array of shape (n,), the function values there.
+	"""
+	a = np.array(lo, dtype=np.float64)
+	b = np.array(hi, dtype=np.float64)
+	n = a.shape[0]
+	if n == 0:
+		return (a, a.copy())
+	index = np.arange(n)
+	x = (a + b) / 2
+	fa = func(index, a)
+	fb = func(index, b)
+	fx = func(index, x)
+	active = np.ones(n, dtype=bool)
+	for iteration in range(MAX_ITERATIONS):
+		# vertex of the parabola through (a, fa), (x, fx), (b, fb)
+		p = (x - a) ** 2 * (fx - fb) - (x - b) ** 2 * (fx - fa)
+		q = (x - a) * (fx - fb) - (x - b) * (fx - fa)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			u = x - 0.5 * p / q
+		golden = np.where(x - a > b - x, x - (1 - _INVPHI) * (x - a), x + (1 - _INVPHI) * (b - x))
+		bad = ~np.isfinite(u) | (u <= a) | (u >= b) | (np.abs(u - x) < tolerance / 4)
+		u = np.where(bad, golden, u)
+		active &= (b - a > tolerance) & ~((np.abs(u - x) < tolerance) & ~bad)
+		if not active.any():
+			break
+		idx = np.flatnonzero(active)
+		fu = func(idx, u[idx])
+		(ai, bi, xi, ui) = (a[idx], b[idx], x[idx], u[idx])
+		(fai, fbi, fxi) = (fa[idx], fb[idx], fx[idx])
+		better = fu > fxi
+		left = ui < xi
+		# keep the bracket around the best point so far
+		a[idx] = np.where(better, np.where(left, ai, xi), np.where(left, ui, ai))
+		fa[idx] = np.where(better, np.where(left, fai, fxi), np.where(left, fu, fai))
+		b[idx] = np.where(better, np.where(left, xi, bi), np.where(left, bi, ui))
+		fb[idx] = np.where(better, np.where(left, fxi, fbi), np.where(left, fbi, fu))
+		x[idx] = np.where(better, ui, xi)
+		fx[idx] = np.where(better, fu, fxi)
+	return (x, fx)
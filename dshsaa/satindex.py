@@ -0,0 +1,133 @@
+#! /usr/bin/env python3
+
+"""
+satindex.py maps satellite numbers to the satKeys loaded in tledll, without a DLL call per lookup.
+
+tledll.TleGetSatKey searches the DLL's tree on every call and only returns the first satKey of a satellite, and TleGetLoaded returns satKeys with no satellite number. The SatKeyIndex keeps a dictionary from satNum to the satKeys of that satellite, ordered by epoch, and follows the TLE tree through dshsaa.raw.events: satKeys added by the TleAddSatFr* wrappers are read once (TleDataToArray) at the next lookup, removed ones are dropped, and after TleLoadFile the loaded satKeys are compared against the index.
+
+.. code-block:: python
+
+	from dshsaa import satindex
+
+	index = satindex.SatKeyIndex()
+	satKey = index.latest(25544)	# the most recent elset of the ISS
+	index.satKeys(25544)		# every elset of the ISS, oldest first
+"""
+import bisect
+from dshsaa.raw import settings, tledll, events
+import pdb
+
+class SatKeyIndex:
+	"""
+	A satNum to satKey index over the TLEs loaded in tledll, see the module description. tledll must be initialized (TleInit) before the index is used.
+
+	:ivar int reads: The number of satKeys read from tledll so far.
+	"""
+	def __init__(self):
+		self._bySatNum = {}
+		self._entry = {}
+		self._pending = set()
+		self._reload = True
+		self.reads = 0
+		self._callback = events.subscribe_weak(self._on_event, source='tle')
+
+	def satKeys(self, satNum):
+		"""
+		Every loaded satKey of a satellite.
+
+		:param int satNum: Satellite number.
+		:return:
+			**satKeys** (*list*) - The satKeys (settings.stay_int64), oldest epoch first. Empty if the satellite is not loaded.
+		"""
+		self._refresh()
+		return [settings.stay_int64(satKey) for (epoch, satKey) in self._bySatNum.get(satNum, ())]
+
+	def latest(self, satNum):
+		"""
+		The satKey of the most recent element set of a satellite.
+
+		:param int satNum: Satellite number.
+		:return:
+			**satKey** (*settings.stay_int64*) - The satKey with the latest epoch, or None if the satellite is not loaded.
+		"""
+		self._refresh()
+		entries = self._bySatNum.get(satNum)
+		if not entries:
+			return None
+		return settings.stay_int64(entries[-1][1])
+
+	def satNum(self, satKey):
+		"""
+		The satellite number of a loaded satKey.
+
+		:param satKey: The satellite's unique key.
+		:type satKey: settings.stay_int64, int
+		:return:
+			**satNum** (*int*) - The satellite number, or None if the satKey is not loaded.
+		"""
+		self._refresh()
+		entry = self._entry.get(settings.int64_value(satKey))
+		return None if entry is None else entry[0]
+
+	def close(self):
+		"""
+		Empties the index and stops following tledll.
+		"""
+		events.unsubscribe(self._callback)
+		self._bySatNum.clear()
+		self._entry.clear()
+		self._pending.clear()
+
+	def __contains__(self, satNum):
+		self._refresh()
+		return satNum in self._bySatNum
+
+	def __len__(self):
+		self._refresh()
+		return len(self._entry)
+
+	def _refresh(self):
+		# read the satKeys added since the last lookup, and after TleLoadFile any satKey the index does not know yet
+		if self._reload:
+			loaded = set(int(satKey.value) for satKey in tledll.TleGetLoaded())
+			for satKey in list(self._entry):
+				if satKey not in loaded:
+					self._drop(satKey)
+			self._pending |= loaded - set(self._entry)
+			self._reload = False
+		while self._pending:
+			satKey = self._pending.pop()
+			(retcode, xa_tle, xs_tle) = tledll.TleDataToArray(settings.stay_int64(satKey))
+			self.reads += 1
+			if retcode != 0:
+				continue
+			satNum = int(xa_tle[tledll.XA_TLE_SATNUM])
+			entry = (xa_tle[tledll.XA_TLE_EPOCH], satKey)
+			bisect.insort(self._bySatNum.setdefault(satNum, []), entry)
+			self._entry[satKey] = (satNum, entry)
+
+	def _drop(self, satKey):
+		self._pending.discard(satKey)
+		found = self._entry.pop(satKey, None)
+		if found is None:
+			return
+		(satNum, entry) = found
+		entries = self._bySatNum[satNum]
+		entries.remove(entry)
+		if not entries:
+			del self._bySatNum[satNum]
+
+	def _on_event(self, event, satKey):
+		if event == 'remove_all':
+			self._bySatNum.clear()
+			self._entry.clear()
+			self._pending.clear()
+			self._reload = False
+		elif event == 'load':
+			self._reload = True
+		elif event == 'remove':
+			self._drop(satKey)
+		elif satKey > 0:
+			# 'add' and 'update', an update may change the epoch
+			self._drop(satKey)
+			self._pending.add(satKey)
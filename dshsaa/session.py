@@ -0,0 +1,152 @@
+#! /usr/bin/env python3
+
+"""
+session.py runs the SAA initialization sequence in one call.
+
+Using the DLLs takes DllMainInit, then TimeFuncInit, TleInit, EnvInit and AstroFuncInit with the maindll handle, then Sgp4SetLicFilePath and Sgp4Init, each with its own retcode check. The DLLs keep their state per process, so this only needs to happen once per process. session.start does it the first time it is called and returns the same Session on every later call, so any module can call it without knowing whether the DLLs are ready.
+
+The Session also times each step, and offers warm-up methods which load the timing constants, build a TConTable, or load a catalog, so that a worker process has everything in memory before its first request.
+
+.. code-block:: python
+
+	from dshsaa import session
+
+	sess = session.start(licFilePath='./dshsaa/libdll/')
+	sess.load_timing_constants('tcon.txt')
+	cat = sess.load_catalog('catalog.3le')
+	sess.timings	# {'maindll': 0.002, 'timedll': 0.001, ..., 'catalog': 0.8}
+"""
+import time
+import pdb
+
+_session = None
+
+def start(licFilePath='./dshsaa/libdll/', logFile=None):
+	"""
+	Initializes every SAA DLL, once per process.
+
+	:param str licFilePath: The directory holding the SGP4 license file, passed to Sgp4SetLicFilePath.
+	:param logFile: A log file for maindll to open (OpenLogFile).
+	:type logFile: str, optional
+	:return:
+		**session** (*Session*) - The session of this process. Later calls return the same session and ignore their arguments.
+	"""
+	global _session
+	if _session is None:
+		session = Session(licFilePath, logFile)
+		session._init()
+		_session = session
+	return _session
+
+def current():
+	"""
+	The session of this process.
+
+	:return:
+		**session** (*Session*) - The session, or None if start has not been called.
+	"""
+	return _session
+
+class Session:
+	"""
+	The initialized SAA DLLs of this process, see start. Not intended to be built directly.
+
+	:ivar settings.stay_int64 maindll_handle: The handle returned by DllMainInit.
+	:ivar dict timings: Seconds taken by each step: loading and initializing each DLL ('maindll', 'timedll', 'tledll', 'envdll', 'astrodll', 'sgp4dll'), then each warm-up ('tcon', 'tconTable', 'catalog').
+	:ivar timedll.TConTable tconTable: The table built by build_tcon_table, if any.
+	"""
+	def __init__(self, licFilePath, logFile):
+		self.licFilePath = licFilePath
+		self.logFile = logFile
+		self.maindll_handle = None
+		self.timings = {}
+		self.tconTable = None
+
+	def _init(self):
+		from dshsaa.raw import maindll, timedll, tledll, envdll, astrodll, sgp4dll
+		with self._timed('maindll'):
+			maindll.C_MAINDLL.load()
+			self.maindll_handle = maindll.DllMainInit()
+			if self.logFile is not None:
+				retcode = maindll.OpenLogFile(self.logFile)
+				if retcode != 0:
+					raise Exception("Failed to open log file %s with error code %i" % (self.logFile, retcode))
+		for (name, lib, initer) in [('timedll', timedll.C_TIMEDLL, timedll.TimeFuncInit),
+									('tledll', tledll.C_TLEDLL, tledll.TleInit),
+									('envdll', envdll.C_ENVDLL, envdll.EnvInit),
+									('astrodll', astrodll.C_ASTRODLL, astrodll.AstroFuncInit)]:
+			with self._timed(name):
+				lib.load()
+				retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (name, retcode))
+		with self._timed('sgp4dll'):
+			sgp4dll.C_SGP4DLL.load()
+			sgp4dll.Sgp4SetLicFilePath(self.licFilePath) #get the license before initing sgp4
+			retcode = sgp4dll.Sgp4Init(self.maindll_handle)
+		if retcode != 0:
+			raise Exception("Failed to init sgp4dll with error code %i" % (retcode))
+
+	def load_timing_constants(self, tconFile):
+		"""
+		Warm-up: loads timing constants into timedll (TConLoadFile).
+
+		:param str tconFile: The timing constants file.
+		"""
+		from dshsaa.raw import timedll
+		with self._timed('tcon'):
+			retcode = timedll.TConLoadFile(tconFile)
+		if retcode != 0:
+			raise Exception("Failed to load timing constants from %s with error code %i" % (tconFile, retcode))
+
+	def build_tcon_table(self, startDs50UTC, stopDs50UTC, **kwargs):
+		"""
+		Warm-up: builds a timedll.TConTable from the loaded timing constants, for the numpy fast path of the timedll *Array functions. Build it after load_timing_constants.
+
+		:param float startDs50UTC: The first time the table must cover, days since 1950, UTC.
+		:param float stopDs50UTC: The last time the table must cover, days since 1950, UTC.
+		:param kwargs: Passed on to timedll.TConTable (step, thetaStep).
+		:return:
+			**table** (*timedll.TConTable*) - The table, also kept as **tconTable**.
+		"""
+		from dshsaa.raw import timedll
+		with self._timed('tconTable'):
+			self.tconTable = timedll.TConTable(startDs50UTC, stopDs50UTC, **kwargs)
+		return self.tconTable
+
+	def load_catalog(self, tles, sgp4=True):
+		"""
+		Warm-up: loads a catalog into tledll and, by default, initializes every satellite in sgp4dll.
+
+		:param tles: A TLE or 3LE file name, or the TLEs as (line1, line2) string pairs.
+		:type tles: str, list
+		:param bool sgp4: If True, Sgp4InitSat every satellite.
+		:return:
+			**catalog** (*catalog.TleCatalog*) - The loaded catalog.
+		"""
+		from dshsaa import catalog
+		with self._timed('catalog'):
+			if isinstance(tles, str):
+				cat = catalog.TleCatalog.from_file(tles)
+			else:
+				cat = catalog.TleCatalog.from_lines(tles)
+			if sgp4:
+				cat.init_sgp4()
+		return cat
+
+	def _timed(self, name):
+		return _Timer(self.timings, name)
+
+class _Timer:
+	# context manager adding the seconds spent in its block to timings[name]
+	def __init__(self, timings, name):
+		self.timings = timings
+		self.name = name
+
+	def __enter__(self):
+		self.t0 = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.t0
+		return False
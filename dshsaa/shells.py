@@ -0,0 +1,289 @@
+#! /usr/bin/env python3
+
+"""
+shells.py indexes the radial shells of satellites, perigee to apogee, to discard pairs of satellites which can never meet before any per-pair work is done.
+
+The ShellIndex keeps the shells in arrays sorted by perigee. A query for the shells crossing [rmin, rmax] takes the satellites whose perigee is at most rmax (a binary search), and reports those among them whose apogee is at least rmin, by repeatedly taking the highest apogee of a range from a sparse table. That is O(log N + k) for k results.
+
+Satellites can be added and removed at any time. New shells wait in a small unsorted buffer and removed ones are flagged, until either grows past an eighth of the index and the arrays are rebuilt, so updates cost O(log N) amortized. Satellites removed from the DLLs (TleRemoveSat, Sgp4RemoveSat, ...) are dropped automatically, see dshsaa.raw.events. So are satellites whose TLE changes (TleUpdateSatFr*, TleSetField), since their old shell no longer holds; call add with the new shell to put them back. Sgp4InitSat and Sgp4ReepochTLE leave the TLE as it is and keep the shell. Satellites added to the DLLs are not indexed until add is called for them, since the index cannot know their shells.
+
+.. code-block:: python
+
+	from dshsaa import shells
+
+	index = shells.ShellIndex.from_catalog(catalog)
+	index.query(6878.0, 6978.0)	# satKeys with a shell crossing 500 to 600 km altitude
+	index.pairs(margin=15.0)	# every pair of satKeys whose shells come within 15 km
+"""
+import numpy as np
+from dshsaa.raw import settings, sgp4dll, events
+import pdb
+
+# WGS-72 gravitational parameter (km^3/s^2), as used by SGP4
+MU = 398600.8
+
+# the buffer of new shells and the removed shells are merged in once they pass this many, or an eighth of the index
+_MIN_BUFFER = 64
+
+def shells_from_elements(mnMotion, eccen):
+	"""
+	Perigee and apogee radii from mean elements, such as the mnMotion and eccen columns of a catalog.TleCatalog. No propagation is needed.
+
+	:param numpy.ndarray mnMotion: Mean motion (rev/day).
+	:param numpy.ndarray eccen: Eccentricity.
+	:return:
+		- **perigee** (*numpy.ndarray*) - Perigee radius (km).
+		- **apogee** (*numpy.ndarray*) - Apogee radius (km).
+	"""
+	n = np.asarray(mnMotion, dtype=np.float64) * 2 * np.pi / 86400.0
+	eccen = np.asarray(eccen, dtype=np.float64)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		a = np.cbrt(MU / n ** 2)
+	return (a * (1 - eccen), a * (1 + eccen))
+
+def shells_from_sgp4(satKeys, ds50UTC):
+	"""
+	Perigee and apogee from Sgp4GetPropOut index 2, after propagating each satellite to a time. The satellites must be initialized with Sgp4InitSat.
+
+	:param satKeys: The satellites.
+	:type satKeys: settings.stay_int64[nsat], int[nsat]
+	:param float ds50UTC: The time at which to read the shells, days since 1950, UTC.
+	:return:
+		- **perigee** (*numpy.ndarray*) - float64 array of shape (nsat,), perigee (km) as reported by Sgp4GetPropOut, NaN where the propagation fails.
+		- **apogee** (*numpy.ndarray*) - float64 array of shape (nsat,), apogee (km) as reported by Sgp4GetPropOut, NaN where the propagation fails.
+	"""
+	perigee = np.full(len(satKeys), np.nan)
+	apogee = np.full(len(satKeys), np.nan)
+	for (k, satKey) in enumerate(settings.int64_values(satKeys)):
+		satKey = settings.stay_int64(satKey)
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTC(satKey, ds50UTC)
+		if retcode != 0:
+			continue
+		(retcode, nodalApPer) = sgp4dll.Sgp4GetPropOut(satKey, 2)
+		if retcode == 0:
+			(apogee[k], perigee[k]) = (nodalApPer[1], nodalApPer[2])
+	return (perigee, apogee)
+
+class ShellIndex:
+	"""
+	An index of satellite shells, see the module description. Perigee and apogee may be radii or altitudes, as long as every shell and query uses the same.
+
+	:ivar int rebuilds: The number of times the sorted arrays have been rebuilt.
+	"""
+	def __init__(self):
+		self._key = np.zeros(0, dtype=np.int64)
+		self._perigee = np.zeros(0, dtype=np.float64)
+		self._apogee = np.zeros(0, dtype=np.float64)
+		self._alive = np.zeros(0, dtype=bool)
+		self._table = []
+		self._position = {}
+		self._pending = {}
+		self._dead = 0
+		self.rebuilds = 0
+		self._callbacks = [events.subscribe_weak(self._on_tle_event, source='tle'),
+						   events.subscribe_weak(self._on_sgp4_event, source='sgp4')]
+
+	@classmethod
+	def from_catalog(cls, catalog):
+		"""
+		Builds an index of perigee and apogee radii from the elements of a catalog.TleCatalog.
+
+		:param catalog.TleCatalog catalog: The catalog.
+		:return:
+			**index** (*ShellIndex*) - The new index.
+		"""
+		index = cls()
+		(perigee, apogee) = shells_from_elements(catalog.data['mnMotion'], catalog.data['eccen'])
+		index.add(catalog.data['satKey'], perigee, apogee)
+		return index
+
+	@classmethod
+	def from_sgp4(cls, satKeys, ds50UTC):
+		"""
+		Builds an index from Sgp4GetPropOut, see shells_from_sgp4. Satellites which fail to propagate are left out.
+
+		:param satKeys: The satellites.
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param float ds50UTC: The time at which to read the shells, days since 1950, UTC.
+		:return:
+			**index** (*ShellIndex*) - The new index.
+		"""
+		index = cls()
+		(perigee, apogee) = shells_from_sgp4(satKeys, ds50UTC)
+		index.add(satKeys, perigee, apogee)
+		return index
+
+	def add(self, satKeys, perigee, apogee):
+		"""
+		Adds shells, replacing those of satKeys already in the index. Shells with a NaN bound are skipped.
+
+		:param satKeys: The satellites.
+		:type satKeys: settings.stay_int64[n], int[n]
+		:param numpy.ndarray perigee: Perigee of each satellite (km).
+		:param numpy.ndarray apogee: Apogee of each satellite (km).
+		"""
+		for (satKey, low, high) in zip(settings.int64_values(satKeys), np.asarray(perigee, dtype=np.float64).tolist(), np.asarray(apogee, dtype=np.float64).tolist()):
+			if np.isnan(low) or np.isnan(high):
+				continue
+			self._discard(satKey)
+			self._pending[satKey] = (low, high)
+		self._maybe_rebuild()
+
+	def remove(self, satKeys):
+		"""
+		Removes shells. Removing a satKey which is not in the index is harmless.
+
+		:param satKeys: The satellites.
+		:type satKeys: settings.stay_int64[n], int[n]
+		"""
+		for satKey in settings.int64_values(satKeys):
+			self._discard(satKey)
+		self._maybe_rebuild()
+
+	def clear(self):
+		"""
+		Removes every shell.
+		"""
+		self._pending.clear()
+		self._set_arrays(np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+
+	def close(self):
+		"""
+		Removes every shell and stops listening for satellite changes in the DLLs.
+		"""
+		self.clear()
+		for callback in self._callbacks:
+			events.unsubscribe(callback)
+
+	def __len__(self):
+		return len(self._position) - self._dead + len(self._pending)
+
+	def __contains__(self, satKey):
+		satKey = settings.int64_value(satKey)
+		if satKey in self._pending:
+			return True
+		position = self._position.get(satKey)
+		return position is not None and bool(self._alive[position])
+
+	def shell(self, satKey):
+		"""
+		The shell of one satellite.
+
+		:param satKey: The satellite.
+		:type satKey: settings.stay_int64, int
+		:return:
+			**shell** (*tuple*) - (perigee, apogee), or None if the satellite is not in the index.
+		"""
+		satKey = settings.int64_value(satKey)
+		if satKey in self._pending:
+			return self._pending[satKey]
+		position = self._position.get(satKey)
+		if position is None or not self._alive[position]:
+			return None
+		return (float(self._perigee[position]), float(self._apogee[position]))
+
+	def query(self, rmin, rmax):
+		"""
+		The satellites whose shell crosses [rmin, rmax], in O(log N + k).
+
+		:param float rmin: The lower bound (km).
+		:param float rmax: The upper bound (km).
+		:return:
+			**satKeys** (*numpy.ndarray*) - int64 array of the matching satKeys, in no particular order.
+		"""
+		found = []
+		# the shells with perigee <= rmax are a prefix of the sorted arrays, report those with apogee >= rmin
+		ranges = [(0, int(np.searchsorted(self._perigee, rmax, side='right')))]
+		while ranges:
+			(lo, hi) = ranges.pop()
+			if lo >= hi:
+				continue
+			top = self._argmax(lo, hi)
+			if self._apogee[top] < rmin:
+				continue
+			if self._alive[top]:
+				found.append(self._key[top])
+			ranges.append((lo, top))
+			ranges.append((top + 1, hi))
+		found.extend(satKey for (satKey, (low, high)) in self._pending.items() if low <= rmax and high >= rmin)
+		return np.array(found, dtype=np.int64)
+
+	def pairs(self, margin=0.0):
+		"""
+		Every pair of satellites whose shells come within margin of each other. Sorting by perigee turns this into a sweep, O(N log N) plus the number of pairs.
+
+		:param float margin: How far apart two shells may be and still count as crossing (km).
+		:return:
+			**pairs** (*numpy.ndarray*) - int64 array of shape (npair, 2), satKey pairs with pairs[:, 0] < pairs[:, 1].
+		"""
+		self._rebuild()
+		n = self._key.shape[0]
+		# partners of the i-th shell by perigee are the following ones whose perigee is below its apogee
+		stop = np.searchsorted(self._perigee, self._apogee + margin, side='right')
+		start = np.arange(n) + 1
+		counts = np.maximum(stop - start, 0)
+		i = np.repeat(np.arange(n), counts)
+		j = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(i.shape[0])
+		(a, b) = (self._key[i], self._key[j])
+		return np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1)
+
+	def _discard(self, satKey):
+		if self._pending.pop(satKey, None) is not None:
+			return
+		position = self._position.get(satKey)
+		if position is not None and self._alive[position]:
+			self._alive[position] = False
+			self._dead += 1
+
+	def _maybe_rebuild(self):
+		if len(self._pending) + self._dead > max(_MIN_BUFFER, len(self._position) // 8):
+			self._rebuild()
+
+	def _rebuild(self):
+		# merge the buffer into the sorted arrays and drop the removed shells
+		if not self._pending and not self._dead:
+			return
+		alive = self._alive
+		key = np.concatenate([self._key[alive], np.fromiter(self._pending.keys(), dtype=np.int64, count=len(self._pending))])
+		bounds = np.array(list(self._pending.values()), dtype=np.float64).reshape(-1, 2)
+		perigee = np.concatenate([self._perigee[alive], bounds[:, 0]])
+		apogee = np.concatenate([self._apogee[alive], bounds[:, 1]])
+		self._pending.clear()
+		order = np.argsort(perigee, kind='stable')
+		self._set_arrays(key[order], perigee[order], apogee[order])
+		self.rebuilds += 1
+
+	def _set_arrays(self, key, perigee, apogee):
+		self._key = key
+		self._perigee = perigee
+		self._apogee = apogee
+		self._alive = np.ones(key.shape[0], dtype=bool)
+		self._position = dict(zip(key.tolist(), range(key.shape[0])))
+		self._dead = 0
+		# sparse table, _table[j][i] is the index of the highest apogee in [i, i + 2**j)
+		self._table = [np.arange(key.shape[0])]
+		width = 1
+		while 2 * width <= key.shape[0]:
+			previous = self._table[-1]
+			(left, right) = (previous[:-width], previous[width:])
+			self._table.append(np.where(apogee[left] >= apogee[right], left, right))
+			width *= 2
+
+	def _argmax(self, lo, hi):
+		# index of the highest apogee in [lo, hi), from two overlapping power of two ranges
+		j = (hi - lo).bit_length() - 1
+		(left, right) = (self._table[j][lo], self._table[j][hi - (1 << j)])
+		return int(left if self._apogee[left] >= self._apogee[right] else right)
+
+	def _on_tle_event(self, event, satKey):
+		# a changed TLE makes the shell stale, it is dropped rather than kept wrong
+		if event == 'update':
+			self.remove([satKey])
+		else:
+			self._on_sgp4_event(event, satKey)
+
+	def _on_sgp4_event(self, event, satKey):
+		if event == 'remove_all':
+			self.clear()
+		elif event == 'remove':
+			self.remove([satKey])
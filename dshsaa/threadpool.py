@@ -0,0 +1,161 @@
+#! /usr/bin/env python3
+
+"""
+threadpool.py spreads the batch forms of the stateless astrodll and timedll functions over several threads.
+
+ctypes releases the GIL for the duration of every foreign call, so while one thread is inside the DLL the others can run. Many astrodll conversions and the timedll time conversions are pure functions of their inputs: they read the loaded constants but keep no state between calls. For those, the ThreadPool cuts the rows of a batch into contiguous chunks, runs the batch function on each chunk in a thread, and writes every chunk into its slice of the output arrays, so that the result is bit for bit the result of the serial call. This uses every core without the start-up cost and the catalog copies of the worker processes of engine.py.
+
+Only the functions of THREAD_SAFE are accepted. Functions which touch the satellite trees of tledll and sgp4dll, or any other DLL state (Sgp4GetPropOut, for one, is not thread safe), must keep running on one thread. test_threadpool runs every function of THREAD_SAFE from many threads at once and compares the results with the serial ones; run it again before adding a function or after upgrading the DLLs.
+
+The python overhead of each row still holds the GIL, so the gain depends on how long each DLL call takes compared to that overhead; bench_threadpool measures it.
+
+.. code-block:: python
+
+	from dshsaa import threadpool
+
+	with threadpool.ThreadPool() as pool:
+		xa_topo = pool.ECIToTopoCompsBatch(theta, lat, senPos, satPos, satVel)
+		ds50ET = pool.run('UTCToETArray', ds50UTC)
+"""
+import concurrent.futures
+import os
+import numpy as np
+from dshsaa.raw import settings, astrodll, timedll
+import pdb
+
+THREAD_SAFE = {'ECIToEFGBatch': (astrodll, 1),
+			   'ECIToTopoCompsBatch': (astrodll, 2),
+			   'ECRToEFGBatch': (astrodll, 2),
+			   'EFGPosToLLHBatch': (astrodll, 0),
+			   'EFGToECIBatch': (astrodll, 1),
+			   'EFGToECRBatch': (astrodll, 2),
+			   'KepToPosVelBatch': (astrodll, 0),
+			   'LLHToEFGPosBatch': (astrodll, 0),
+			   'PosVelToKepBatch': (astrodll, 0),
+			   'SolveKepEqtnBatch': (astrodll, 0),
+			   'XYZToLLHBatch': (astrodll, 1),
+			   'TAIToUT1Array': (timedll, 0),
+			   'TAIToUTCArray': (timedll, 0),
+			   'ThetaGrnwchFK5Array': (timedll, 0),
+			   'UTCToETArray': (timedll, 0),
+			   'UTCToTAIArray': (timedll, 0),
+			   'UTCToUT1Array': (timedll, 0)}
+"""
+The functions which may run on several threads at once, by name, with their module and the index of the argument whose rows are split between the threads. The other array arguments with as many rows are split alongside it; scalars are passed to every chunk. The timedll functions take arrays of any shape, which are split as flat arrays.
+"""
+
+class ThreadPool:
+	"""
+	A pool of threads running the functions of THREAD_SAFE on chunks of their batches, see the module description. The functions are also available as methods of the pool, such as ``pool.KepToPosVelBatch(metricKep)``.
+
+	:param int nthreads: The number of threads. Defaults to ``os.cpu_count()``.
+	:param int minChunk: The smallest number of rows given to a thread. Batches shorter than two chunks run on the calling thread.
+	"""
+	def __init__(self, nthreads=None, minChunk=1024):
+		if nthreads is None:
+			nthreads = os.cpu_count() or 1
+		if nthreads < 1:
+			raise Exception("nthreads must be at least 1, got %s" % (nthreads))
+		if minChunk < 1:
+			raise Exception("minChunk must be at least 1, got %s" % (minChunk))
+		self.nthreads = int(nthreads)
+		self.minChunk = int(minChunk)
+		self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.nthreads, thread_name_prefix='dshsaa-threadpool')
+
+	def run(self, func, *args, out=None, **kwargs):
+		"""
+		Runs one function of THREAD_SAFE over the threads of the pool.
+
+		:param func: The function, or its name.
+		:type func: callable, str
+		:param args: Its arguments.
+		:param out: Preallocated output arrays, as taken by the function.
+		:type out: numpy.ndarray, tuple, optional
+		:param kwargs: Its other keyword arguments. A timedll function given a table runs on the calling thread, since the table path does not call the DLL.
+		:return: Whatever the function returns for the whole batch.
+		"""
+		name = func if isinstance(func, str) else getattr(func, '__name__', None)
+		if name not in THREAD_SAFE:
+			raise Exception("%s is not known to be thread safe, see threadpool.THREAD_SAFE" % (name))
+		(module, rowsArg) = THREAD_SAFE[name]
+		func = getattr(module, name)
+		if module is timedll:
+			return self._run_elements(func, args, out, kwargs)
+		return self._run_rows(func, rowsArg, args, out, kwargs)
+
+	def close(self):
+		"""
+		Waits for the running batches and stops the threads. Calling close more than once is harmless.
+		"""
+		self._executor.shutdown(wait=True)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, tb):
+		self.close()
+
+	def __getattr__(self, name):
+		if name in THREAD_SAFE:
+			return lambda *args, **kwargs: self.run(name, *args, **kwargs)
+		raise AttributeError(name)
+
+	def _chunks(self, n):
+		# contiguous [start, stop) bounds, one per thread, or None to run on the calling thread
+		nchunk = min(self.nthreads, n // self.minChunk)
+		if nchunk < 2:
+			return None
+		bounds = np.linspace(0, n, nchunk + 1).round().astype(int).tolist()
+		return list(zip(bounds[:-1], bounds[1:]))
+
+	def _run_rows(self, func, rowsArg, args, out, kwargs):
+		args = [np.asarray(arg) if isinstance(arg, (list, tuple)) else arg for arg in args]
+		n = np.shape(args[rowsArg])[0] if np.ndim(args[rowsArg]) else 0
+		chunks = self._chunks(n)
+		if chunks is None:
+			return func(*args, out=out, **kwargs)
+		split = [isinstance(arg, np.ndarray) and arg.ndim >= 1 and arg.shape[0] == n for arg in args]
+		def chunk_args(start, stop):
+			return [arg[start:stop] if s else arg for (arg, s) in zip(args, split)]
+		if out is None:
+			# an empty batch gives the shapes and types of the outputs
+			empty = func(*chunk_args(0, 0), **kwargs)
+			single = isinstance(empty, np.ndarray)
+			outputs = [np.empty((n,) + ar.shape[1:], dtype=ar.dtype) for ar in ([empty] if single else empty)]
+		else:
+			single = isinstance(out, np.ndarray)
+			outputs = [out] if single else list(out)
+			for ar in outputs:
+				if np.shape(ar)[:1] != (n,):
+					raise Exception("output array has shape %s, expecting %i rows" % (np.shape(ar), n))
+		# every chunk writes into its own rows of the outputs
+		def work(start, stop):
+			chunkOut = [ar[start:stop] for ar in outputs]
+			func(*chunk_args(start, stop), out=chunkOut[0] if single else tuple(chunkOut), **kwargs)
+		self._wait([self._executor.submit(work, start, stop) for (start, stop) in chunks])
+		return outputs[0] if single else tuple(outputs)
+
+	def _run_elements(self, func, args, out, kwargs):
+		if kwargs.get('table') is not None:
+			return func(*args, out=out, **kwargs)
+		values = np.asarray(args[0], dtype=np.float64)
+		chunks = self._chunks(values.size)
+		if chunks is None:
+			return func(values, *args[1:], out=out, **kwargs)
+		flat = values.reshape(-1)
+		if out is None:
+			result = np.empty(values.shape, dtype=np.float64)
+		else:
+			result = settings.verify_out_array(out, values.shape)
+		# result is C contiguous, so the chunks write into it through a flat view
+		target = result.reshape(-1)
+		def work(start, stop):
+			func(flat[start:stop], *args[1:], out=target[start:stop], **kwargs)
+		self._wait([self._executor.submit(work, start, stop) for (start, stop) in chunks])
+		return result
+
+	def _wait(self, futures):
+		# wait for every chunk, then raise the first error
+		concurrent.futures.wait(futures)
+		for future in futures:
+			future.result()
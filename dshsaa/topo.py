@@ -0,0 +1,214 @@
+#! /usr/bin/env python3
+
+"""
+topo.py computes look angles from a network of ground sites to many propagated satellites.
+
+astrodll.ECIToTopoComps handles one site, one satellite and one time per call. The TopoEngine works on whole arrays. It takes site coordinates and satellite states in the layout returned by the sgp4dll batch functions, and fills in the ten topocentric components for every (site, satellite, time) triple. Per time step it works out Greenwich sidereal time and the site ECI positions once, and shares them across every site and satellite.
+
+With an elevation mask, only the triples above the mask are computed and kept. A cheap numpy elevation test removes the triples below the horizon before any DLL call, so the result only grows with the number of visible triples:
+
+.. code-block:: python
+
+	from dshsaa import topo
+
+	sites = np.array([[38.8, -104.5, 1.9], [64.3, -149.2, 0.2]]) # lat (deg), lon (deg), height (km)
+	engine = topo.TopoEngine(sites)
+	(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, ds50UTC)
+	xa_topo = engine.LookAngles(ds50UTC, pos, vel) # (nsite, nsat, ntime, 10)
+	(site, sat, time, xa_topo) = engine.Visible(ds50UTC, pos, vel, minElevation=10.0)
+"""
+import numpy as np
+from dshsaa.raw import settings, astrodll, timedll
+import pdb
+
+XA_TOPO_RA = 0
+XA_TOPO_DEC = 1
+XA_TOPO_AZ = 2
+XA_TOPO_EL = 3
+XA_TOPO_RANGE = 4
+XA_TOPO_RADOT = 5
+XA_TOPO_DECDOT = 6
+XA_TOPO_AZDOT = 7
+XA_TOPO_ELDOT = 8
+XA_TOPO_RANGEDOT = 9
+XA_TOPO_SIZE = 10
+
+# triples within this many degrees below the mask by the numpy test still go to the DLL, which has the final word
+_MASK_MARGIN = 0.05
+
+# LookAngles hands the DLL about this many rows at a time
+_BLOCK_ROWS = 4096
+
+class TopoEngine:
+	"""
+	Look angles from a fixed set of ground sites. astrodll must be initialized, and timedll too if no table is given.
+
+	:param numpy.ndarray sites: (nsite, 3) array of geodetic latitude (deg), longitude (deg), and height (km) of each site.
+	:ivar numpy.ndarray senEFG: (nsite, 3) array of site positions in EFG (km).
+	"""
+	def __init__(self, sites):
+		self.sites = np.array(sites, dtype=np.float64, ndmin=2)
+		if self.sites.ndim != 2 or self.sites.shape[1] != 3:
+			raise Exception("sites has shape %s, expecting (nsite, 3)" % (self.sites.shape,))
+		self.senEFG = astrodll.LLHToEFGPosBatch(self.sites)
+		self._lat = np.radians(self.sites[:, 0])
+		self._lon = np.radians(self.sites[:, 1])
+
+	@property
+	def nsite(self):
+		"""
+		The number of sites.
+		"""
+		return self.sites.shape[0]
+
+	def ThetaG(self, ds50UTC, table=None):
+		"""
+		Greenwich mean sidereal time at each time, computed once per time and shared by every site and satellite.
+
+		:param numpy.ndarray ds50UTC: float64 array of shape (ntime,), days since 1950, UTC.
+		:param table: Timing constants table for the numpy fast path, see timedll.TConTable.
+		:type table: timedll.TConTable, optional
+		:return:
+			**thetaG** (*numpy.ndarray*) - float64 array of shape (ntime,), Greenwich mean sidereal time (rad).
+		"""
+		ds50UT1 = timedll.UTCToUT1Array(ds50UTC, table=table)
+		return timedll.ThetaGrnwchFK5Array(ds50UT1, table=table)
+
+	def SensorECI(self, thetaG):
+		"""
+		The ECI position of every site at each sidereal time.
+
+		:param numpy.ndarray thetaG: float64 array of shape (ntime,), Greenwich mean sidereal time (rad).
+		:return:
+			**senECI** (*numpy.ndarray*) - float64 array of shape (ntime, nsite, 3), site positions in ECI (km).
+		"""
+		thetaG = np.asarray(thetaG, dtype=np.float64)
+		ntime = thetaG.shape[0]
+		posEFG = np.broadcast_to(self.senEFG, (ntime, self.nsite, 3)).reshape(-1, 3)
+		(senECI, _) = astrodll.EFGToECIBatch(np.repeat(thetaG, self.nsite), posEFG, np.zeros_like(posEFG))
+		return senECI.reshape(ntime, self.nsite, 3)
+
+	def LookAngles(self, ds50UTC, pos, vel, table=None, out=None):
+		"""
+		Computes the topocentric components for every site, satellite and time.
+
+		:param numpy.ndarray ds50UTC: float64 array of shape (ntime,), days since 1950, UTC, shared by every satellite.
+		:param numpy.ndarray pos: float64 array of shape (nsat, ntime, 3), satellite ECI positions (km), as returned by sgp4dll.Sgp4PropDs50UTCBatch.
+		:param numpy.ndarray vel: float64 array of shape (nsat, ntime, 3), satellite ECI velocities (km/s).
+		:param table: Timing constants table for the numpy fast path, see timedll.TConTable.
+		:type table: timedll.TConTable, optional
+		:param out: A float64 array of shape (nsite, nsat, ntime, 10) to write the results into.
+		:type out: numpy.ndarray, optional
+		:return:
+			**xa_topo** (*numpy.ndarray*) - float64 array of shape (nsite, nsat, ntime, 10), laid out as in astrodll.ECIToTopoComps (see the XA_TOPO_* indexes).
+		"""
+		(ds50UTC, pos, vel) = self._verify(ds50UTC, pos, vel)
+		(nsat, ntime) = pos.shape[:2]
+		if out is None:
+			out = np.empty((self.nsite, nsat, ntime, XA_TOPO_SIZE), dtype=np.float64)
+		else:
+			settings.verify_out_array(out, (self.nsite, nsat, ntime, XA_TOPO_SIZE))
+		(theta, senECI) = self._site_states(ds50UTC, table)
+		# one site and a block of satellites at a time: out[site, first:last] is contiguous, so each block is written
+		# straight into it, and only the site states are repeated, block sized, for the rows
+		block = max(1, _BLOCK_ROWS // max(ntime, 1))
+		for site in range(self.nsite):
+			for first in range(0, nsat, block):
+				last = min(first + block, nsat)
+				astrodll.ECIToTopoCompsBatch(np.broadcast_to(theta[:, site], (last - first, ntime)).reshape(-1),
+											 self.sites[site, 0],
+											 np.broadcast_to(senECI[:, site], (last - first, ntime, 3)).reshape(-1, 3),
+											 pos[first:last].reshape(-1, 3),
+											 vel[first:last].reshape(-1, 3),
+											 out=out[site, first:last].reshape(-1, XA_TOPO_SIZE))
+		return out
+
+	def PairLookAngles(self, site, ds50UTC, pos, vel, table=None):
+		"""
+		Computes the topocentric components of individual rows, each with its own site, time and satellite state. This suits root finders and other callers whose times differ from row to row.
+
+		:param numpy.ndarray site: int array of shape (n,), the site index of each row.
+		:param numpy.ndarray ds50UTC: float64 array of shape (n,), days since 1950, UTC, of each row.
+		:param numpy.ndarray pos: float64 array of shape (n, 3), satellite ECI positions (km).
+		:param numpy.ndarray vel: float64 array of shape (n, 3), satellite ECI velocities (km/s).
+		:param table: Timing constants table for the numpy fast path, see timedll.TConTable.
+		:type table: timedll.TConTable, optional
+		:return:
+			**xa_topo** (*numpy.ndarray*) - float64 array of shape (n, 10), laid out as in astrodll.ECIToTopoComps.
+		"""
+		site = np.asarray(site, dtype=np.int64)
+		thetaG = self.ThetaG(np.asarray(ds50UTC, dtype=np.float64), table=table)
+		senEFG = self.senEFG[site]
+		(senECI, _) = astrodll.EFGToECIBatch(thetaG, senEFG, np.zeros_like(senEFG))
+		return astrodll.ECIToTopoCompsBatch(thetaG + self._lon[site], self.sites[site, 0], senECI, pos, vel)
+
+	def Visible(self, ds50UTC, pos, vel, minElevation=0.0, table=None):
+		"""
+		Computes the topocentric components of the (site, satellite, time) triples at or above an elevation mask. Takes the same arrays as LookAngles.
+
+		:param float minElevation: The elevation mask (deg).
+		:return:
+			- **site** (*numpy.ndarray*) - int64 array of shape (nvisible,), the site index of each triple.
+			- **sat** (*numpy.ndarray*) - int64 array of shape (nvisible,), the satellite index of each triple.
+			- **time** (*numpy.ndarray*) - int64 array of shape (nvisible,), the time index of each triple.
+			- **xa_topo** (*numpy.ndarray*) - float64 array of shape (nvisible, 10), the topocentric components of each triple.
+		"""
+		chunks = list(self.VisibleStream(ds50UTC, pos, vel, minElevation=minElevation, table=table))
+		if not chunks:
+			empty = np.zeros(0, dtype=np.int64)
+			return (empty, empty.copy(), empty.copy(), np.zeros((0, XA_TOPO_SIZE), dtype=np.float64))
+		return tuple(np.concatenate(parts) for parts in zip(*chunks))
+
+	def VisibleStream(self, ds50UTC, pos, vel, minElevation=0.0, table=None, chunkSize=64):
+		"""
+		Generator form of Visible, yielding the visible triples chunkSize time steps at a time, so that only one chunk of candidates is ever held in memory. Chunks without a visible triple are skipped.
+
+		:param int chunkSize: The number of time steps handled per chunk.
+		:return:
+			Yields (site, sat, time, xa_topo) as returned by Visible, with time indexes into the full ds50UTC array.
+		"""
+		(ds50UTC, pos, vel) = self._verify(ds50UTC, pos, vel)
+		if chunkSize < 1:
+			raise Exception("chunkSize must be at least 1, got %s" % (chunkSize))
+		return self._visible_chunks(ds50UTC, pos, vel, minElevation, table, int(chunkSize))
+
+	def _visible_chunks(self, ds50UTC, pos, vel, minElevation, table, chunkSize):
+		ntime = ds50UTC.shape[0]
+		sinMask = np.sin(np.radians(max(minElevation - _MASK_MARGIN, -90.0)))
+		for start in range(0, ntime, chunkSize):
+			stop = min(start + chunkSize, ntime)
+			(theta, senECI) = self._site_states(ds50UTC[start:stop], table)
+			# local vertical of every site at every step, (chunk, nsite, 3)
+			up = np.stack([np.cos(self._lat) * np.cos(theta), np.cos(self._lat) * np.sin(theta), np.broadcast_to(np.sin(self._lat), theta.shape)], axis=-1)
+			# line of sight (nsite, nsat, chunk, 3)
+			rho = pos[np.newaxis, :, start:stop, :] - senECI.transpose(1, 0, 2)[:, np.newaxis, :, :]
+			sinEl = np.einsum('ijkl,ikl->ijk', rho, up.transpose(1, 0, 2)) / np.linalg.norm(rho, axis=-1)
+			(site, sat, time) = np.nonzero(sinEl >= sinMask)
+			del rho, sinEl
+			if site.shape[0] == 0:
+				continue
+			xa_topo = self._topo(theta, senECI, pos[:, start:stop], vel[:, start:stop], site, sat, time)
+			keep = xa_topo[:, XA_TOPO_EL] >= minElevation
+			if keep.any():
+				yield (site[keep], sat[keep], time[keep] + start, xa_topo[keep])
+
+	def _verify(self, ds50UTC, pos, vel):
+		ds50UTC = np.ascontiguousarray(ds50UTC, dtype=np.float64)
+		pos = np.ascontiguousarray(pos, dtype=np.float64)
+		vel = np.ascontiguousarray(vel, dtype=np.float64)
+		if ds50UTC.ndim != 1:
+			raise Exception("ds50UTC has shape %s, expecting (ntime,)" % (ds50UTC.shape,))
+		shape = pos.shape[:1] + (ds50UTC.shape[0], 3)
+		if pos.ndim != 3 or pos.shape != shape or vel.shape != shape:
+			raise Exception("pos and vel have shapes %s and %s, expecting (nsat, %i, 3)" % (pos.shape, vel.shape, ds50UTC.shape[0]))
+		return (ds50UTC, pos, vel)
+
+	def _site_states(self, ds50UTC, table):
+		# local sidereal time (ntime, nsite) and site ECI positions (ntime, nsite, 3), once per step
+		thetaG = self.ThetaG(ds50UTC, table=table)
+		theta = thetaG[:, np.newaxis] + self._lon[np.newaxis, :]
+		return (theta, self.SensorECI(thetaG))
+
+	def _topo(self, theta, senECI, pos, vel, site, sat, time):
+		# one ECIToTopoComps per (site, sat, time) triple, time indexes into theta, senECI, and the second axis of pos and vel
+		return astrodll.ECIToTopoCompsBatch(theta[time, site], self.sites[site, 0], senECI[time, site], pos[sat, time], vel[sat, time])
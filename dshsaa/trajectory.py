@@ -0,0 +1,229 @@
+#! /usr/bin/env python3
+
+"""
+trajectory.py answers repeated state queries of the same satellites from Chebyshev polynomials fitted to their sgp4dll trajectories.
+
+A service which asks for the same satellites at arbitrary times within a day pays one propagation per query when it goes to the DLL. The TrajectoryStore splits time into segments of **segmentDays**, aligned on whole multiples of the segment length since 1950, like sunmoon.SunMoonEphemeris. The first time a segment of a satellite is needed, the satellite is propagated at degree + 1 Chebyshev nodes inside it (one Sgp4PropDs50UTCBatch call for every missing segment of the satellite), and each position coordinate is interpolated by one Chebyshev polynomial. Velocities come from the derivative of the position polynomials. Later queries cost a few numpy operations per sample, vectorized over satellites and times, and no DLL call.
+
+The interpolation error falls off geometrically as the segments get shorter or the degree higher. The defaults (30 minute segments, degree 12) keep it far below a meter for low orbits; validate measures it against the DLL, and tune picks the longest segment meeting a tolerance.
+
+The coefficients of a satellite are dropped as soon as the satellite changes in the DLLs, see dshsaa.raw.events.
+
+.. code-block:: python
+
+	from dshsaa import trajectory
+
+	store = trajectory.TrajectoryStore(segmentDays=1.0 / 48.0)
+	store.cover(satKeys, start, start + 1.0)
+	(retcode, pos, vel) = store.State(satKeys, ds50UTC)
+	store.validate(satKeys[0], start, start + 1.0)	# {'pos': km, 'vel': km/s}
+"""
+import numpy as np
+from dshsaa.raw import settings, sgp4dll, events
+from dshsaa import chebyshev
+import pdb
+
+# segment lengths tried by tune, longest first (days)
+TUNE_SEGMENTS = (1.0 / 12.0, 1.0 / 24.0, 1.0 / 48.0, 1.0 / 96.0, 1.0 / 192.0, 1.0 / 384.0)
+
+class TrajectoryStore:
+	"""
+	Piecewise Chebyshev interpolation of the sgp4dll trajectories of any number of satellites, see the module description. sgp4dll must be initialized, and the satellites initialized with Sgp4InitSat.
+
+	:param float segmentDays: The length of each segment (days). Shorter segments are more accurate and cost more propagations to fit.
+	:param int degree: The degree of the polynomials.
+	:ivar int propagations: The number of satellite propagations made so far.
+	"""
+	def __init__(self, segmentDays=1.0 / 48.0, degree=12):
+		if segmentDays <= 0 or degree < 2:
+			raise Exception("segmentDays must be positive and degree at least 2")
+		self.segmentDays = float(segmentDays)
+		self.degree = int(degree)
+		self.propagations = 0
+		(self._nodes, self._fit) = chebyshev.nodes(self.degree)
+		# rows of (degree + 1, 6) coefficients, columns are position x, y, z (km) then velocity x, y, z (km/s)
+		self._coeffs = np.zeros((0, self.degree + 1, 6), dtype=np.float64)
+		self._retcode = np.zeros(0, dtype=np.int32)
+		self._size = 0
+		# (satKey, segment) -> row, and satKey -> its segments
+		self._rows = {}
+		self._segmentsBySat = {}
+		self._callback = events.subscribe_weak(self._on_event)
+
+	def cover(self, satKeys, startDs50UTC, stopDs50UTC):
+		"""
+		Fits every segment of every satellite from startDs50UTC to stopDs50UTC that is not stored yet.
+
+		:param satKeys: The satellites.
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param float startDs50UTC: The start of the span, days since 1950, UTC.
+		:param float stopDs50UTC: The end of the span, days since 1950, UTC.
+		"""
+		first = int(np.floor(startDs50UTC / self.segmentDays))
+		last = int(np.floor(stopDs50UTC / self.segmentDays))
+		for satKey in settings.int64_values(satKeys):
+			self._fit_segments(satKey, [s for s in range(first, last + 1) if (satKey, s) not in self._rows])
+
+	def State(self, satKeys, ds50UTC):
+		"""
+		Interpolated sgp4dll.Sgp4PropDs50UTCBatch: the positions and velocities of many satellites at many times. Segments which are not stored yet are fitted first.
+
+		:param satKeys: The satellites (nsat entries).
+		:type satKeys: settings.stay_int64[nsat], int[nsat]
+		:param numpy.ndarray ds50UTC: The times, days since 1950, UTC. A 1D array of ntime values is shared by every satellite, a 2D array of shape (nsat, ntime) gives each satellite its own times.
+		:return:
+			- **retcode** (*numpy.ndarray*) - int32 array of shape (nsat, ntime), 0 where the state is valid, else the error code of the propagation which failed while fitting the segment.
+			- **pos** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the ECI position vectors (km), NaN where retcode is not 0.
+			- **vel** (*numpy.ndarray*) - float64 array of shape (nsat, ntime, 3), the ECI velocity vectors (km/s), NaN where retcode is not 0.
+		"""
+		keys = np.array(settings.int64_values(satKeys), dtype=np.int64)
+		ds50UTC = np.asarray(ds50UTC, dtype=np.float64)
+		if ds50UTC.ndim not in (1, 2):
+			raise Exception("ds50UTC must be 1D or 2D, got shape %s" % (ds50UTC.shape,))
+		t = np.broadcast_to(ds50UTC, (keys.shape[0], ds50UTC.shape[-1]))
+		segment = np.floor(t / self.segmentDays).astype(np.int64)
+		sat = np.broadcast_to(np.arange(keys.shape[0])[:, np.newaxis], t.shape)
+
+		# the row of every (satellite, segment) pair, fitting those not stored yet
+		pairs = np.stack([sat.reshape(-1), segment.reshape(-1)], axis=-1)
+		(unique, inverse) = np.unique(pairs, axis=0, return_inverse=True)
+		missing = {}
+		for (k, s) in unique.tolist():
+			if (int(keys[k]), s) not in self._rows:
+				missing.setdefault(int(keys[k]), []).append(s)
+		for (satKey, segments) in missing.items():
+			self._fit_segments(satKey, segments)
+		rows = np.array([self._rows[(int(keys[k]), s)] for (k, s) in unique.tolist()], dtype=np.int64)
+		rows = rows[inverse.reshape(-1)]
+
+		values = self._evaluate(rows, (t / self.segmentDays - segment).reshape(-1))
+		values = values.reshape(t.shape + (6,))
+		retcode = self._retcode[rows].reshape(t.shape)
+		return (retcode, values[..., 0:3], values[..., 3:6])
+
+	def validate(self, satKey, startDs50UTC, stopDs50UTC, count=1000):
+		"""
+		Measures the interpolation error of one satellite against Sgp4PropDs50UTCBatch at evenly spaced times, which fall between the nodes.
+
+		:param satKey: The satellite.
+		:type satKey: settings.stay_int64, int
+		:param float startDs50UTC: The start of the span, days since 1950, UTC.
+		:param float stopDs50UTC: The end of the span, days since 1950, UTC.
+		:param int count: The number of times to check.
+		:return:
+			**errors** (*dict*) - The largest position error (km) as 'pos' and velocity error (km/s) as 'vel' over the span, ignoring failed propagations.
+		"""
+		ds50UTC = np.linspace(startDs50UTC, stopDs50UTC, count)
+		(retcode, pos, vel) = self.State([satKey], ds50UTC)
+		(truthRetcode, mse, truthPos, truthVel, llh) = sgp4dll.Sgp4PropDs50UTCBatch([satKey], ds50UTC)
+		self.propagations += count
+		ok = (retcode == 0) & (truthRetcode == 0)
+		if not ok.any():
+			return {'pos': float('nan'), 'vel': float('nan')}
+		return {'pos': float(np.linalg.norm(pos - truthPos, axis=-1)[ok].max()),
+				'vel': float(np.linalg.norm(vel - truthVel, axis=-1)[ok].max())}
+
+	def clear(self):
+		"""
+		Drops every stored segment.
+		"""
+		self._coeffs = self._coeffs[:0]
+		self._retcode = self._retcode[:0]
+		self._size = 0
+		self._rows.clear()
+		self._segmentsBySat.clear()
+
+	def close(self):
+		"""
+		Drops every stored segment and stops listening for satellite changes.
+		"""
+		self.clear()
+		events.unsubscribe(self._callback)
+
+	def __len__(self):
+		return len(self._rows)
+
+	def _fit_segments(self, satKey, segments):
+		# propagate one satellite at the nodes of the segments, in one batch, and solve for the coefficients
+		if not segments:
+			return
+		segments = np.array(segments, dtype=np.int64)
+		n = self.degree + 1
+		ds50UTC = (segments[:, np.newaxis] + (self._nodes + 1) / 2) * self.segmentDays
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch([satKey], ds50UTC.reshape(-1))
+		self.propagations += ds50UTC.size
+		retcode = retcode[0].reshape(segments.shape[0], n)
+		coeffs = np.zeros((segments.shape[0], n, 6), dtype=np.float64)
+		coeffs[:, :, 0:3] = np.einsum('ij,mjk->mik', self._fit, pos[0].reshape(segments.shape[0], n, 3))
+		# d/dt of a polynomial in x = 2 (t / segmentDays - segment) - 1 is 2 / segmentDays times d/dx, from km/day to km/s
+		coeffs[:, :n - 1, 3:6] = np.polynomial.chebyshev.chebder(coeffs[:, :, 0:3], axis=1) * (2.0 / (self.segmentDays * 86400.0))
+		# a segment with a failed node keeps the first failure's code, and no coefficients
+		failed = (retcode != 0).any(axis=1)
+		coeffs[failed] = np.nan
+		code = retcode[np.arange(segments.shape[0]), np.argmax(retcode != 0, axis=1)]
+
+		rows = self._append(coeffs, code)
+		mine = self._segmentsBySat.setdefault(satKey, set())
+		for (s, row) in zip(segments.tolist(), rows.tolist()):
+			self._rows[(satKey, s)] = row
+			mine.add(s)
+
+	def _append(self, coeffs, retcode):
+		# store rows, growing the arrays geometrically, and compacting them when more than half the rows are dropped
+		if self._size > 1024 and self._size > 2 * len(self._rows):
+			self._compact()
+		needed = self._size + coeffs.shape[0]
+		if needed > self._coeffs.shape[0]:
+			capacity = max(needed, 2 * self._coeffs.shape[0], 64)
+			grown = np.zeros((capacity,) + self._coeffs.shape[1:], dtype=np.float64)
+			grown[:self._size] = self._coeffs[:self._size]
+			self._coeffs = grown
+			grownRetcode = np.zeros(capacity, dtype=np.int32)
+			grownRetcode[:self._size] = self._retcode[:self._size]
+			self._retcode = grownRetcode
+		rows = np.arange(self._size, needed)
+		self._coeffs[rows] = coeffs
+		self._retcode[rows] = retcode
+		self._size = needed
+		return rows
+
+	def _compact(self):
+		keys = list(self._rows)
+		old = np.array([self._rows[key] for key in keys], dtype=np.int64)
+		self._coeffs = self._coeffs[old]
+		self._retcode = self._retcode[old]
+		self._size = old.shape[0]
+		self._rows = dict(zip(keys, range(self._size)))
+
+	def _evaluate(self, rows, fraction):
+		# position and velocity at the fractions [0, 1) of the segments of the rows, shape (n, 6)
+		return chebyshev.evaluate(self._coeffs[rows], 2 * fraction - 1)
+
+	def _on_event(self, event, satKey):
+		if event == 'remove_all':
+			self.clear()
+			return
+		for s in self._segmentsBySat.pop(satKey, ()):
+			del self._rows[(satKey, s)]
+
+def tune(satKeys, startDs50UTC, stopDs50UTC, tolerance=1e-3, degree=12, count=1000):
+	"""
+	Picks the longest segment length of TUNE_SEGMENTS whose position error stays within a tolerance for every given satellite over a span, as measured by TrajectoryStore.validate.
+
+	:param satKeys: Satellites representative of those the store will hold.
+	:type satKeys: settings.stay_int64[nsat], int[nsat]
+	:param float startDs50UTC: The start of the span, days since 1950, UTC.
+	:param float stopDs50UTC: The end of the span, days since 1950, UTC.
+	:param float tolerance: The largest acceptable position error (km).
+	:param int degree: The degree of the polynomials.
+	:param int count: The number of times checked per satellite.
+	:return:
+		**segmentDays** (*float*) - The segment length, the shortest of TUNE_SEGMENTS if none meets the tolerance.
+	"""
+	for segmentDays in TUNE_SEGMENTS:
+		store = TrajectoryStore(segmentDays=segmentDays, degree=degree)
+		errors = [store.validate(satKey, startDs50UTC, stopDs50UTC, count)['pos'] for satKey in satKeys]
+		store.close()
+		if all(error <= tolerance for error in errors):
+			return segmentDays
+	return TUNE_SEGMENTS[-1]
@@ -4,6 +4,7 @@ from dshsaa.raw import maindll, envdll, astrodll
 from dshsaa.raw import settings
 import pdb
 import ctypes as c
+import numpy as np
 import os #for cleaning up output files
 
 class TestAstroDLL(unittest.TestCase):
@@ -354,5 +355,84 @@ class TestAstroDLL(unittest.TestCase):
 		metricPos = [42166.3724464, 12.9531593, -9.8621994]
 		metricLLH = astrodll.XYZToLLH(thetaG, metricPos)
 	
+	##Batch transforms
+	def test_ECIToEFGBatch(self):
+		thetaG = np.linspace(0.0, 6.0, 5)
+		posECI = np.array([[7000, 100, 100], [-6500, 2000, 10], [0, 42164, 0], [100, 200, 7000], [3000, -3000, 3000]], dtype=np.float64)
+		velECI = np.array([[100, 1000, -100], [1, 2, 3], [-3, 0, 0], [0, 7, 0], [5, 5, -5]], dtype=np.float64)
+		(posEFG, velEFG) = astrodll.ECIToEFGBatch(thetaG, posECI, velECI)
+		for i in range(5):
+			(p, v) = astrodll.ECIToEFG(thetaG[i], posECI[i].tolist(), velECI[i].tolist())
+			self.assertEqual(posEFG[i].tolist(), p)
+			self.assertEqual(velEFG[i].tolist(), v)
+		# and back again, into preallocated arrays
+		out = (np.empty((5, 3)), np.empty((5, 3)))
+		result = astrodll.EFGToECIBatch(thetaG, posEFG, velEFG, out=out)
+		self.assertIs(result[0], out[0])
+		for i in range(5):
+			(p, v) = astrodll.EFGToECI(thetaG[i], posEFG[i].tolist(), velEFG[i].tolist())
+			self.assertEqual(out[0][i].tolist(), p)
+			self.assertEqual(out[1][i].tolist(), v)
+
+	def test_ECRToEFGBatch(self):
+		posECR = np.array([[7000, 100, 100], [100, 2000, 100]], dtype=np.float64)
+		velECR = np.array([[100, 2000, 100], [1, 2, 3]], dtype=np.float64)
+		polarX = np.array([0.1, 0.2])
+		(posEFG, velEFG) = astrodll.ECRToEFGBatch(polarX, 0.3, posECR, velECR)
+		(posBack, velBack) = astrodll.EFGToECRBatch(polarX, 0.3, posEFG, velEFG)
+		for i in range(2):
+			(p, v) = astrodll.ECRToEFG(polarX[i], 0.3, posECR[i].tolist(), velECR[i].tolist())
+			self.assertEqual(posEFG[i].tolist(), p)
+			self.assertEqual(velEFG[i].tolist(), v)
+			(p, v) = astrodll.EFGToECR(polarX[i], 0.3, posEFG[i].tolist(), velEFG[i].tolist())
+			self.assertEqual(posBack[i].tolist(), p)
+			self.assertEqual(velBack[i].tolist(), v)
+
+	def test_LLHBatch(self):
+		metricLLH = np.array([[30, 30, 100], [-45, 170, 500], [0, -90, 35786]], dtype=np.float64)
+		posEFG = astrodll.LLHToEFGPosBatch(metricLLH)
+		llh = np.empty((3, 3))
+		astrodll.EFGPosToLLHBatch(posEFG, out=llh)
+		ground = astrodll.XYZToLLHBatch(np.array([0.1, 0.2, 0.3]), posEFG)
+		for i in range(3):
+			self.assertEqual(posEFG[i].tolist(), astrodll.LLHToEFGPos(metricLLH[i].tolist()))
+			self.assertEqual(llh[i].tolist(), astrodll.EFGPosToLLH(posEFG[i].tolist()))
+			self.assertEqual(ground[i].tolist(), astrodll.XYZToLLH(0.1 * (i + 1), posEFG[i].tolist()))
+
+	def test_ECIToTopoCompsBatch(self):
+		theta = np.array([0.1, 0.2, 0.3])
+		senPos = np.array([[6500, 75, 50], [6400, 0, 100], [0, 6400, 0]], dtype=np.float64)
+		satPos = np.array([[7000, 100, 200], [7000, 0, 0], [0, 7000, 100]], dtype=np.float64)
+		satVel = np.array([[0, 2000, 0], [0, 7, 1], [-7, 0, 0]], dtype=np.float64)
+		xa_topo = astrodll.ECIToTopoCompsBatch(theta, 20.3, senPos, satPos, satVel)
+		self.assertEqual(xa_topo.shape, (3, 10))
+		for i in range(3):
+			self.assertEqual(xa_topo[i].tolist(), astrodll.ECIToTopoComps(theta[i], 20.3, senPos[i].tolist(), satPos[i].tolist(), satVel[i].tolist()))
+
+	def test_KeplerBatch(self):
+		metricKep = np.array([[42165.91800738855, 5.436305581337673e-05, 0.0344453177014498, 101.51166906837908, 157.12250758872392, 101.37732368917199],
+							  [7000.0, 0.01, 51.6, 10.0, 20.0, 30.0]])
+		(pos, vel) = astrodll.KepToPosVelBatch(metricKep)
+		back = astrodll.PosVelToKepBatch(pos, vel)
+		E = astrodll.SolveKepEqtnBatch(metricKep)
+		self.assertEqual(back.shape, (2, 6))
+		for i in range(2):
+			(p, v) = astrodll.KepToPosVel(metricKep[i].tolist())
+			self.assertEqual(pos[i].tolist(), p)
+			self.assertEqual(vel[i].tolist(), v)
+			self.assertEqual(back[i].tolist(), astrodll.PosVelToKep(p, v))
+			self.assertEqual(E[i], astrodll.SolveKepEqtn(metricKep[i].tolist()))
+		self.assertRaises(Exception, astrodll.KepToPosVelBatch, np.zeros((2, 3)))
+		self.assertRaises(Exception, astrodll.SolveKepEqtnBatch, np.zeros((2, 3)))
+
+	def test_BatchArguments(self):
+		pos = np.zeros((4, 3))
+		# mismatched rows, wrong output shape, wrong number of per-row angles
+		self.assertRaises(Exception, astrodll.ECIToEFGBatch, 0.1, pos, np.zeros((3, 3)))
+		self.assertRaises(Exception, astrodll.EFGPosToLLHBatch, pos, out=np.zeros((3, 3)))
+		self.assertRaises(Exception, astrodll.XYZToLLHBatch, np.zeros(3), pos)
+		# empty input is fine
+		self.assertEqual(astrodll.EFGPosToLLHBatch(np.zeros((0, 3))).shape, (0, 3))
+
 	def tearDown(self):
 		return None
@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+import unittest
+import gc
+from dshsaa.raw import settings, events
+
+class TestEvents(unittest.TestCase):
+	
+	def setUp(self):
+		self.seen = []
+		self.callback = events.subscribe(lambda event, satKey: self.seen.append((event, satKey)))
+	
+	def tearDown(self):
+		events.unsubscribe(self.callback)
+	
+	def test_notify(self):
+		events.notify('update', settings.stay_int64(42))
+		events.notify('remove', 7)
+		events.notify('remove_all')
+		self.assertEqual(self.seen, [('update', 42), ('remove', 7), ('remove_all', None)])
+	
+	def test_subscribe(self):
+		# subscribing twice does not call twice
+		events.subscribe(self.callback)
+		events.notify('remove', 1)
+		self.assertEqual(len(self.seen), 1)
+		events.unsubscribe(self.callback)
+		events.unsubscribe(self.callback)
+		events.notify('remove', 1)
+		self.assertEqual(len(self.seen), 1)
+	
+	def test_source(self):
+		# a callback for one DLL only hears about that DLL
+		tle = []
+		callback = events.subscribe(lambda event, satKey: tle.append((event, satKey)), source='tle')
+		events.notify('remove', 1, source='sgp4')
+		events.notify('add', 2, source='tle')
+		events.unsubscribe(callback)
+		self.assertEqual(tle, [('add', 2)])
+		self.assertEqual(self.seen, [('remove', 1), ('add', 2)])
+	
+	def test_subscribe_weak(self):
+		# the subscription does not keep its object alive, and goes away with it
+		class Listener:
+			def __init__(self):
+				self.seen = []
+			def on_event(self, event, satKey):
+				self.seen.append((event, satKey))
+		listener = Listener()
+		count = len(events._subscribers)
+		callback = events.subscribe_weak(listener.on_event, source='tle')
+		events.notify('add', 3, source='tle')
+		events.notify('add', 4, source='sgp4')
+		self.assertEqual(listener.seen, [('add', 3)])
+		del listener
+		gc.collect()
+		events.notify('remove_all', source='tle')
+		self.assertNotIn(callback, events._subscribers)
+		self.assertEqual(len(events._subscribers), count)
+		
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,27 @@
+#! /usr/bin/env python3
+import unittest
+from dshsaa.raw import settings, fastcall, sgp4dll, timedll
+import ctypes as c
+
+class TestFastCall(unittest.TestCase):
+	def setUp(self):
+		# bind only binds at once when the library is loaded, see lazydll
+		timedll.C_TIMEDLL.load()
+		sgp4dll.C_SGP4DLL.load()
+	
+	def test_bind(self):
+		# bind shares the function object, and its prototype, with the CDLL attribute
+		func = fastcall.bind(timedll.C_TIMEDLL, 'UTCToTAI', c.c_double, [c.c_double])
+		self.assertIs(func, timedll.C_TIMEDLL.UTCToTAI)
+		self.assertIs(func, timedll._UTCToTAI)
+		self.assertIs(func.restype, c.c_double)
+	
+	def test_bind_variant(self):
+		# a variant is an independent copy, its prototype does not leak into the CDLL attribute
+		func = fastcall.bind_variant(sgp4dll.C_SGP4DLL, 'Sgp4PropMse', c.c_int, [c.c_int64, c.c_double] + [c.c_void_p] * 4)
+		self.assertIsNot(func, sgp4dll.C_SGP4DLL.Sgp4PropMse)
+		self.assertEqual(func.argtypes[2], c.c_void_p)
+		self.assertEqual(sgp4dll.C_SGP4DLL.Sgp4PropMse.argtypes[2], c.POINTER(c.c_double))
+	
+	def tearDown(self):
+		return None
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+import unittest
+import subprocess
+import sys
+import os
+
+class TestLazyDLL(unittest.TestCase):
+	# each case runs in a fresh interpreter, since the libraries stay loaded once loaded
+	
+	def run_python(self, code, env=None):
+		return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True, env=env).stdout.split()
+	
+	def test_import(self):
+		# importing loads nothing, calling a function loads that library only and swaps in the bound function
+		out = self.run_python(
+			"from dshsaa.raw import maindll, timedll, tledll, sgp4dll\n"
+			"print(maindll.C_MAINDLL.loaded, timedll.C_TIMEDLL.loaded, tledll.C_TLEDLL.loaded, sgp4dll.C_SGP4DLL.loaded)\n"
+			"timedll.TimeFuncInit(maindll.DllMainInit())\n"
+			"timedll.UTCToTAI(25000.0)\n"
+			"print(maindll.C_MAINDLL.loaded, timedll.C_TIMEDLL.loaded, tledll.C_TLEDLL.loaded, sgp4dll.C_SGP4DLL.loaded)\n"
+			"print(timedll._UTCToTAI is timedll.C_TIMEDLL.UTCToTAI)")
+		self.assertEqual(out, ['False'] * 4 + ['True', 'True', 'False', 'False', 'True'])
+	
+	def test_preload(self):
+		out = self.run_python(
+			"import dshsaa.raw\n"
+			"from dshsaa.raw import maindll, timedll, tledll, envdll, astrodll, sgp4dll\n"
+			"dshsaa.raw.preload()\n"
+			"print(all(lib.loaded for lib in [maindll.C_MAINDLL, timedll.C_TIMEDLL, tledll.C_TLEDLL, envdll.C_ENVDLL, astrodll.C_ASTRODLL, sgp4dll.C_SGP4DLL]))\n"
+			"print(type(sgp4dll._Sgp4PropMse).__name__, type(sgp4dll._Sgp4PropMse_addr).__name__)")
+		self.assertEqual(out, ['True', '_FuncPtr', '_FuncPtr'])
+	
+	def test_missing_path(self):
+		# a missing LD_LIBRARY_PATH raises from the first call, every time, instead of exiting the interpreter
+		env = {key: value for (key, value) in os.environ.items() if key != 'LD_LIBRARY_PATH'}
+		out = self.run_python(
+			"from dshsaa.raw import maindll\n"
+			"for attempt in range(2):\n"
+			"\ttry:\n"
+			"\t\tmaindll.DllMainInit()\n"
+			"\texcept OSError as e:\n"
+			"\t\tprint(type(e).__name__)\n"
+			"print(maindll.C_MAINDLL.loaded)", env=env)
+		self.assertEqual(out, ['OSError', 'OSError', 'False'])
+		
+if __name__ == '__main__':
+	unittest.main()
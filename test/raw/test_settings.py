@@ -3,6 +3,7 @@ import unittest
 from dshsaa.raw import settings
 import pdb
 import ctypes as c
+import numpy as np
 
 class TestSettings(unittest.TestCase):
 	def setUp(self):
@@ -42,5 +43,81 @@ class TestSettings(unittest.TestCase):
 		li_out = settings.array2d_to_list(ar)
 		
 	
+	def test_verify_out_array(self):
+		ar = np.zeros((4, 3))
+		self.assertIs(settings.verify_out_array(ar, (4, 3)), ar)
+		with self.assertRaises(Exception):
+			settings.verify_out_array(ar, (3, 4))
+		with self.assertRaises(Exception):
+			settings.verify_out_array(ar.astype(np.float32), (4, 3))
+		with self.assertRaises(Exception):
+			settings.verify_out_array(np.zeros((3, 4)).T, (4, 3))
+		with self.assertRaises(TypeError):
+			settings.verify_out_array([[0.0] * 3] * 4, (4, 3))
+	
+	def test_out_buffer(self):
+		ar = settings.double3()
+		self.assertIs(settings.out_buffer(ar, settings.double3), ar)
+		out = np.zeros(3)
+		ar = settings.out_buffer(out, settings.double3)
+		ar[2] = 9.0
+		self.assertEqual(out[2], 9.0)
+		with self.assertRaises(Exception):
+			settings.out_buffer(np.zeros(6), settings.double3)
+		with self.assertRaises(TypeError):
+			settings.out_buffer([0.0] * 3, settings.double3)
+	
+	def test_set_debug(self):
+		previous = settings.set_debug(False)
+		self.assertFalse(settings.DEBUG)
+		self.assertTrue(settings.set_debug(previous) is False)
+		self.assertEqual(settings.DEBUG, previous)
+	
+	def test_int64_values(self):
+		keys = [settings.stay_int64(5), 6, np.int64(7)]
+		self.assertEqual(settings.int64_values(keys), [5, 6, 7])
+	
+	def test_set_array_mode(self):
+		previous = settings.set_array_mode(True)
+		try:
+			# outputs are views sharing memory with the ctypes buffer
+			ar = settings.double3(1.0, 2.0, 3.0)
+			view = settings.array_to_list(ar)
+			self.assertIsInstance(view, np.ndarray)
+			ar[0] = 7.0
+			self.assertEqual(view[0], 7.0)
+			ar2d = settings.double6x6()
+			ar2d[1][2] = 4.0
+			view2d = settings.array2d_to_list(ar2d)
+			self.assertEqual(view2d.shape, (6, 6))
+			self.assertEqual(view2d[1, 2], 4.0)
+			
+			# numpy inputs of the right dtype are shared rather than copied
+			li = np.array([1.1, 2.2, 3.3])
+			ar = settings.list_to_array(li)
+			self.assertIsInstance(ar, settings.double3)
+			li[1] = 5.5
+			self.assertEqual(ar[1], 5.5)
+			# other dtypes are converted
+			ar = settings.list_to_array(np.array([1, 2, 3]))
+			self.assertEqual(list(ar), [1.0, 2.0, 3.0])
+			# lists still work
+			ar = settings.list_to_array([1.0, 2.0])
+			self.assertEqual(list(ar), [1.0, 2.0])
+			
+			ar = settings.feed_list_into_array(np.array([1.0, 2.0]), settings.double3())
+			self.assertEqual(list(ar), [1.0, 2.0, 0.0])
+			ar2d = settings.feed_2d_list_into_array(np.eye(6), settings.double6x6())
+			self.assertEqual(ar2d[3][3], 1.0)
+			with self.assertRaises(Exception):
+				settings.feed_2d_list_into_array(np.eye(3), settings.double6x6())
+			
+			# memory handles are never converted to numpy
+			keys = (settings.stay_int64 * 2)(5, 6)
+			self.assertIsInstance(settings.array_to_list(keys), list)
+		finally:
+			settings.set_array_mode(previous)
+		self.assertIsInstance(settings.array_to_list(settings.double3()), list)
+	
 	def tearDown(self):
 		return None
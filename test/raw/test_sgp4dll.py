@@ -2,6 +2,7 @@
 import unittest
 from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
 import ctypes as c
+import numpy as np
 import pdb
 
 class TestSgp4Dll(unittest.TestCase):
@@ -104,6 +105,13 @@ class TestSgp4Dll(unittest.TestCase):
 		(retcode, xa_Sgp4Out) = sgp4dll.Sgp4PropAll(satKey, timeType, timeIn)
 		self.assertEqual(retcode, 0)
 		
+		# fill a preallocated buffer instead
+		out = np.zeros(64)
+		(retcode, xa_Sgp4Out_out) = sgp4dll.Sgp4PropAll(satKey, timeType, timeIn, out=out)
+		self.assertEqual(retcode, 0)
+		self.assertIs(xa_Sgp4Out_out, out)
+		self.assertEqual(out.tolist(), xa_Sgp4Out)
+		
 		# TODO: Add data driven test results
 		
 	##Sgp4PropDs50UTC 
@@ -113,12 +121,41 @@ class TestSgp4Dll(unittest.TestCase):
 		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTC(satKey, ds50UTC)
 		self.assertEqual(retcode, 0)
 		
+		out = (settings.double3(), settings.double3(), np.zeros(3))
+		(retcode, mse_out, pos_out, vel_out, llh_out) = sgp4dll.Sgp4PropDs50UTC(satKey, ds50UTC, out=out)
+		self.assertEqual(retcode, 0)
+		self.assertEqual(mse_out, mse)
+		self.assertIs(pos_out, out[0])
+		self.assertEqual(list(pos_out), pos)
+		self.assertEqual(list(vel_out), vel)
+		self.assertEqual(llh_out.tolist(), llh)
+		
+	##Sgp4PropDs50UTCBatch
+	def test_Sgp4PropDs50UTCBatch(self):
+		satKeys = [self.generic_satKey]
+		ds50UTC = np.array([25852.6, 25852.7, 25852.8])
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(satKeys, ds50UTC)
+		self.assertEqual(retcode.shape, (1, 3))
+		self.assertEqual(pos.shape, (1, 3, 3))
+		self.assertTrue(np.all(retcode == 0))
+		# every sample must match the scalar wrapper exactly
+		for j in range(3):
+			(retcode_j, mse_j, pos_j, vel_j, llh_j) = sgp4dll.Sgp4PropDs50UTC(self.generic_satKey, ds50UTC[j])
+			self.assertEqual(mse[0, j], mse_j)
+			self.assertEqual(pos[0, j].tolist(), pos_j)
+			self.assertEqual(vel[0, j].tolist(), vel_j)
+			self.assertEqual(llh[0, j].tolist(), llh_j)
+	
 	##Sgp4PropDs50UtcLLH 
 	def test_Sgp4PropDs50UtcLLH(self):
 		satKey = self.generic_satKey
 		ds50UTC = 25852.6
 		(retcode, llh) = sgp4dll.Sgp4PropDs50UtcLLH(satKey, ds50UTC)
 		self.assertEqual(retcode, 0)
+		out = np.zeros(3)
+		(retcode, llh_out) = sgp4dll.Sgp4PropDs50UtcLLH(satKey, ds50UTC, out=out)
+		self.assertIs(llh_out, out)
+		self.assertEqual(out.tolist(), llh)
 	
 	
 	##Sgp4PropDs50UtcPos 
@@ -127,6 +164,10 @@ class TestSgp4Dll(unittest.TestCase):
 		ds50UTC = 25852.6
 		(retcode, pos) = sgp4dll.Sgp4PropDs50UtcPos(satKey, ds50UTC)
 		self.assertEqual(retcode, 0)
+		out = settings.double3()
+		(retcode, pos_out) = sgp4dll.Sgp4PropDs50UtcPos(satKey, ds50UTC, out=out)
+		self.assertIs(pos_out, out)
+		self.assertEqual(list(out), pos)
 		
 	##Sgp4PropMse
 	def test_Sgp4PropMse(self):
@@ -134,8 +175,74 @@ class TestSgp4Dll(unittest.TestCase):
 		mse = 3600
 		(retcode, ds50UTC, pos, vel, llh) = sgp4dll.Sgp4PropMse(satKey, mse)
 		self.assertEqual(retcode, 0)
+		
+		# the same buffers can be reused across calls
+		out = (np.zeros(3), np.zeros(3), np.zeros(3))
+		for i in range(2):
+			(retcode, ds50UTC_out, pos_out, vel_out, llh_out) = sgp4dll.Sgp4PropMse(satKey, mse, out=out)
+			self.assertEqual(retcode, 0)
+			self.assertIs(pos_out, out[0])
+			self.assertEqual(pos_out.tolist(), pos)
+			self.assertEqual(vel_out.tolist(), vel)
+			self.assertEqual(llh_out.tolist(), llh)
+		with self.assertRaises(Exception):
+			sgp4dll.Sgp4PropMse(satKey, mse, out=(np.zeros(2), np.zeros(3), np.zeros(3)))
 		# TODO: Add assertEquals for data from test case on blog
 	
+	##Sgp4PropMseBatch
+	def test_Sgp4PropMseBatch(self):
+		satKeys = [self.generic_satKey, self.generic_satKey.value]
+		mse = np.arange(0, 3600, 600, dtype=np.float64)
+		(retcode, ds50UTC, pos, vel, llh) = sgp4dll.Sgp4PropMseBatch(satKeys, mse)
+		self.assertEqual(retcode.shape, (2, 6))
+		self.assertEqual(vel.shape, (2, 6, 3))
+		self.assertTrue(np.all(retcode == 0))
+		for j in range(len(mse)):
+			(retcode_j, ds50UTC_j, pos_j, vel_j, llh_j) = sgp4dll.Sgp4PropMse(self.generic_satKey, mse[j])
+			self.assertEqual(ds50UTC[1, j], ds50UTC_j)
+			self.assertEqual(pos[1, j].tolist(), pos_j)
+			self.assertEqual(vel[1, j].tolist(), vel_j)
+			self.assertEqual(llh[1, j].tolist(), llh_j)
+		
+		# preallocated outputs are filled in place
+		out = (np.empty((2, 6), dtype=np.int32), np.empty((2, 6)), np.empty((2, 6, 3)), np.empty((2, 6, 3)), np.empty((2, 6, 3)))
+		result = sgp4dll.Sgp4PropMseBatch(satKeys, mse, out=out)
+		for (a, b) in zip(result, out):
+			self.assertIs(a, b)
+		self.assertTrue(np.array_equal(out[2], pos))
+		
+		# a bad output shape is refused before the DLL can write out of bounds
+		bad_out = (out[0], out[1], np.empty((2, 5, 3)), out[3], out[4])
+		with self.assertRaises(Exception):
+			sgp4dll.Sgp4PropMseBatch(satKeys, mse, out=bad_out)
+	
+	##Sgp4PropMseStream
+	def test_Sgp4PropMseStream(self):
+		satKey = self.generic_satKey
+		chunks = list(sgp4dll.Sgp4PropMseStream(satKey, 0, 100, 0.5, chunkSize=64))
+		self.assertEqual([len(chunk[0]) for chunk in chunks], [64, 64, 64, 9])
+		self.assertEqual(chunks[-1][0][-1], 100.0)
+		# the chunks join up into the same ephemeris as one batch
+		(retcode, ds50UTC, pos, vel, llh) = sgp4dll.Sgp4PropMseBatch([satKey], np.arange(0, 100.5, 0.5))
+		for (i, expect) in enumerate([retcode, ds50UTC, pos, vel, llh]):
+			np.testing.assert_array_equal(np.concatenate([chunk[i + 1] for chunk in chunks]), expect[0])
+		
+		# reused chunks share memory
+		(first, second) = list(sgp4dll.Sgp4PropMseStream(satKey, 0, 10, 1, chunkSize=6, reuse=True))
+		self.assertTrue(np.shares_memory(first[3], second[3]))
+		
+		# bad arguments are refused when the stream is created
+		with self.assertRaises(Exception):
+			sgp4dll.Sgp4PropMseStream(satKey, 0, 10, 0)
+	
+	##Sgp4PropDs50UTCStream
+	def test_Sgp4PropDs50UTCStream(self):
+		satKey = self.generic_satKey
+		chunks = list(sgp4dll.Sgp4PropDs50UTCStream(satKey, 25852.0, 25853.0, 1/1440, chunkSize=1000))
+		self.assertEqual(sum(len(chunk[0]) for chunk in chunks), 1441)
+		for chunk in chunks:
+			self.assertTrue(np.all(chunk[1] == 0))
+	
 	##Sgp4ReepochTLE
 	def test_Sgp4ReepochTLE(self):
 		satKey = self.generic_satKey
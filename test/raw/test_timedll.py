@@ -4,6 +4,7 @@ from dshsaa.raw import maindll, timedll
 from dshsaa.raw import settings
 import pdb
 import ctypes as c
+import numpy as np
 import os #for cleaning up output files
 
 class TestTimeDLL(unittest.TestCase):
@@ -296,6 +297,43 @@ class TestTimeDLL(unittest.TestCase):
 		year = 2001
 		dayOfYear = 123.12792065972
 		ds50UTC = timedll.YrDaysToUTC(year, dayOfYear)
+	
+	## Array conversions
+	def test_ArrayConversions(self):
+		ds50 = 25852.0 + np.arange(0, 2, 0.01)
+		for name in ['TAIToUT1', 'TAIToUTC', 'ThetaGrnwchFK5', 'UTCToET', 'UTCToTAI', 'UTCToUT1']:
+			scalar = getattr(timedll, name)
+			array = getattr(timedll, name + 'Array')
+			result = array(ds50)
+			self.assertEqual(result.tolist(), [scalar(t) for t in ds50.tolist()])
+			# any shape, and out=
+			out = np.empty((2, 100))
+			self.assertIs(array(ds50.reshape(2, 100), out=out), out)
+			self.assertEqual(out.ravel().tolist(), result.tolist())
+	
+	## TConTable
+	def test_TConTable(self):
+		# a week of daily timing constants with a steady UT1 drift
+		timedll.TConRemoveAll()
+		for day in range(25850, 25862):
+			ut1MinusUTC = -0.2 - 0.001 * (day - 25850)
+			retcode = timedll.TConAddOne(float(day), 0.0, 37.0, ut1MinusUTC, -1.0, 0.0, 0.0)
+			self.assertEqual(retcode, 0)
+		table = timedll.TConTable(25852.0, 25859.0)
+		errors = table.validate(2000)
+		for name in ['UTCToTAI', 'UTCToUT1', 'UTCToET', 'TAIToUTC', 'TAIToUT1']:
+			self.assertLess(errors[name], 1e-10, name)
+		self.assertLess(errors['ThetaGrnwchFK5'], 1e-8)
+		
+		# the fast path is reached through the array functions
+		ds50UTC = 25852.0 + np.arange(86400) / 86400
+		fast = timedll.UTCToUT1Array(ds50UTC, table=table)
+		self.assertLess(np.max(np.abs(fast - timedll.UTCToUT1Array(ds50UTC))), 1e-10)
+		
+		# times outside the table are refused rather than extrapolated
+		with self.assertRaises(Exception):
+			table.UTCToTAI(np.array([25900.0]))
+		timedll.TConRemoveAll()
 
 	def tearDown(self):
 		return None
@@ -2,6 +2,7 @@
 import unittest
 from dshsaa.raw import settings, maindll, envdll, timedll, tledll
 import ctypes as c
+import numpy as np
 
 class TestTleDll(unittest.TestCase):
 
@@ -203,6 +204,43 @@ class TestTleDll(unittest.TestCase):
 		satKey = tledll.TleAddSatFrLines(line1, line2)
 		self.assertTrue(satKey.value > 0)
 	
+	##TleAddSatFrLinesBatch
+	def test_TleAddSatFrLinesBatch(self):
+		lines = [
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495'),
+			('1 90004U SGP4-KNW 03 51.03935584  .00001327      0 0  00000-4   882', '2 90004  64.7716 194.9878 6033327 269.3020  18.6110  2.00615358 3847'),
+			('not a', 'tle'),
+		]
+		(retcode, satKeys, xa_tle) = tledll.TleAddSatFrLinesBatch(lines)
+		self.assertEqual(xa_tle.shape, (3, 64))
+		self.assertEqual(retcode[0], 0)
+		self.assertEqual(retcode[1], 0)
+		self.assertNotEqual(retcode[2], 0)
+		self.assertTrue(satKeys[0] > 0)
+		self.assertTrue(satKeys[1] > 0)
+		self.assertEqual(satKeys[2], 0)
+		self.assertEqual(xa_tle[0, tledll.XA_TLE_SATNUM], 23455)
+		self.assertEqual(xa_tle[1, tledll.XA_TLE_INCLI], 64.7716)
+		# the batch must agree with the single TLE functions
+		(rc, xa_expect, xs_expect) = tledll.TleLinesToArray(lines[1][0], lines[1][1])
+		np.testing.assert_array_equal(xa_tle[1], xa_expect)
+		(rc, xa_loaded, xs_loaded) = tledll.TleDataToArray(settings.stay_int64(int(satKeys[1])))
+		self.assertEqual(xa_loaded[tledll.XA_TLE_MNMOTN], xa_tle[1, tledll.XA_TLE_MNMOTN])
+	
+	##TleAddSatFrArrayBatch
+	def test_TleAddSatFrArrayBatch(self):
+		lines = [
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495'),
+			('1 90004U SGP4-KNW 03 51.03935584  .00001327      0 0  00000-4   882', '2 90004  64.7716 194.9878 6033327 269.3020  18.6110  2.00615358 3847'),
+		]
+		(retcode, xa_tle, xs_tle) = tledll.TleLinesToArrayBatch(lines)
+		satKeys = tledll.TleAddSatFrArrayBatch(xa_tle, xs_tle)
+		self.assertTrue(np.all(satKeys > 0))
+		(rc, xa_loaded, xs_loaded) = tledll.TleDataToArray(settings.stay_int64(int(satKeys[1])))
+		self.assertEqual(xa_loaded[tledll.XA_TLE_INCLI], 64.7716)
+		# adding them again is refused
+		self.assertTrue(np.all(tledll.TleAddSatFrArrayBatch(xa_tle, xs_tle) <= 0))
+	
 	##TleAddSatFrLinesML
 	@unittest.skip("Segmentation fault, matlab")
 	def test_TleAddSatFrLinesML(self):
@@ -475,6 +513,23 @@ class TestTleDll(unittest.TestCase):
 		(retcode, xa_tle, xs_tle) = tledll.TleLinesToArray(line1, line2)
 		self.assertEqual(retcode, 0)
 		
+	##TleLinesToArrayBatch
+	def test_TleLinesToArrayBatch(self):
+		lines = [
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495'),
+			('not a', 'tle'),
+		]
+		count = tledll.TleGetCount()
+		(retcode, xa_tle, xs_tle) = tledll.TleLinesToArrayBatch(lines)
+		self.assertEqual(tledll.TleGetCount(), count) # nothing is loaded
+		self.assertEqual(retcode[0], 0)
+		self.assertNotEqual(retcode[1], 0)
+		self.assertTrue(np.all(xa_tle[1] == 0))
+		self.assertEqual(xs_tle[1], '')
+		(rc, xa_expect, xs_expect) = tledll.TleLinesToArray(lines[0][0], lines[0][1])
+		np.testing.assert_array_equal(xa_tle[0], xa_expect)
+		self.assertEqual(xs_tle[0], xs_expect)
+	
 	##TleLoadFile
 	def test_TleLoadFile(self):
 		tleFile = './test/raw/inputs/tledll.tleloadfile.inp'
@@ -510,6 +565,29 @@ class TestTleDll(unittest.TestCase):
 		self.assertEqual(mnMotion, 14.15059175)
 		self.assertEqual(revNum, 58504)
 		
+	##TleParseGPBatch
+	def test_TleParseGPBatch(self):
+		lines = [
+			('1 19650U 88102B   00082.05491348 -.00000156 +00000-0 -55907-4 0 0856', '2 19650 070.9951 288.5351 0012570 034.5635 325.6302 14.1505917558504'),
+			('not a', 'tle'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495'),
+		]
+		count = tledll.TleGetCount()
+		(retcode, fields) = tledll.TleParseGPBatch(lines)
+		self.assertEqual(tledll.TleGetCount(), count) # nothing is loaded
+		self.assertEqual(retcode.shape, (3,))
+		self.assertEqual(fields.dtype, tledll.TLEPARSEGP_DTYPE)
+		self.assertEqual(retcode[0], 0)
+		self.assertNotEqual(retcode[1], 0)
+		self.assertEqual(retcode[2], 0)
+		self.assertEqual(fields['satNum'][1], 0)
+		# every good row must match the single TLE parser
+		for i in [0, 2]:
+			expect = tledll.TleParseGP(lines[i][0], lines[i][1])
+			self.assertEqual(expect[0], retcode[i])
+			for (name, value) in zip(tledll.TLEPARSEGP_DTYPE.names, expect[1:]):
+				self.assertEqual(fields[name][i], value)
+		
 		
 	##TleParseSP
 	def test_TleParseSP(self):
@@ -0,0 +1,123 @@
+#! /user/bin/env python3
+import unittest
+import asyncio
+import time
+import sys
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import aioprop
+import pdb
+
+class TestAioProp(unittest.TestCase):
+
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+
+		self.satKeys = []
+		for (line1, line2) in [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.times = 25876.0 + np.arange(50) / 100.0
+
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+
+	def test_ds50utc(self):
+		async def run():
+			async with aioprop.AsyncPropagator() as prop:
+				single = await prop.ds50utc(self.satKeys[0], self.times[0])
+				# concurrent requests are merged into one DLL call
+				calls = prop.calls
+				many = await asyncio.gather(*[prop.ds50utc(satKey, t) for t in self.times for satKey in self.satKeys])
+				return (single, many, prop.calls - calls)
+		(single, many, calls) = asyncio.run(run())
+		self.assertEqual(single, sgp4dll.Sgp4PropDs50UTC(self.satKeys[0], self.times[0]))
+		self.assertEqual(calls, 1)
+		self.assertEqual(len(many), 2 * len(self.times))
+		for (i, t) in enumerate(self.times[:5]):
+			self.assertEqual(many[2 * i + 1], sgp4dll.Sgp4PropDs50UTC(self.satKeys[1], t))
+
+	def test_batch_and_call(self):
+		async def run():
+			async with aioprop.AsyncPropagator() as prop:
+				batch = await prop.batch(self.satKeys, self.times)
+				ds50ET = await prop.call(timedll.UTCToET, self.times[0])
+				with self.assertRaises(ZeroDivisionError):
+					await prop.call(lambda: 1 / 0)
+				return (batch, ds50ET)
+		(batch, ds50ET) = asyncio.run(run())
+		expected = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, self.times)
+		for (value, expect) in zip(batch, expected):
+			np.testing.assert_array_equal(value, expect)
+		self.assertEqual(ds50ET, timedll.UTCToET(self.times[0]))
+
+	def test_cancel(self):
+		async def run():
+			async with aioprop.AsyncPropagator() as prop:
+				# keep the owner thread busy, then cancel a request queued behind it
+				blocker = asyncio.ensure_future(prop.call(time.sleep, 0.2))
+				await asyncio.sleep(0.01)
+				task = asyncio.ensure_future(prop.ds50utc(self.satKeys[0], self.times[0]))
+				await asyncio.sleep(0.01)
+				task.cancel()
+				await blocker
+				with self.assertRaises(asyncio.CancelledError):
+					await task
+				# the propagator keeps serving
+				result = await prop.ds50utc(self.satKeys[0], self.times[0])
+				return (prop.cancelled, result)
+		(cancelled, result) = asyncio.run(run())
+		self.assertEqual(cancelled, 1)
+		self.assertEqual(result[0], 0)
+
+	def test_close(self):
+		async def run():
+			prop = aioprop.AsyncPropagator()
+			await prop.aclose()
+			await prop.aclose()
+			with self.assertRaises(Exception):
+				await prop.ds50utc(self.satKeys[0], self.times[0])
+		asyncio.run(run())
+		self.assertRaises(Exception, aioprop.AsyncPropagator, batchWindow=-1.0)
+		self.assertRaises(Exception, aioprop.AsyncPropagator, maxBatch=0)
+
+	def test_owner_stopped(self):
+		# a call raising SystemExit stops the owner thread, and nothing is left hanging
+		async def run():
+			prop = aioprop.AsyncPropagator()
+			blocker = asyncio.ensure_future(prop.call(time.sleep, 0.1))
+			await asyncio.sleep(0.01)
+			fatal = asyncio.ensure_future(prop.call(sys.exit, 0))
+			queued = asyncio.ensure_future(prop.ds50utc(self.satKeys[0], self.times[0]))
+			await blocker
+			for task in [fatal, queued]:
+				with self.assertRaises(Exception) as caught:
+					await asyncio.wait_for(task, 5.0)
+				self.assertIsInstance(caught.exception.__cause__, SystemExit)
+			with self.assertRaises(Exception):
+				await prop.ds50utc(self.satKeys[0], self.times[0])
+			await prop.aclose()
+			prop._thread.join(5.0)
+			return prop._thread.is_alive()
+		self.assertFalse(asyncio.run(run()))
+
+if __name__ == '__main__':
+	unittest.main()
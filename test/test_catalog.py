@@ -0,0 +1,98 @@
+#! /user/bin/env python3
+import unittest
+from dshsaa.raw import settings, maindll, envdll, timedll, tledll
+from dshsaa import catalog
+import numpy as np
+import pdb
+
+class TestCatalog(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init timefunc and tle
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % ('initer.__name__', retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		tledll.TleRemoveAllSats()
+		self.tleFile = './test/raw/inputs/tledll.tleloadfile.inp'
+	
+	def tearDown(self):
+		tledll.TleRemoveAllSats()
+	
+	def test_read_tle_file(self):
+		lines = catalog.read_tle_file(self.tleFile)
+		self.assertTrue(len(lines) > 0)
+		for (line1, line2) in lines:
+			self.assertTrue(line1.startswith('1 '))
+			self.assertTrue(line2.startswith('2 '))
+			self.assertEqual(line1[2:7], line2[2:7])
+	
+	def test_TleCatalog(self):
+		lines = catalog.read_tle_file(self.tleFile)
+		cat = catalog.TleCatalog.from_file(self.tleFile)
+		self.assertEqual(len(cat) + len(cat.rejected), len(lines))
+		self.assertTrue(len(cat) > 0)
+		self.assertEqual(cat.data.dtype, catalog.CATALOG_DTYPE)
+		self.assertEqual(tledll.TleGetCount(), len(cat))
+		
+		# the columns must agree with what tledll holds for each satKey
+		for row in cat.data[:5]:
+			satKey = settings.stay_int64(int(row['satKey']))
+			(retcode, satNum, secClass, satName, epochYr, epochDays, bstar, ephType, elsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum) = tledll.TleGetAllFieldsGP(satKey)
+			self.assertEqual(retcode, 0)
+			self.assertEqual(row['satNum'], satNum)
+			self.assertEqual(row['incli'], incli)
+			self.assertEqual(row['eccen'], eccen)
+			self.assertEqual(row['mnMotion'], mnMotion)
+			self.assertEqual(row['revNum'], revNum)
+		
+		# catalog-wide queries are array operations
+		high = cat.data[cat.data['incli'] > 60.0]
+		self.assertTrue(np.all(high['incli'] > 60.0))
+		np.testing.assert_array_equal(cat.satKeys(), cat.data['satKey'])
+		
+		# adding the same TLEs again is refused by tledll
+		added = cat.add_lines(lines[:2])
+		self.assertEqual(added, 0)
+		self.assertEqual(len(cat.rejected), 2)
+	
+	def test_sync(self):
+		lines = catalog.read_tle_file(self.tleFile)
+		cat = catalog.TleCatalog.from_lines(lines[:-2])
+		before = dict(zip(cat.data['satNum'].tolist(), cat.data['satKey'].tolist()))
+		
+		# drop the first TLE, give the second a new element set number and add the last two
+		(line1, line2) = lines[1]
+		elsetNum = int(line1[64:68]) + 1
+		line1 = _checksum(line1[:64] + '%4i' % (elsetNum) + line1[68:])
+		newLines = [(line1, line2)] + lines[2:]
+		counts = cat.sync(newLines)
+		self.assertEqual(counts, {'added': 2, 'removed': 1, 'updated': 1, 'unchanged': len(lines) - 4, 'rejected': 0})
+		self.assertEqual(len(cat), len(lines) - 1)
+		self.assertEqual(tledll.TleGetCount(), len(cat))
+		
+		# unchanged rows keep their satKey, the changed one carries the new elsetNum
+		for row in cat.data[:-3]:
+			self.assertEqual(row['satKey'], before[row['satNum']])
+		changed = cat.data[cat.data['satNum'] == int(line1[2:7])]
+		self.assertEqual(changed['elsetNum'][0], elsetNum)
+		(retcode, satNum, secClass, satName, epochYr, epochDays, bstar, ephType, loadedElsetNum, incli, node, eccen, omega, mnAnomaly, mnMotion, revNum) = tledll.TleGetAllFieldsGP(settings.stay_int64(int(changed['satKey'][0])))
+		self.assertEqual(loadedElsetNum, elsetNum)
+		
+		# syncing the same set again changes nothing
+		self.assertEqual(cat.sync(newLines), {'added': 0, 'removed': 0, 'updated': 0, 'unchanged': len(cat), 'rejected': 0})
+
+def _checksum(line):
+	# the modulo 10 checksum of a TLE line, in column 69
+	total = sum(int(ch) if ch.isdigit() else (1 if ch == '-' else 0) for ch in line[:68])
+	return line[:68] + str(total % 10)
+		
+if __name__ == '__main__':
+	unittest.main()
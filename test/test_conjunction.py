@@ -0,0 +1,91 @@
+#! /user/bin/env python3
+import unittest
+import itertools
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import conjunction, shells
+import pdb
+
+class TestConjunction(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+		
+		# near-circular orbits of the same size at the node at epoch, so that orbits in different planes cross there
+		self.satKeys = []
+		for k in range(40):
+			satKey = tledll.TleAddSatFrFieldsGP(90000 + k, 'U', 'TEST', 2020, 100.0, 0.0, 0, 1, 30.0 + 10.0 * (k % 6), 40.0 * (k // 6), 0.001, 0.0, 0.1 * k, 15.2, 1)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.start = 25676.0
+		self.stop = 25676.125
+	
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def test_Screen(self):
+		threshold = 300.0
+		screener = conjunction.ConjunctionScreener(self.satKeys, threshold=threshold, step=20.0 / 86400.0)
+		found = screener.Screen(self.start, self.stop)
+		self.assertEqual(found.dtype, conjunction.CONJUNCTION_DTYPE)
+		self.assertTrue(np.all(np.diff(found['tca']) >= 0))
+		self.assertTrue(np.all(found['sat1'] < found['sat2']))
+		self.assertTrue(np.all(found['missDistance'] <= threshold))
+		
+		# against every pair sampled every second
+		times = np.arange(self.start, self.stop, 1.0 / 86400.0)
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, times)
+		for (a, b) in itertools.combinations(range(len(self.satKeys)), 2):
+			d = np.linalg.norm(pos[a] - pos[b], axis=-1)
+			mine = found[(found['sat1'] == a) & (found['sat2'] == b)]
+			for row in mine:
+				# the refined miss distance is the minimum, the nearest sample is a little further
+				q = np.argmin(np.abs(times - row['tca']))
+				self.assertGreaterEqual(d[q], row['missDistance'] - 1e-6)
+				self.assertLessEqual(d[q], row['missDistance'] + row['relativeSpeed'])
+			minima = np.flatnonzero((d[1:-1] <= d[:-2]) & (d[1:-1] <= d[2:]) & (d[1:-1] < 0.95 * threshold)) + 1
+			for q in minima:
+				self.assertTrue(np.any(np.abs(mine['tca'] - times[q]) < 2.0 / 86400.0), "missed %i %i at %f" % (a, b, times[q]))
+		
+		# far fewer distance checks than every pair at every step
+		nstep = int(np.ceil((self.stop - self.start) / screener.step)) + 1
+		self.assertLess(screener.distanceChecks, len(self.satKeys) * (len(self.satKeys) - 1) // 2 * nstep)
+	
+	def test_ScreenIndex(self):
+		# a shared index gives the same result, and satellites left out of it are not screened
+		screener = conjunction.ConjunctionScreener(self.satKeys, threshold=300.0, step=20.0 / 86400.0)
+		found = screener.Screen(self.start, self.stop)
+		index = shells.ShellIndex.from_sgp4(self.satKeys, self.start)
+		np.testing.assert_array_equal(screener.Screen(self.start, self.stop, index=index), found)
+		index.remove(self.satKeys[:20])
+		partial = screener.Screen(self.start, self.stop, index=index)
+		self.assertTrue(np.all(partial['sat1'] >= 20))
+		np.testing.assert_array_equal(partial, found[found['sat1'] >= 20])
+		index.close()
+	
+	def test_GridPairs(self):
+		screener = conjunction.ConjunctionScreener([], threshold=50.0, step=1.0 / 86400.0, maxRelativeSpeed=0.0)
+		rng = np.random.default_rng(2)
+		pos = rng.uniform(-1000.0, 1000.0, (300, 3))
+		index = np.arange(300) * 2
+		(i, j) = screener._grid_pairs(pos, index)
+		expected = [(2 * a, 2 * b) for (a, b) in itertools.combinations(range(300), 2) if np.linalg.norm(pos[a] - pos[b]) <= 50.0]
+		self.assertEqual(sorted(zip(i.tolist(), j.tolist())), expected)
+
+if __name__ == '__main__':
+	unittest.main()
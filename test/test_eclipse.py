@@ -0,0 +1,118 @@
+#! /user/bin/env python3
+import unittest
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import eclipse, sunmoon
+import pdb
+
+class TestEclipse(unittest.TestCase):
+
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+
+		self.satKeys = []
+		for (line1, line2) in [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.start = 25876.0
+		self.stop = 25877.0
+		self.ephemeris = sunmoon.SunMoonEphemeris()
+
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+
+	def brute_force(self, finder, step):
+		# (sat, entry) of every eclipse found by sampling every step
+		times = np.arange(self.start, self.stop, step)
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, times)
+		dark = finder.Shadow(np.broadcast_to(times, pos.shape[:-1]), pos) < 0
+		entering = np.concatenate([dark[:, :1], dark[:, 1:] & ~dark[:, :-1]], axis=-1)
+		(sat, index) = np.nonzero(entering)
+		return (sat, times[index])
+
+	def test_FindEclipses(self):
+		for model in eclipse.MODELS:
+			finder = eclipse.EclipseFinder(model=model, ephemeris=self.ephemeris)
+			found = finder.FindEclipses(self.satKeys, self.start, self.stop)
+			self.assertEqual(found.dtype, eclipse.ECLIPSE_DTYPE)
+			self.assertTrue(np.all(np.diff(found['entry']) >= 0))
+			self.assertTrue(np.all(found['entry'] < found['exit']))
+			self.assertTrue(np.all(found['satKey'] == [self.satKeys[k].value for k in found['sat']]))
+			# low orbits spend at most about 40 minutes of each revolution in the shadow
+			self.assertTrue(np.all(found['exit'] - found['entry'] < 40.0 / 1440.0))
+
+			# the same eclipses as sampling every 5 seconds, with entry times inside the sample
+			step = 5.0 / 86400.0
+			(sat, entry) = self.brute_force(finder, step)
+			self.assertEqual(found.shape[0], sat.shape[0])
+			for (k, t) in zip(sat, entry):
+				mine = found[found['sat'] == k]
+				self.assertLess(np.min(np.abs(mine['entry'] - t)), step + finder.tolerance)
+			# a tenth of the propagations of a 10 second search is plenty
+			self.assertLess(finder.propagations, len(self.satKeys) * 8640 / 10)
+
+			# the refined times are on the edge of the shadow
+			for row in found[:5]:
+				for t in (row['entry'], row['exit']):
+					if t in (self.start, self.stop):
+						continue
+					(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch([self.satKeys[row['sat']]], np.array([t - finder.tolerance, t + finder.tolerance]))
+					shadow = finder.Shadow(np.array([t - finder.tolerance, t + finder.tolerance]), pos[0])
+					self.assertLessEqual(shadow[0] * shadow[1], 0.0)
+
+	def test_Models(self):
+		# the penumbra holds the umbra, and both are close to the cylinder for low orbits
+		found = {}
+		for model in eclipse.MODELS:
+			found[model] = eclipse.EclipseFinder(model=model, ephemeris=self.ephemeris).FindEclipses(self.satKeys[:1], self.start, self.stop)
+		self.assertEqual(found['umbra'].shape, found['penumbra'].shape)
+		self.assertTrue(np.all(found['penumbra']['entry'] <= found['umbra']['entry']))
+		self.assertTrue(np.all(found['penumbra']['exit'] >= found['umbra']['exit']))
+		self.assertTrue(np.allclose(found['cylindrical']['entry'], found['umbra']['entry'], atol=20.0 / 86400.0))
+
+	def test_shadow(self):
+		sunPos = np.array([1.496e8, 0.0, 0.0])
+		pos = np.array([[7000.0, 0.0, 0.0], [-7000.0, 0.0, 0.0], [-7000.0, 6000.0, 0.0], [0.0, 7000.0, 0.0]])
+		for model in eclipse.MODELS:
+			self.assertEqual(list(eclipse.shadow(model, pos, sunPos) < 0), [False, True, True, False])
+		self.assertAlmostEqual(eclipse.shadow('cylindrical', pos[2], sunPos), 6000.0 - eclipse.EARTH_RADIUS)
+		self.assertRaises(Exception, eclipse.shadow, 'disk', pos, sunPos)
+
+	def test_intervals(self):
+		finder = eclipse.EclipseFinder(ephemeris=self.ephemeris)
+		found = finder.FindEclipses(self.satKeys, self.start, self.stop)
+		split = eclipse.intervals(found, len(self.satKeys))
+		self.assertEqual(len(split), len(self.satKeys))
+		self.assertEqual(sum(s.shape[0] for s in split), found.shape[0])
+		for (k, s) in enumerate(split):
+			self.assertEqual(s.shape[1:], (2,))
+			self.assertTrue(np.all(s[:, 0] == found[found['sat'] == k]['entry']))
+
+	def test_Arguments(self):
+		self.assertRaises(Exception, eclipse.EclipseFinder, model='disk')
+		self.assertRaises(Exception, eclipse.EclipseFinder, stepsPerRev=2)
+		self.assertRaises(Exception, eclipse.EclipseFinder, tolerance=0.0)
+		finder = eclipse.EclipseFinder(ephemeris=self.ephemeris)
+		self.assertRaises(Exception, finder.FindEclipses, self.satKeys, self.stop, self.start)
+		self.assertEqual(finder.FindEclipses([], self.start, self.stop).shape, (0,))
+
+if __name__ == '__main__':
+	unittest.main()
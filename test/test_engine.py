@@ -0,0 +1,87 @@
+#! /user/bin/env python3
+import unittest
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import engine
+import numpy as np
+import pdb
+
+class TestEngine(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % ('initer.__name__', retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+		
+		# a small catalog, also loaded in this process to check the workers against
+		self.lines = [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 90021U RELEAS14 00 51.47568104  .00000184      0 0  00000-4   814', '2 90021   0.0222 182.4923 0000720  45.6036 131.8822  1.00271328 1199'),
+			('1 90023U RELEAS14 00 51.45013393  .00000064      0 0  00000-4   221', '2 90023  54.9132 182.6983 0017768 176.8444 183.1487  2.00558524 1395'),
+			('1 90028U RELEAS14 00 51.15714066 -.00000031      0 0 -13568-4   377', '2 90028  72.5158 115.6069 0011430 124.7615 235.4297 12.44396488 2428'),
+			('1 90029U RELEAS14 00 51.38558242  .00000961      0 0  44365-3   5319', '2 90029  98.7064 100.2836 0014146 119.4841 240.7749 14.21936187 1011'),
+		]
+		self.satKeys = []
+		for (line1, line2) in self.lines:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+	
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def test_PropagationEngine(self):
+		mse = np.arange(0, 1440, 60, dtype=np.float64)
+		ds50UTC = np.array([25852.0, 25852.5, 25853.0])
+		expect_mse = sgp4dll.Sgp4PropMseBatch(self.satKeys, mse)
+		expect_ds50UTC = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, ds50UTC)
+		
+		with engine.PropagationEngine(self.lines, nworkers=2) as eng:
+			self.assertEqual(eng.nworkers, 2)
+			self.assertEqual(eng.bounds[0], 0)
+			self.assertEqual(eng.bounds[-1], len(self.lines))
+			
+			# the workers must reproduce the single process results exactly
+			result = eng.PropMse(mse)
+			for (got, expect) in zip(result, expect_mse):
+				np.testing.assert_array_equal(got, expect)
+			result = eng.PropDs50UTC(ds50UTC)
+			for (got, expect) in zip(result, expect_ds50UTC):
+				np.testing.assert_array_equal(got, expect)
+			
+			# per satellite times and out=
+			times = np.tile(mse, (len(self.lines), 1)) + np.arange(len(self.lines))[:, None]
+			out = tuple(np.empty_like(ar) for ar in expect_mse)
+			result = eng.PropMse(times, out=out)
+			for (got, ar) in zip(result, out):
+				self.assertIs(got, ar)
+			np.testing.assert_array_equal(out[2], sgp4dll.Sgp4PropMseBatch(self.satKeys, times)[2])
+			
+			# bad inputs are caught before any worker is involved
+			with self.assertRaises(Exception):
+				eng.PropMse(np.zeros((2, 3)))
+			with self.assertRaises(Exception):
+				eng.PropMse(mse[:3], out=out)
+		
+		# a closed engine refuses work
+		with self.assertRaises(Exception):
+			eng.PropMse(mse)
+		
+		# more workers than satellites
+		with engine.PropagationEngine(self.lines[:2], nworkers=8) as eng:
+			self.assertEqual(eng.nworkers, 2)
+		
+if __name__ == '__main__':
+	unittest.main()
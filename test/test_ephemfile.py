@@ -0,0 +1,113 @@
+#! /user/bin/env python3
+import unittest
+import os
+import tempfile
+import ctypes
+from dshsaa import ephemfile
+import numpy as np
+import pdb
+
+class TestEphemFile(unittest.TestCase):
+	
+	def setUp(self):
+		(fd, self.path) = tempfile.mkstemp(suffix='.ephem')
+		os.close(fd)
+	
+	def tearDown(self):
+		os.remove(self.path)
+	
+	def make_records(self, start, step, count, seed):
+		ds50UTC = start + step * np.arange(count)
+		rng = np.random.default_rng(seed)
+		return ephemfile.pack_records(ds50UTC, np.zeros(count, dtype=np.int32), rng.normal(size=(count, 3)), rng.normal(size=(count, 3)), rng.normal(size=(count, 3)))
+	
+	def test_pack_records(self):
+		records = self.make_records(25852.0, 1/1440, 5, 0)
+		self.assertEqual(records.dtype, ephemfile.RECORD_DTYPE)
+		self.assertEqual(records.shape, (5,))
+		self.assertFalse(np.isnan(records['pos']).any())
+		self.assertEqual(ephemfile.RECORD_DTYPE.itemsize, 80)
+		self.assertEqual(ephemfile.BLOCK_DTYPE.itemsize, 64)
+	
+	def test_failed_samples(self):
+		# a failed propagation is written as NaN states, not as the garbage left in the DLL's buffers
+		ds50UTC = 25852.0 + np.arange(4) / 1440
+		retcode = np.array([0, 0, 6, 6], dtype=np.int32)
+		garbage = np.full((4, 3), 1e300)
+		garbage[:2] = 7000.0
+		records = ephemfile.pack_records(ds50UTC, retcode, garbage, garbage, garbage)
+		with ephemfile.EphemerisWriter(self.path) as writer:
+			writer.add(11, 25544, 25851.5, 25852.0, 1/1440, records)
+		records = ephemfile.EphemerisFile(self.path).records(0)
+		np.testing.assert_array_equal(records['ds50UTC'], ds50UTC)
+		for field in ['pos', 'vel', 'llh']:
+			np.testing.assert_array_equal(np.isnan(records[field]).all(axis=1), [False, False, True, True])
+			np.testing.assert_array_equal(records[field][:2], 7000.0)
+	
+	def test_round_trip(self):
+		step = 1/1440
+		a = self.make_records(25852.0, step, 1440, 1)
+		b = self.make_records(25853.0, step, 100, 2)
+		with ephemfile.EphemerisWriter(self.path) as writer:
+			writer.add(ctypes.c_int64(11), 25544, 25851.5, 25852.0, step, a)
+			# a stream is written chunk by chunk
+			count = writer.add_stream(12, 90021, 25852.9, 25853.0, step, (b[i:i + 30] for i in range(0, 100, 30)))
+			self.assertEqual(count, 100)
+			writer.add(13, 90022, 25852.9, 25853.0, step, np.zeros(0, dtype=ephemfile.RECORD_DTYPE))
+		
+		ephem = ephemfile.EphemerisFile(self.path)
+		self.assertEqual(len(ephem), 3)
+		self.assertEqual(ephem.headers['satNum'].tolist(), [25544, 90021, 90022])
+		self.assertEqual(ephem.headers['count'].tolist(), [1440, 100, 0])
+		self.assertEqual(ephem.find(satNum=90021).tolist(), [1])
+		self.assertEqual(ephem.find(satKey=11).tolist(), [0])
+		self.assertEqual(ephem.find(satNum=1).tolist(), [])
+		np.testing.assert_array_equal(ephem.records(0), a)
+		np.testing.assert_array_equal(ephem.records(1), b)
+		self.assertEqual(ephem.records(2).shape, (0,))
+		
+		# one hour out of the first block, both ends included
+		hour = ephem.read(0, 25852.5, 25852.5 + 1/24)
+		self.assertIsInstance(hour, np.memmap)
+		self.assertEqual(hour.shape, (61,))
+		np.testing.assert_array_equal(hour, a[720:781])
+		# spans running off either end are clipped
+		self.assertEqual(ephem.read(1, 25800.0, 25853.0 + 10 * step).shape, (11,))
+		self.assertEqual(ephem.read(1, 25900.0, 25901.0).shape, (0,))
+	
+	def test_bad_file(self):
+		with open(self.path, 'wb') as f:
+			f.write(b'not an ephemeris file')
+		with self.assertRaises(Exception):
+			ephemfile.EphemerisFile(self.path)
+
+	def test_failed_stream(self):
+		step = 1/1440
+		a = self.make_records(25852.0, step, 100, 1)
+		def failing():
+			yield a[:30]
+			raise ZeroDivisionError()
+		with ephemfile.EphemerisWriter(self.path) as writer:
+			writer.add(11, 25544, 25851.5, 25852.0, step, a)
+			with self.assertRaises(ZeroDivisionError):
+				writer.add_stream(12, 90021, 25851.5, 25852.0, step, failing())
+			writer.add(13, 90022, 25851.5, 25852.0, step, a)
+		# the partial block is gone and the blocks around it are intact
+		ephem = ephemfile.EphemerisFile(self.path)
+		self.assertEqual(ephem.headers['satNum'].tolist(), [25544, 90022])
+		np.testing.assert_array_equal(ephem.records(1), a)
+
+	def test_corrupt_count(self):
+		step = 1/1440
+		with ephemfile.EphemerisWriter(self.path) as writer:
+			writer.add(11, 25544, 25851.5, 25852.0, step, self.make_records(25852.0, step, 10, 1))
+		offset = ephemfile.FILE_HEADER_DTYPE.itemsize + ephemfile.BLOCK_DTYPE.fields['count'][1]
+		for count in [-1, 11]:
+			with open(self.path, 'r+b') as f:
+				f.seek(offset)
+				f.write(np.array([count], dtype='<i8').tobytes())
+			with self.assertRaisesRegex(Exception, 'corrupt'):
+				ephemfile.EphemerisFile(self.path)
+
+if __name__ == '__main__':
+	unittest.main()
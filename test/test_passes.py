@@ -0,0 +1,91 @@
+#! /user/bin/env python3
+import unittest
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import passes, topo
+import pdb
+
+class TestPasses(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+		
+		self.satKeys = []
+		for (line1, line2) in [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.sites = np.array([[38.8, -104.5, 1.9], [64.3, -149.2, 0.2], [-31.9, 115.9, 0.0]])
+		self.start = 25876.0
+		self.stop = 25877.0
+	
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def brute_force(self, minElevation, step):
+		# (site, sat, rise) of every pass found by sampling every step
+		times = np.arange(self.start, self.stop, step)
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, times)
+		el = topo.TopoEngine(self.sites).LookAngles(times, pos, vel)[..., topo.XA_TOPO_EL]
+		up = el >= minElevation
+		rising = np.concatenate([up[..., :1], up[..., 1:] & ~up[..., :-1]], axis=-1)
+		(site, sat, index) = np.nonzero(rising)
+		return (site, sat, times[index])
+	
+	def test_FindPasses(self):
+		predictor = passes.PassPredictor(self.sites, minElevation=5.0)
+		found = predictor.FindPasses(self.satKeys, self.start, self.stop)
+		self.assertEqual(found.dtype, passes.PASS_DTYPE)
+		self.assertTrue(np.all(np.diff(found['rise']) >= 0))
+		self.assertTrue(np.all(found['rise'] <= found['culmination']))
+		self.assertTrue(np.all(found['culmination'] <= found['set']))
+		self.assertTrue(np.all(found['maxElevation'] >= 5.0))
+		self.assertTrue(np.all(found['satKey'] == [self.satKeys[k].value for k in found['sat']]))
+		
+		# the same passes as sampling every 5 seconds, with rise times inside the sample
+		step = 5.0 / 86400.0
+		(site, sat, rise) = self.brute_force(5.0, step)
+		self.assertEqual(found.shape[0], site.shape[0])
+		for (s, k, t) in zip(site, sat, rise):
+			mine = found[(found['site'] == s) & (found['sat'] == k)]
+			self.assertLess(np.min(np.abs(mine['rise'] - t)), step + predictor.tolerance)
+		# a tenth of the propagations of a 10 second search per site and satellite is plenty
+		self.assertLess(predictor.propagations, len(self.sites) * len(self.satKeys) * 8640 / 10)
+		
+		# the refined events are where the elevation crosses the mask
+		engine = topo.TopoEngine(self.sites)
+		for row in found[:5]:
+			k = int(row['sat'])
+			for (t, expected) in [(row['rise'], 5.0), (row['set'], 5.0)]:
+				if t in (self.start, self.stop):
+					continue
+				(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropDs50UTC(self.satKeys[k], t)
+				el = engine.PairLookAngles([row['site']], [t], np.array([pos]), np.array([vel]))[0, topo.XA_TOPO_EL]
+				self.assertAlmostEqual(el, expected, delta=0.1)
+	
+	def test_Arguments(self):
+		self.assertRaises(Exception, passes.PassPredictor, self.sites, stepsPerRev=2)
+		self.assertRaises(Exception, passes.PassPredictor, self.sites, tolerance=0.0)
+		predictor = passes.PassPredictor(self.sites)
+		self.assertRaises(Exception, predictor.FindPasses, self.satKeys, self.stop, self.start)
+		self.assertEqual(predictor.FindPasses([], self.start, self.stop).shape, (0,))
+
+if __name__ == '__main__':
+	unittest.main()
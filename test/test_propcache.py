@@ -0,0 +1,109 @@
+#! /user/bin/env python3
+import unittest
+import gc
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll, events
+from dshsaa import propcache
+import pdb
+
+class TestPropCache(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % ('initer.__name__', retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+		
+		self.satKeys = []
+		for (line1, line2) in [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.cache = propcache.PropagationCache(maxsize=3)
+	
+	def tearDown(self):
+		self.cache.close()
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def test_hits_and_misses(self):
+		(satKey, other) = self.satKeys
+		expect = sgp4dll.Sgp4PropDs50UTC(satKey, 25852.6)
+		self.assertEqual(self.cache.Sgp4PropDs50UTC(satKey, 25852.6), expect)
+		self.assertEqual(self.cache.Sgp4PropDs50UTC(satKey, 25852.6), expect)
+		self.assertEqual(self.cache.Sgp4PropMse(satKey, 60.0), sgp4dll.Sgp4PropMse(satKey, 60.0))
+		stats = self.cache.stats()
+		self.assertEqual(stats['hits'], 1)
+		self.assertEqual(stats['misses'], 2)
+		self.assertEqual(stats['size'], 2)
+		
+		# a caller modifying its result does not modify the cache
+		result = self.cache.Sgp4PropDs50UTC(satKey, 25852.6)
+		result[2][0] = 0.0
+		self.assertEqual(self.cache.Sgp4PropDs50UTC(satKey, 25852.6), expect)
+	
+	def test_eviction(self):
+		satKey = self.satKeys[0]
+		for t in [25852.0, 25852.1, 25852.2, 25852.3]:
+			self.cache.Sgp4PropDs50UtcPos(satKey, t)
+		self.assertEqual(len(self.cache), 3)
+		self.assertEqual(self.cache.stats()['evictions'], 1)
+		# the least recently used entry went first
+		self.cache.Sgp4PropDs50UtcPos(satKey, 25852.1)
+		self.assertEqual(self.cache.stats()['hits'], 1)
+		self.cache.Sgp4PropDs50UtcPos(satKey, 25852.0)
+		self.assertEqual(self.cache.stats()['misses'], 5)
+		# a satellite whose entries were all evicted is forgotten
+		other = self.satKeys[1]
+		self.cache.Sgp4PropDs50UtcPos(other, 25852.0)
+		for t in [25852.4, 25852.5, 25852.6]:
+			self.cache.Sgp4PropDs50UtcPos(satKey, t)
+		self.assertEqual(list(self.cache._keysBySat), [satKey.value])
+	
+	def test_invalidation(self):
+		(satKey, other) = self.satKeys
+		self.cache.Sgp4PropDs50UtcLLH(satKey, 25852.6)
+		self.cache.Sgp4PropDs50UtcLLH(other, 25852.6)
+		# reinitializing one satellite drops its entries only
+		sgp4dll.Sgp4InitSat(satKey)
+		self.assertEqual(len(self.cache), 1)
+		self.assertEqual(self.cache.stats()['invalidations'], 1)
+		self.cache.Sgp4PropDs50UtcLLH(satKey, 25852.6)
+		tledll.TleSetField(satKey, 8, '52.0')
+		self.assertEqual(len(self.cache), 1)
+		sgp4dll.Sgp4ReepochTLE(other, 25853.0)
+		self.assertEqual(len(self.cache), 0)
+		# removing everything drops everything
+		self.cache.Sgp4PropDs50UtcLLH(satKey, 25852.6)
+		self.cache.Sgp4PropDs50UtcLLH(other, 25852.6)
+		tledll.TleRemoveAllSats()
+		self.assertEqual(len(self.cache), 0)
+		self.assertEqual(self.cache.stats()['invalidations'], 5)
+	
+	def test_close(self):
+		count = len(events._subscribers)
+		cache = propcache.PropagationCache()
+		self.assertEqual(len(events._subscribers), count + 1)
+		cache.close()
+		self.assertEqual(len(events._subscribers), count)
+		# an abandoned cache unsubscribes itself at the next event
+		cache = propcache.PropagationCache()
+		del cache
+		gc.collect()
+		events.notify('remove_all')
+		self.assertEqual(len(events._subscribers), count)
+	
+if __name__ == '__main__':
+	unittest.main()
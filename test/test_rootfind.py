@@ -0,0 +1,34 @@
+#! /user/bin/env python3
+import unittest
+import numpy as np
+from dshsaa import rootfind
+import pdb
+
+class TestRootFind(unittest.TestCase):
+
+	def test_regula_falsi(self):
+		# |f(lo)| == |f(hi)| puts the first guess on the midpoint, which must not pass for a root
+		root = rootfind.regula_falsi(lambda index, t: np.exp(3 * t) - np.cosh(3), [-1.0], [1.0], 1e-6)
+		self.assertAlmostEqual(root[0], np.log(np.cosh(3)) / 3, delta=1e-6)
+
+		# many brackets at once, simple and flat roots
+		rng = np.random.default_rng(0)
+		n = 500
+		center = rng.uniform(-1.0, 1.0, n)
+		power = rng.integers(1, 6, n)
+		def func(index, t):
+			d = t - center[index]
+			return np.sign(d) * np.abs(d) ** power[index]
+		lo = center - rng.uniform(0.01, 3.0, n)
+		hi = center + rng.uniform(0.01, 3.0, n)
+		root = rootfind.regula_falsi(func, lo, hi, 1e-6)
+		self.assertLess(np.abs(root - center).max(), 1e-6)
+		self.assertEqual(rootfind.regula_falsi(func, [], [], 1e-6).shape, (0,))
+
+	def test_maximize(self):
+		(t, ft) = rootfind.maximize(lambda index, t: -(t - 0.3) ** 2 + 1.0, [-1.0], [2.0], 1e-6)
+		self.assertAlmostEqual(t[0], 0.3, delta=1e-6)
+		self.assertAlmostEqual(ft[0], 1.0)
+
+if __name__ == '__main__':
+	unittest.main()
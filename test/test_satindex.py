@@ -0,0 +1,63 @@
+#! /user/bin/env python3
+import unittest
+from dshsaa.raw import settings, maindll, envdll, timedll, tledll
+from dshsaa import satindex
+import pdb
+
+class TestSatIndex(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init timefunc and tle
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		tledll.TleRemoveAllSats()
+		self.index = satindex.SatKeyIndex()
+	
+	def tearDown(self):
+		self.index.close()
+		tledll.TleRemoveAllSats()
+	
+	def test_SatKeyIndex(self):
+		# two elsets of the same satellite, the newer added first
+		new = tledll.TleAddSatFrFieldsGP(90001, 'U', 'TEST', 2020, 101.0, 0.0, 0, 2, 50.0, 10.0, 0.001, 0.0, 0.0, 15.2, 1)
+		old = tledll.TleAddSatFrFieldsGP(90001, 'U', 'TEST', 2020, 100.0, 0.0, 0, 1, 50.0, 10.0, 0.001, 0.0, 0.0, 15.2, 1)
+		other = tledll.TleAddSatFrFieldsGP(90002, 'U', 'TEST', 2020, 100.0, 0.0, 0, 1, 60.0, 10.0, 0.001, 0.0, 0.0, 15.2, 1)
+		self.assertEqual([satKey.value for satKey in self.index.satKeys(90001)], [old.value, new.value])
+		self.assertEqual(self.index.latest(90001).value, new.value)
+		self.assertEqual(self.index.satNum(other), 90002)
+		self.assertIsNone(self.index.latest(12345))
+		self.assertEqual(len(self.index), 3)
+		
+		# lookups do not read from tledll again
+		reads = self.index.reads
+		for k in range(10):
+			self.index.latest(90001)
+		self.assertEqual(self.index.reads, reads)
+		
+		# removals are followed
+		tledll.TleRemoveSat(new)
+		self.assertEqual(self.index.latest(90001).value, old.value)
+		tledll.TleRemoveSat(old)
+		self.assertNotIn(90001, self.index)
+		tledll.TleRemoveAllSats()
+		self.assertEqual(len(self.index), 0)
+	
+	def test_TleLoadFile(self):
+		self.assertEqual(len(self.index), 0)
+		tledll.TleLoadFile('./test/raw/inputs/tledll.tleloadfile.inp')
+		self.assertEqual(len(self.index), tledll.TleGetCount())
+		for satKey in tledll.TleGetLoaded():
+			satNum = self.index.satNum(satKey)
+			self.assertEqual(tledll.TleGetSatKey(satNum).value, self.index.latest(satNum).value)
+		
+if __name__ == '__main__':
+	unittest.main()
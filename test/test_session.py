@@ -0,0 +1,37 @@
+#! /user/bin/env python3
+import unittest
+from dshsaa.raw import settings, tledll, sgp4dll
+from dshsaa import session
+import pdb
+
+class TestSession(unittest.TestCase):
+	
+	def setUp(self):
+		self.session = session.start(licFilePath='./dshsaa/libdll/')
+	
+	def tearDown(self):
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def test_start(self):
+		# one session per process, every DLL timed
+		self.assertIs(session.start(), self.session)
+		self.assertIs(session.current(), self.session)
+		self.assertTrue(self.session.maindll_handle)
+		for name in ['maindll', 'timedll', 'tledll', 'envdll', 'astrodll', 'sgp4dll']:
+			self.assertGreaterEqual(self.session.timings[name], 0.0)
+	
+	def test_load_catalog(self):
+		cat = self.session.load_catalog('./test/raw/inputs/tledll.tleloadfile.inp')
+		self.assertTrue(len(cat) > 0)
+		self.assertIn('catalog', self.session.timings)
+		(retcode, mse, pos, vel, llh) = sgp4dll.Sgp4PropMse(settings.stay_int64(int(cat.satKeys()[0])), 0.0)
+		self.assertEqual(retcode, 0)
+	
+	def test_build_tcon_table(self):
+		table = self.session.build_tcon_table(25852.0, 25853.0)
+		self.assertIs(self.session.tconTable, table)
+		self.assertIn('tconTable', self.session.timings)
+		
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,99 @@
+#! /user/bin/env python3
+import unittest
+import itertools
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll, events
+from dshsaa import shells
+import pdb
+
+class TestShells(unittest.TestCase):
+	
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+		
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+		
+		rng = np.random.default_rng(1)
+		self.satKeys = np.arange(1000, 1300)
+		self.perigee = rng.uniform(6700.0, 8400.0, 300)
+		self.apogee = self.perigee + rng.exponential(100.0, 300)
+		self.index = shells.ShellIndex()
+		self.index.add(self.satKeys, self.perigee, self.apogee)
+	
+	def tearDown(self):
+		self.index.close()
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+	
+	def brute(self, rmin, rmax, alive):
+		return sorted(int(self.satKeys[k]) for k in range(300) if alive[k] and self.perigee[k] <= rmax and self.apogee[k] >= rmin)
+	
+	def test_query(self):
+		alive = np.ones(300, dtype=bool)
+		for (rmin, rmax) in [(6878.0, 6978.0), (0.0, 1e9), (7000.0, 7000.0), (9000.0, 9500.0)]:
+			self.assertEqual(sorted(self.index.query(rmin, rmax).tolist()), self.brute(rmin, rmax, alive))
+		
+		# removals and additions, before and after the arrays are rebuilt
+		self.index.remove(self.satKeys[:20])
+		alive[:20] = False
+		self.assertEqual(sorted(self.index.query(6878.0, 6978.0).tolist()), self.brute(6878.0, 6978.0, alive))
+		self.perigee[:40] = 7100.0
+		self.apogee[:40] = 7200.0
+		self.index.add(self.satKeys[:40], self.perigee[:40], self.apogee[:40])
+		alive[:40] = True
+		self.assertEqual(len(self.index), 300)
+		self.assertEqual(self.index.shell(self.satKeys[5]), (7100.0, 7200.0))
+		self.assertEqual(sorted(self.index.query(7150.0, 7160.0).tolist()), self.brute(7150.0, 7160.0, alive))
+		self.index.remove(self.satKeys[100:200])
+		alive[100:200] = False
+		self.assertGreater(self.index.rebuilds, 1)
+		self.assertNotIn(self.satKeys[150], self.index)
+		self.assertEqual(sorted(self.index.query(6878.0, 6978.0).tolist()), self.brute(6878.0, 6978.0, alive))
+	
+	def test_pairs(self):
+		self.index.remove([self.satKeys[7]])
+		pairs = self.index.pairs(15.0)
+		expected = [(int(self.satKeys[i]), int(self.satKeys[j])) for (i, j) in itertools.combinations(range(300), 2)
+					if i != 7 and j != 7 and self.perigee[i] <= self.apogee[j] + 15.0 and self.perigee[j] <= self.apogee[i] + 15.0]
+		self.assertEqual(sorted(map(tuple, pairs.tolist())), expected)
+	
+	def test_events(self):
+		# removing a satellite from the DLLs removes its shell
+		satKey = tledll.TleAddSatFrLines('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470')
+		self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+		index = shells.ShellIndex.from_sgp4([satKey], 25676.0)
+		(perigee, apogee) = index.shell(satKey)
+		self.assertTrue(6600.0 < perigee <= apogee < 6900.0)
+		# initializing again keeps the shell, changing the TLE drops it
+		self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+		self.assertIn(satKey, index)
+		tledll.TleSetField(satKey, 8, '52.0')
+		self.assertNotIn(satKey, index)
+		index.add([satKey], [perigee], [apogee])
+		tledll.TleRemoveSat(satKey)
+		self.assertNotIn(satKey, index)
+		self.index.add([satKey], [perigee], [apogee])
+		sgp4dll.Sgp4RemoveAllSats()
+		self.assertEqual(len(self.index), 0)
+		index.close()
+	
+	def test_shells_from_elements(self):
+		(perigee, apogee) = shells.shells_from_elements(np.array([15.5, 2.0]), np.array([0.0, 0.7]))
+		self.assertAlmostEqual(perigee[0], apogee[0])
+		self.assertTrue(6700.0 < perigee[0] < 6800.0)
+		self.assertAlmostEqual(perigee[1] / apogee[1], 0.3 / 1.7)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,59 @@
+#! /user/bin/env python3
+import unittest
+import os
+import tempfile
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll
+from dshsaa import sunmoon
+import pdb
+
+class TestSunMoon(unittest.TestCase):
+	
+	def setUp(self):
+		self.maindll_handle = maindll.DllMainInit()
+		for initer in [timedll.TimeFuncInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		self.ephem = sunmoon.SunMoonEphemeris()
+	
+	def test_CompSunMoonPos(self):
+		ds50ET = 25852.0 + np.random.default_rng(0).uniform(0.0, 3.0, (4, 25))
+		(uvecSun, sunVecMag, uvecMoon, moonVecMag) = self.ephem.CompSunMoonPos(ds50ET)
+		self.assertEqual(uvecSun.shape, (4, 25, 3))
+		self.assertEqual(moonVecMag.shape, (4, 25))
+		self.assertEqual(len(self.ephem), 3)
+		for (i, j) in [(0, 0), (1, 7), (3, 24)]:
+			expected = astrodll.CompSunMoonPos(ds50ET[i, j])
+			np.testing.assert_allclose(uvecSun[i, j], expected[0], atol=1e-10)
+			np.testing.assert_allclose(sunVecMag[i, j], expected[1], rtol=1e-10)
+			np.testing.assert_allclose(uvecMoon[i, j], expected[2], atol=1e-10)
+			np.testing.assert_allclose(moonVecMag[i, j], expected[3], rtol=1e-10)
+		(uvecSun2, sunVecMag2) = self.ephem.CompSunPos(ds50ET)
+		np.testing.assert_array_equal(uvecSun2, uvecSun)
+		# the cached segments are not sampled again
+		samples = self.ephem.samples
+		self.ephem.CompMoonPos(ds50ET)
+		self.assertEqual(self.ephem.samples, samples)
+	
+	def test_validate(self):
+		# the bound documented in the module description, 1e-4 km at the defaults
+		errors = self.ephem.validate(25852.0, 25862.0, count=500)
+		self.assertLess(errors['sun'], 1e-4)
+		self.assertLess(errors['moon'], 1e-4)
+	
+	def test_save(self):
+		self.ephem.cover(25852.0, 25854.5)
+		with tempfile.TemporaryDirectory() as folder:
+			cacheFile = os.path.join(folder, 'sunmoon.npz')
+			self.ephem.save(cacheFile)
+			loaded = sunmoon.SunMoonEphemeris(cacheFile=cacheFile)
+			self.assertEqual(len(loaded), 3)
+			ds50ET = np.linspace(25852.0, 25854.5, 100)
+			np.testing.assert_array_equal(loaded.CompSunMoonPos(ds50ET)[3], self.ephem.CompSunMoonPos(ds50ET)[3])
+			self.assertEqual(loaded.samples, 0)
+			# another degree does not use the file
+			self.assertEqual(len(sunmoon.SunMoonEphemeris(degree=8, cacheFile=cacheFile)), 0)
+		
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,112 @@
+#! /user/bin/env python3
+import unittest
+import threading
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll
+from dshsaa import threadpool
+import pdb
+
+class TestThreadPool(unittest.TestCase):
+
+	def setUp(self):
+		self.maindll_handle = maindll.DllMainInit()
+		for initer in [timedll.TimeFuncInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		self.pool = threadpool.ThreadPool(nthreads=4, minChunk=64)
+
+		# arguments of every function of THREAD_SAFE, 2000 rows each
+		rng = np.random.default_rng(0)
+		n = 2000
+		theta = rng.uniform(0.0, 2 * np.pi, n)
+		pos = rng.uniform(-8000.0, 8000.0, (n, 3))
+		vel = rng.uniform(-8.0, 8.0, (n, 3))
+		llh = np.stack([rng.uniform(-90.0, 90.0, n), rng.uniform(-180.0, 180.0, n), rng.uniform(0.0, 2.0, n)], axis=1)
+		kep = np.stack([rng.uniform(6600.0, 42000.0, n), rng.uniform(0.0, 0.5, n), rng.uniform(0.0, 180.0, n),
+						rng.uniform(0.0, 360.0, n), rng.uniform(0.0, 360.0, n), rng.uniform(0.0, 360.0, n)], axis=1)
+		ds50 = 25876.0 + rng.uniform(0.0, 10.0, (40, 50))
+		self.args = {'ECIToEFGBatch': (theta, pos, vel),
+					 'ECIToTopoCompsBatch': (theta, 38.8, llh * 10.0, pos, vel),
+					 'ECRToEFGBatch': (theta * 0.01, 0.3, pos, vel),
+					 'EFGPosToLLHBatch': (pos,),
+					 'EFGToECIBatch': (theta, pos, vel),
+					 'EFGToECRBatch': (theta * 0.01, 0.3, pos, vel),
+					 'KepToPosVelBatch': (kep,),
+					 'LLHToEFGPosBatch': (llh,),
+					 'PosVelToKepBatch': (pos, vel),
+					 'SolveKepEqtnBatch': (kep,),
+					 'XYZToLLHBatch': (theta, pos),
+					 'TAIToUT1Array': (ds50,),
+					 'TAIToUTCArray': (ds50,),
+					 'ThetaGrnwchFK5Array': (ds50,),
+					 'UTCToETArray': (ds50,),
+					 'UTCToTAIArray': (ds50,),
+					 'UTCToUT1Array': (ds50,)}
+
+	def tearDown(self):
+		self.pool.close()
+
+	def assertIdentical(self, result, expected):
+		# bit for bit, NaN included
+		results = [result] if isinstance(result, np.ndarray) else list(result)
+		expecteds = [expected] if isinstance(expected, np.ndarray) else list(expected)
+		self.assertEqual(len(results), len(expecteds))
+		for (ar, expect) in zip(results, expecteds):
+			self.assertEqual(ar.shape, expect.shape)
+			self.assertEqual(ar.tobytes(), expect.tobytes())
+
+	def test_run(self):
+		self.assertEqual(set(self.args), set(threadpool.THREAD_SAFE))
+		for (name, args) in self.args.items():
+			(module, rowsArg) = threadpool.THREAD_SAFE[name]
+			expected = getattr(module, name)(*args)
+			self.assertIdentical(self.pool.run(name, *args), expected)
+			self.assertIdentical(getattr(self.pool, name)(*args), expected)
+
+	def test_out(self):
+		(theta, pos, vel) = self.args['ECIToEFGBatch']
+		out = (np.empty((2000, 3)), np.empty((2000, 3)))
+		result = self.pool.run(astrodll.ECIToEFGBatch, theta, pos, vel, out=out)
+		self.assertIs(result[0], out[0])
+		self.assertIdentical(result, astrodll.ECIToEFGBatch(theta, pos, vel))
+		ds50 = self.args['UTCToETArray'][0]
+		out = np.empty(ds50.shape)
+		self.assertIs(self.pool.UTCToETArray(ds50, out=out), out)
+		self.assertIdentical(out, timedll.UTCToETArray(ds50))
+		self.assertRaises(Exception, self.pool.run, astrodll.ECIToEFGBatch, theta, pos, vel, out=(np.empty((10, 3)), np.empty((10, 3))))
+
+	def test_stress(self):
+		# every function from many threads at once, over and over, must match the serial results exactly
+		expected = {}
+		for (name, args) in self.args.items():
+			(module, rowsArg) = threadpool.THREAD_SAFE[name]
+			expected[name] = getattr(module, name)(*args)
+		failures = []
+		def hammer(seed):
+			order = np.random.default_rng(seed).permutation(sorted(self.args))
+			for name in order.tolist() * 3:
+				result = self.pool.run(name, *self.args[name])
+				try:
+					self.assertIdentical(result, expected[name])
+				except AssertionError as e:
+					failures.append((name, str(e)))
+		threads = [threading.Thread(target=hammer, args=(seed,)) for seed in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(failures, [])
+
+	def test_Arguments(self):
+		self.assertRaises(Exception, self.pool.run, 'Sgp4PropDs50UTCBatch')
+		self.assertRaises(Exception, self.pool.run, astrodll.ECIToEFG, 0.1, [1.0, 2.0, 3.0], [1.0, 2.0, 3.0])
+		self.assertRaises(AttributeError, getattr, self.pool, 'TleGetCount')
+		self.assertRaises(Exception, threadpool.ThreadPool, nthreads=0)
+		self.assertRaises(Exception, threadpool.ThreadPool, minChunk=0)
+		# short batches run on the calling thread
+		self.assertEqual(self.pool.EFGPosToLLHBatch(np.zeros((0, 3))).shape, (0, 3))
+		self.assertIdentical(self.pool.SolveKepEqtnBatch(self.args['SolveKepEqtnBatch'][0][:10]), astrodll.SolveKepEqtnBatch(self.args['SolveKepEqtnBatch'][0][:10]))
+
+if __name__ == '__main__':
+	unittest.main()
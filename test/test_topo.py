@@ -0,0 +1,61 @@
+#! /user/bin/env python3
+import unittest
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll
+from dshsaa import topo
+import pdb
+
+class TestTopo(unittest.TestCase):
+	
+	def setUp(self):
+		self.maindll_handle = maindll.DllMainInit()
+		for initer in [timedll.TimeFuncInit, envdll.EnvInit, astrodll.AstroFuncInit]:
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+		self.sites = np.array([[38.8, -104.5, 1.9], [64.3, -149.2, 0.2], [-31.9, 115.9, 0.0]])
+		self.engine = topo.TopoEngine(self.sites)
+		# two circular orbits sampled over a few hours
+		self.ds50UTC = 25600.0 + np.arange(50) / 144.0
+		angle = np.outer([0.06, 0.04], np.arange(50)) + np.array([[0.0], [2.0]])
+		radius = np.array([[6778.0], [7200.0]])
+		self.pos = np.stack([radius * np.cos(angle), radius * np.sin(angle) * 0.8, radius * np.sin(angle) * 0.6], axis=-1)
+		self.vel = np.stack([-np.sin(angle), np.cos(angle) * 0.8, np.cos(angle) * 0.6], axis=-1) * 7.5
+	
+	def test_LookAngles(self):
+		xa_topo = self.engine.LookAngles(self.ds50UTC, self.pos, self.vel)
+		self.assertEqual(xa_topo.shape, (3, 2, 50, topo.XA_TOPO_SIZE))
+		thetaG = [timedll.ThetaGrnwchFK5(timedll.UTCToUT1(t)) for t in self.ds50UTC]
+		for (s, k, t) in [(0, 0, 0), (1, 1, 17), (2, 0, 49), (2, 1, 30)]:
+			senPos = astrodll.LLHToXYZ(thetaG[t], self.sites[s].tolist())
+			theta = thetaG[t] + np.radians(self.sites[s, 1])
+			expected = astrodll.ECIToTopoComps(theta, self.sites[s, 0], senPos, self.pos[k, t].tolist(), self.vel[k, t].tolist())
+			np.testing.assert_allclose(xa_topo[s, k, t], expected, rtol=1e-9, atol=1e-9)
+		# preallocated output
+		out = np.empty((3, 2, 50, topo.XA_TOPO_SIZE))
+		self.assertIs(self.engine.LookAngles(self.ds50UTC, self.pos, self.vel, out=out), out)
+		np.testing.assert_array_equal(out, xa_topo)
+		self.assertRaises(Exception, self.engine.LookAngles, self.ds50UTC, self.pos, self.vel, out=np.empty((3, 2, 49, 10)))
+		self.assertRaises(Exception, self.engine.LookAngles, self.ds50UTC[:10], self.pos, self.vel)
+	
+	def test_Visible(self):
+		dense = self.engine.LookAngles(self.ds50UTC, self.pos, self.vel)
+		for minElevation in [-90.0, -20.0, 0.0]:
+			(site, sat, time, xa_topo) = self.engine.Visible(self.ds50UTC, self.pos, self.vel, minElevation=minElevation)
+			expected = np.argwhere(dense[..., topo.XA_TOPO_EL] >= minElevation)
+			found = np.stack([site, sat, time], axis=1)
+			self.assertEqual(sorted(map(tuple, found.tolist())), sorted(map(tuple, expected.tolist())))
+			np.testing.assert_array_equal(xa_topo, dense[site, sat, time])
+		# streaming in small chunks gives the same triples
+		chunks = list(self.engine.VisibleStream(self.ds50UTC, self.pos, self.vel, minElevation=0.0, chunkSize=7))
+		streamed = np.concatenate([chunk[2] for chunk in chunks]) if chunks else np.zeros(0)
+		self.assertEqual(sorted(streamed.tolist()), sorted(self.engine.Visible(self.ds50UTC, self.pos, self.vel)[2].tolist()))
+		self.assertRaises(Exception, self.engine.VisibleStream, self.ds50UTC, self.pos, self.vel, chunkSize=0)
+	
+	def test_NoneVisible(self):
+		(site, sat, time, xa_topo) = self.engine.Visible(self.ds50UTC, self.pos, self.vel, minElevation=90.0)
+		self.assertEqual(site.shape, (0,))
+		self.assertEqual(xa_topo.shape, (0, topo.XA_TOPO_SIZE))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,94 @@
+#! /user/bin/env python3
+import unittest
+import numpy as np
+from dshsaa.raw import settings, maindll, envdll, astrodll, timedll, tledll, sgp4dll
+from dshsaa import trajectory
+import pdb
+
+class TestTrajectory(unittest.TestCase):
+
+	def setUp(self):
+		#init maindll
+		self.maindll_handle = maindll.DllMainInit()
+
+		# init other dlls
+		def init_subdll(initer):
+			retcode = initer(self.maindll_handle)
+			if retcode != 0:
+				raise Exception("Failed to init %s with error code %i" % (initer.__name__, retcode))
+
+		init_subdll(timedll.TimeFuncInit)
+		init_subdll(tledll.TleInit)
+		init_subdll(envdll.EnvInit)
+		init_subdll(astrodll.AstroFuncInit)
+		sgp4dll.Sgp4SetLicFilePath('./dshsaa/libdll/') #get the license before initing sgp4
+		init_subdll(sgp4dll.Sgp4Init)
+
+		self.satKeys = []
+		for (line1, line2) in [
+			('1 25544U 98067A   19311.39056523  .00000757  00000-0  21099-4 0  9992', '2 25544  51.6451  11.2360 0005828 238.9618 210.3569 15.50258526197470'),
+			('1 23455U 94089A   97320.90946019  .00000140  00000-0  10191-3 0  2621', '2 23455  99.0090 272.6745 0008546 223.1686 136.8816 14.11711747148495')]:
+			satKey = tledll.TleAddSatFrLines(line1, line2)
+			self.assertEqual(sgp4dll.Sgp4InitSat(satKey), 0)
+			self.satKeys.append(satKey)
+		self.store = trajectory.TrajectoryStore()
+
+	def tearDown(self):
+		self.store.close()
+		sgp4dll.Sgp4RemoveAllSats()
+		tledll.TleRemoveAllSats()
+
+	def test_State(self):
+		ds50UTC = 25876.0 + np.random.default_rng(0).uniform(0.0, 1.0, 500)
+		(retcode, pos, vel) = self.store.State(self.satKeys, ds50UTC)
+		self.assertEqual(retcode.shape, (2, 500))
+		self.assertEqual(pos.shape, (2, 500, 3))
+		self.assertEqual(vel.shape, (2, 500, 3))
+		self.assertTrue(np.all(retcode == 0))
+		(expectRetcode, mse, expectPos, expectVel, llh) = sgp4dll.Sgp4PropDs50UTCBatch(self.satKeys, ds50UTC)
+		self.assertLess(np.abs(pos - expectPos).max(), 1e-3)
+		self.assertLess(np.abs(vel - expectVel).max(), 1e-6)
+		# 48 segments of 13 nodes per satellite, and no more once they are stored
+		self.assertEqual(len(self.store), 2 * 48)
+		self.assertEqual(self.store.propagations, 2 * 48 * 13)
+		(retcode, pos2, vel2) = self.store.State(self.satKeys[::-1], ds50UTC)
+		np.testing.assert_array_equal(pos2, pos[::-1])
+		self.assertEqual(self.store.propagations, 2 * 48 * 13)
+		# each satellite at its own times
+		(retcode, pos3, vel3) = self.store.State(self.satKeys, np.stack([ds50UTC, ds50UTC[::-1]]))
+		np.testing.assert_array_equal(pos3[1], pos[1, ::-1])
+
+	def test_validate(self):
+		# the documented bound, well below a meter
+		for satKey in self.satKeys:
+			errors = self.store.validate(satKey, 25876.0, 25877.0, count=500)
+			self.assertLess(errors['pos'], 1e-3)
+			self.assertLess(errors['vel'], 1e-6)
+		# longer segments are less accurate
+		coarse = trajectory.TrajectoryStore(segmentDays=1.0 / 4.0, degree=6)
+		self.assertGreater(coarse.validate(self.satKeys[0], 25876.0, 25877.0, count=500)['pos'], errors['pos'])
+		coarse.close()
+
+	def test_tune(self):
+		loose = trajectory.tune(self.satKeys, 25876.0, 25876.5, tolerance=1.0, count=200)
+		tight = trajectory.tune(self.satKeys, 25876.0, 25876.5, tolerance=1e-6, count=200)
+		self.assertIn(loose, trajectory.TUNE_SEGMENTS)
+		self.assertGreaterEqual(loose, tight)
+
+	def test_invalidation(self):
+		self.store.cover(self.satKeys, 25876.0, 25876.5)
+		self.assertEqual(len(self.store), 2 * 25)
+		# a change of one satellite drops its segments only
+		self.assertEqual(sgp4dll.Sgp4InitSat(self.satKeys[0]), 0)
+		self.assertEqual(len(self.store), 25)
+		sgp4dll.Sgp4RemoveAllSats()
+		self.assertEqual(len(self.store), 0)
+
+	def test_Arguments(self):
+		self.assertRaises(Exception, trajectory.TrajectoryStore, segmentDays=0.0)
+		self.assertRaises(Exception, trajectory.TrajectoryStore, degree=1)
+		self.assertRaises(Exception, self.store.State, self.satKeys, np.zeros((2, 2, 2)))
+		self.assertEqual(self.store.State([], np.array([25876.0]))[1].shape, (0, 1, 3))
+
+if __name__ == '__main__':
+	unittest.main()